@@ -1,5 +1,7 @@
 "use client";
 import { useEffect, useRef } from "react";
+import { toGeoJSON, type Topology } from "@/lib/topology";
+import { attachTiles, loadManifest } from "@/lib/tiles";
 
 function loadScript(src: string) {
   return new Promise<void>((resolve, reject) => {
@@ -54,26 +56,63 @@ export default function MapPage() {
       // Easy print
       (L as any).easyPrint({ exportOnly: true, title: 'Download map', filename: 'hospitals_map' }).addTo(map);
 
-      // Try to add HSA/HPA boundaries if present
+      // HSA/HPA boundaries: simplified level for the current zoom (scripts/build_geo_levels.py),
+      // falling back to the full-precision files when the levels are not built
+      const levelFor = (z: number) => (z <= 8 ? 'state' : z <= 11 ? 'region' : 'street');
+      const overlays = [
+        { name: 'hsa', label: 'HSA Boundaries', color: '#1f2937' },
+        { name: 'hpa', label: 'HPA Boundaries', color: '#059669' },
+      ].map((o) => ({ ...o, layer: null as any, level: '' }));
+      // One shared-arc topology per level carries every layer (scripts/build_topology.py)
+      const topologies = new Map<string, Promise<Topology | null>>();
+      function topologyFor(level: string) {
+        if (!topologies.has(level)) {
+          topologies.set(level, fetch(`/geo/levels/${level}/il.topo.json`).then((r) => (r.ok ? r.json() : null)).catch(() => null));
+        }
+        return topologies.get(level)!;
+      }
+      async function fetchGeo(name: string, level: string) {
+        const topo = await topologyFor(level);
+        const gj = topo && toGeoJSON(topo, name);
+        if (gj) return gj;
+        const res = await fetch(`/geo/levels/${level}/${name}.geojson`);
+        if (res.ok) return res.json();
+        const full = await fetch(`/geo/${name}.geojson`);
+        return full.ok ? full.json() : null;
+      }
       async function addBoundaries() {
-        try {
-          const [hsaRes, hpaRes] = await Promise.all([
-            fetch('/geo/hsa.geojson'),
-            fetch('/geo/hpa.geojson'),
-          ]);
-          if (hsaRes.ok) {
-            const hsa = await hsaRes.json();
-            const hsaLayer = L.geoJSON(hsa, { style: { color: '#1f2937', weight: 1, fillOpacity: 0 } });
-            (L as any).control.layers(undefined, { 'HSA Boundaries': hsaLayer }).addTo(map);
-          }
-          if (hpaRes.ok) {
-            const hpa = await hpaRes.json();
-            const hpaLayer = L.geoJSON(hpa, { style: { color: '#059669', weight: 1, fillOpacity: 0 } });
-            (L as any).control.layers(undefined, { 'HPA Boundaries': hpaLayer }).addTo(map);
-          }
-        } catch {}
+        const level = levelFor(map.getZoom());
+        for (const o of overlays) {
+          if (o.level === level) continue;
+          try {
+            const gj = await fetchGeo(o.name, level);
+            if (!gj) continue;
+            if (!o.layer) {
+              o.layer = L.geoJSON(gj, { style: { color: o.color, weight: 1, fillOpacity: 0 } });
+              (L as any).control.layers(undefined, { [o.label]: o.layer }).addTo(map);
+            } else {
+              o.layer.clearLayers();
+              o.layer.addData(gj);
+            }
+            o.level = level;
+          } catch {}
+        }
+      }
+      // Prefer the static tile pyramid (scripts/build_tiles.py): only tiles in view are fetched
+      const tilesBase = process.env.NEXT_PUBLIC_TILES_BASE || '/tiles';
+      const manifest = await loadManifest(tilesBase);
+      if (manifest) {
+        const byLayer: Record<string, any> = {};
+        for (const o of overlays) {
+          o.layer = L.geoJSON(undefined, { style: { color: o.color, weight: 1 } });
+          (L as any).control.layers(undefined, { [o.label]: o.layer }).addTo(map);
+          byLayer[o.name] = o.layer;
+        }
+        attachTiles(map, tilesBase, manifest, byLayer);
+      } else {
+        map.on('zoomend', addBoundaries);
+        addBoundaries();
       }
-      addBoundaries();
 
       await loadWithParams();
 
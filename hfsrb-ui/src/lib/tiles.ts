@@ -0,0 +1,73 @@
+// Loader for the static z/x/y GeoJSON tiles written by scripts/build_tiles.py
+// (served from out/site/tiles; tiles.json describes the pyramid).
+// Only tiles in view are fetched; zooms above maxzoom reuse the maxzoom tiles.
+
+export type TileManifest = {
+  tiles: string;
+  minzoom: number;
+  maxzoom: number;
+  bounds: [number, number, number, number];
+  layers: string[];
+};
+
+export async function loadManifest(base: string): Promise<TileManifest | null> {
+  try {
+    const res = await fetch(`${base}/tiles.json`);
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+}
+
+const lonToX = (lon: number, n: number) => Math.floor(((lon + 180) / 360) * n);
+function latToY(lat: number, n: number) {
+  const s = Math.sin((Math.max(-85.0511, Math.min(85.0511, lat)) * Math.PI) / 180);
+  return Math.floor((0.5 - Math.log((1 + s) / (1 - s)) / (4 * Math.PI)) * n);
+}
+
+// Keeps one Leaflet GeoJSON layer per tile layer name filled with the tiles in view.
+export function attachTiles(map: any, base: string, manifest: TileManifest, layers: Record<string, any>) {
+  const cache = new Map<string, Promise<any>>();
+  let zoom = -1;
+  let loaded = new Set<string>();
+
+  function fetchTile(z: number, x: number, y: number) {
+    const key = `${z}/${x}/${y}`;
+    if (!cache.has(key)) {
+      const url = `${base}/${manifest.tiles.replace('{z}', String(z)).replace('{x}', String(x)).replace('{y}', String(y))}`;
+      // Empty tiles are not written, so a 404 just means nothing to draw
+      cache.set(key, fetch(url).then((r) => (r.ok ? r.json() : null)).catch(() => null));
+    }
+    return cache.get(key)!;
+  }
+
+  async function update() {
+    const z = Math.max(manifest.minzoom, Math.min(manifest.maxzoom, Math.round(map.getZoom())));
+    if (z !== zoom) {
+      zoom = z;
+      loaded = new Set();
+      Object.values(layers).forEach((l) => l.clearLayers());
+    }
+    const n = 2 ** z;
+    const b = map.getBounds();
+    const [w, s, e, nb] = manifest.bounds;
+    const x0 = lonToX(Math.max(b.getWest(), w), n), x1 = lonToX(Math.min(b.getEast(), e), n);
+    const y0 = latToY(Math.min(b.getNorth(), nb), n), y1 = latToY(Math.max(b.getSouth(), s), n);
+    const pending: Promise<void>[] = [];
+    for (let x = x0; x <= x1; x++) {
+      for (let y = y0; y <= y1; y++) {
+        const key = `${z}/${x}/${y}`;
+        if (loaded.has(key)) continue;
+        loaded.add(key);
+        pending.push(fetchTile(z, x, y).then((fc) => {
+          if (!fc || z !== zoom) return;
+          for (const f of fc.features) layers[f.properties?.layer]?.addData(f);
+        }));
+      }
+    }
+    await Promise.all(pending);
+  }
+
+  map.on('moveend', update);
+  return update();
+}
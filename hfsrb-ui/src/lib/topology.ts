@@ -0,0 +1,56 @@
+// Decoder for the shared-arc topology written by scripts/build_topology.py
+// (public/geo/il.topo.json and public/geo/levels/<level>/il.topo.json).
+// Arcs are delta-encoded integers on a scale/translate grid; ~i references arc i reversed.
+
+type Position = [number, number];
+
+export type Topology = {
+  type: 'Topology';
+  transform: { scale: [number, number]; translate: [number, number] };
+  objects: Record<string, { type: 'GeometryCollection'; geometries: TopoGeometry[] }>;
+  arcs: Position[][];
+};
+
+type TopoGeometry = {
+  type: 'Polygon' | 'MultiPolygon' | null;
+  arcs?: number[][] | number[][][];
+  properties?: Record<string, unknown>;
+};
+
+function decodeArcs(topo: Topology): Position[][] {
+  const [sx, sy] = topo.transform.scale;
+  const [tx, ty] = topo.transform.translate;
+  return topo.arcs.map((arc) => {
+    let x = 0, y = 0;
+    return arc.map(([dx, dy]) => {
+      x += dx; y += dy;
+      return [x * sx + tx, y * sy + ty] as Position;
+    });
+  });
+}
+
+function ring(refs: number[], arcs: Position[][]): Position[] {
+  const out: Position[] = [];
+  for (const i of refs) {
+    const pts = i < 0 ? arcs[~i].slice().reverse() : arcs[i];
+    for (let k = out.length ? 1 : 0; k < pts.length; k++) out.push(pts[k]);
+  }
+  return out;
+}
+
+// GeoJSON FeatureCollection for one object (e.g. 'hsa', 'hpa', 'counties')
+export function toGeoJSON(topo: Topology, name: string) {
+  const obj = topo.objects[name];
+  if (!obj) return null;
+  const arcs = decodeArcs(topo);
+  const features = obj.geometries.map((g) => {
+    let geometry: any = null;
+    if (g.type === 'Polygon') {
+      geometry = { type: 'Polygon', coordinates: (g.arcs as number[][]).map((r) => ring(r, arcs)) };
+    } else if (g.type === 'MultiPolygon') {
+      geometry = { type: 'MultiPolygon', coordinates: (g.arcs as number[][][]).map((p) => p.map((r) => ring(r, arcs))) };
+    }
+    return { type: 'Feature' as const, geometry, properties: g.properties || {} };
+  });
+  return { type: 'FeatureCollection' as const, features };
+}
@@ -2,10 +2,15 @@
 from __future__ import annotations
 
 import argparse
-import json
+import copy
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Tuple, List, Optional
 
+import data_dictionary
+from json_io import read_json, write_json
+from profiling import run_main, traced
+
 try:
     import jsonschema  # for optional validation
 except Exception:
@@ -34,7 +39,7 @@ def load_mapping(ftype: str, year: int, meta: Dict[str, object] | None = None) -
     for c in candidates:
         p = MAPPINGS_DIR / c
         if p.exists():
-            return json.loads(p.read_text(encoding='utf-8'))
+            return read_json(p)
     raise SystemExit(f"No mapping found for {ftype} {year} in {MAPPINGS_DIR}")
 
 
@@ -54,6 +59,7 @@ def pick_hospital_schema_variant(meta: Dict, mapping_schema: str) -> Path:
     return Path(parts[0])
 
 
+@traced('build_payload')
 def build_payload(fields: Dict[str, str], mapping: Dict, schema_props: Dict[str, dict], meta: Dict[str, object]) -> Tuple[Dict, Dict]:
     out: Dict = {}
     used: Dict[str, str] = {}
@@ -192,6 +198,21 @@ def build_payload(fields: Dict[str, str], mapping: Dict, schema_props: Dict[str,
     return out, used
 
 
+@lru_cache(maxsize=None)
+def _load_schema(schema_path: str) -> Dict:
+    return read_json(Path(schema_path))
+
+
+def schema_properties(schema_path: Path) -> Dict[str, dict]:
+    """Property specs used to coerce values, from the compiled dictionary when one backs the schema.
+    Ingestion variants only relax constraints (required/pattern/enum), so their types are the same.
+    """
+    compiled = data_dictionary.for_schema(schema_path)
+    if compiled and compiled['has_fields']:
+        return compiled['schema']['properties']
+    return _load_schema(str(schema_path)).get('properties', {})
+
+
 def _strip_required(schema: Dict) -> Dict:
     if isinstance(schema, dict):
         schema.pop('required', None)
@@ -220,11 +241,12 @@ def _relax_numeric_types(schema: Dict) -> Dict:
     return schema
 
 
+@traced('validate_payload')
 def validate_payload(payload: Dict, schema_path: Path, ingestion: bool = False, lenient_types: bool = False) -> None:
     if not jsonschema:
         print("jsonschema not installed; skipping validation.")
         return
-    schema = json.loads(Path(schema_path).read_text(encoding='utf-8'))
+    schema = copy.deepcopy(_load_schema(str(schema_path)))
     if ingestion:
         schema = _strip_required(schema)
     if lenient_types:
@@ -264,7 +286,7 @@ def main():
                 data_path = fac_dir / 'data.json'
                 if not data_path.exists():
                     continue
-                doc = json.loads(data_path.read_text(encoding='utf-8'))
+                doc = read_json(data_path)
                 fields = doc.get('fields', {})
                 meta = doc.get('meta', {})
                 # Load mapping for LTC per facility
@@ -292,8 +314,7 @@ def main():
                     ing_variant = Path('schemas/json_ingestion') / Path(schema_path).name
                     if ing_variant.exists():
                         schema_path = ing_variant
-                schema = json.loads(Path(schema_path).read_text(encoding='utf-8'))
-                schema_props = schema.get('properties', {})
+                schema_props = schema_properties(schema_path)
 
                 payload, used = build_payload(fields, mapping, schema_props, meta)
                 out_doc = {
@@ -303,7 +324,7 @@ def main():
                     'schema': str(schema_path)
                 }
                 out_path = fac_dir / 'schema_payload.json'
-                out_path.write_text(json.dumps(out_doc, indent=2, ensure_ascii=False) + "\n", encoding='utf-8')
+                write_json(out_path, out_doc)
 
                 if args.validate:
                     try:
@@ -317,4 +338,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Time each pipeline stage on a synthetic corpus and compare with earlier runs.
+
+Runs the real scripts as subprocesses with the corpus (see
+gen_synthetic_corpus.py) as working directory, from a cold start: data/,
+out/ and web/data are removed first, so caches do not carry over between runs.
+
+Stages (in pipeline order; --stages picks a subset, later stages need the
+earlier ones' output):
+  csv          csv_to_facility_json.py
+  variants     normalize_hospital_ids.py, set_hospital_variant.py, set_ltc_variant.py
+  mappings     apply_mappings.py
+  validate     apply_mappings.py --validate --ingestion
+  normalize    normalize_astc_enums.py (per year), normalize_common_fields.py
+  index        build_dashboard_index.py
+  profiles     render_profiles.py --no-pdf
+
+Every stage is timed for wall-clock and child CPU seconds. Results go to
+out/bench/results/<corpus>/<timestamp>.json. Each run is compared per stage with
+the baseline (out/bench/baselines/<corpus>.json, written by --save-baseline)
+and with the previous result. The exit status is 1 when any stage is slower
+than the baseline by more than --max-regression percent.
+
+Usage:
+  python3 scripts/gen_synthetic_corpus.py --scale 1 --years 2023-2024
+  python3 scripts/bench_pipeline.py --corpus x1-2023-2024 --save-baseline
+  python3 scripts/bench_pipeline.py --corpus x1-2023-2024 --stages csv mappings index
+"""
+from __future__ import annotations
+
+import argparse
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from json_io import read_json, write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPORA = ROOT / 'out' / 'bench' / 'corpus'
+RESULTS = ROOT / 'out' / 'bench' / 'results'
+BASELINES = ROOT / 'out' / 'bench' / 'baselines'
+STAGE_ORDER = ['csv', 'variants', 'mappings', 'validate', 'normalize', 'index', 'profiles']
+
+
+def stage_commands(stage: str, years: List[int]) -> List[List[str]]:
+    py = sys.executable
+    if stage == 'csv':
+        return [[py, 'scripts/csv_to_facility_json.py']]
+    if stage == 'variants':
+        return [[py, 'scripts/normalize_hospital_ids.py'], [py, 'scripts/set_hospital_variant.py'],
+                [py, 'scripts/set_ltc_variant.py']]
+    if stage == 'mappings':
+        return [[py, 'scripts/apply_mappings.py']]
+    if stage == 'validate':
+        return [[py, 'scripts/apply_mappings.py', '--validate', '--ingestion']]
+    if stage == 'normalize':
+        return [[py, 'scripts/normalize_astc_enums.py', str(y)] for y in years] + \
+               [[py, 'scripts/normalize_common_fields.py', *map(str, years)]]
+    if stage == 'index':
+        return [[py, 'scripts/build_dashboard_index.py']]
+    if stage == 'profiles':
+        return [[py, 'scripts/render_profiles.py', '--no-pdf']]
+    raise ValueError(stage)
+
+
+def child_cpu() -> float:
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def run_stage(corpus: Path, stage: str, years: List[int], log) -> Dict[str, object]:
+    cpu0, t0 = child_cpu(), time.perf_counter()
+    rc = 0
+    for cmd in stage_commands(stage, years):
+        log.write(f"$ {' '.join(cmd[1:])}\n")
+        log.flush()
+        rc = subprocess.call(cmd, cwd=corpus, stdout=log, stderr=subprocess.STDOUT)
+        if rc:
+            break
+    return {'stage': stage, 'seconds': round(time.perf_counter() - t0, 3),
+            'cpu_seconds': round(child_cpu() - cpu0, 3), 'rc': rc}
+
+
+def git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result(corpus_name: str) -> Optional[dict]:
+    runs = sorted((RESULTS / corpus_name).glob('*.json'))
+    return read_json(runs[-1]) if runs else None
+
+
+def delta(cur: float, ref: Optional[float]) -> str:
+    if not ref:
+        return '       -'
+    return f"{(cur - ref) / ref * 100:+7.1f}%"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Benchmark pipeline stages on a synthetic corpus')
+    ap.add_argument('--corpus', required=True, help='Corpus name under out/bench/corpus (or a path)')
+    ap.add_argument('--stages', nargs='*', choices=STAGE_ORDER, default=STAGE_ORDER)
+    ap.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline for the corpus')
+    ap.add_argument('--max-regression', type=float, default=25.0, help='Fail when a stage is this many percent slower than the baseline')
+    args = ap.parse_args()
+
+    corpus = Path(args.corpus) if Path(args.corpus).is_dir() else CORPORA / args.corpus
+    info_path = corpus / 'corpus.json'
+    if not info_path.exists():
+        raise SystemExit(f"{corpus} is not a corpus; run scripts/gen_synthetic_corpus.py first")
+    info = read_json(info_path)
+    for d in ('data', 'out', 'web/data'):
+        shutil.rmtree(corpus / d, ignore_errors=True)
+
+    stages = [s for s in STAGE_ORDER if s in args.stages]
+    previous = latest_result(info['name'])
+    baseline_path = BASELINES / f"{info['name']}.json"
+    baseline = read_json(baseline_path) if baseline_path.exists() else None
+    started = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    results = []
+    with (corpus / 'bench.log').open('w', encoding='utf-8') as log:
+        for stage in stages:
+            r = run_stage(corpus, stage, info['years'], log)
+            r['per_facility_ms'] = round(r['seconds'] * 1000 / max(1, info['facility_years']), 3)
+            results.append(r)
+            if r['rc']:
+                print(f"{stage} failed (exit {r['rc']}); see {corpus / 'bench.log'}")
+                break
+
+    run = {
+        'corpus': info['name'], 'scale': info['scale'], 'years': info['years'],
+        'facility_years': info['facility_years'], 'started_at': started, 'git': git_rev(),
+        'python': platform.python_version(), 'platform': platform.platform(), 'stages': results,
+    }
+    out = RESULTS / info['name'] / f"{started.replace(':', '')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    write_json(out, run, ensure_ascii=True)
+
+    ref_base = {s['stage']: s['seconds'] for s in (baseline or {}).get('stages', [])}
+    ref_prev = {s['stage']: s['seconds'] for s in (previous or {}).get('stages', [])}
+    print(f"Corpus {info['name']}: {info['facility_years']} facility-years, scale {info['scale']}, "
+          f"years {info['years'][0]}-{info['years'][-1]}")
+    print(f"{'stage':<10}{'wall s':>9}{'cpu s':>9}{'ms/fac':>9}{'vs base':>10}{'vs prev':>10}")
+    regressions = []
+    for r in results:
+        b = ref_base.get(r['stage'])
+        print(f"{r['stage']:<10}{r['seconds']:>9.2f}{r['cpu_seconds']:>9.2f}{r['per_facility_ms']:>9.2f}"
+              f"{delta(r['seconds'], b):>10}{delta(r['seconds'], ref_prev.get(r['stage'])):>10}")
+        if b and (r['seconds'] - b) / b * 100 > args.max_regression:
+            regressions.append(r['stage'])
+    total = sum(r['seconds'] for r in results)
+    print(f"Total {total:.2f}s; result {out}")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(baseline_path, run, ensure_ascii=True)
+        print(f"Saved baseline {baseline_path}")
+    elif regressions:
+        print(f"Slower than baseline by more than {args.max_regression:.0f}%: {', '.join(regressions)}")
+    failed = any(r['rc'] for r in results)
+    raise SystemExit(1 if failed or (regressions and not args.save_baseline) else 0)
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -2,6 +2,8 @@
 import subprocess
 import sys
 
+from profiling import run_main
+
 def run(cmd: list[str]):
     print("$", " ".join(cmd))
     subprocess.check_call(cmd)
@@ -34,4 +36,4 @@ def main():
         run([sys.executable, 'scripts/apply_mappings.py', '--year', year, '--type', ftype, '--validate', '--ingestion'])
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -8,25 +8,418 @@ Writes: web/data/index.json with one record per facility containing:
   - relative path to data JSON (schema_payload)
 
 Also writes: web/data/summary.json rollups by county and region.
+
+Sharded columnar index (loaded by the dashboard and query page):
+  web/data/index/<year>-<type>.json  one minified shard per (year, type); one array
+                                     per field, county/city/region/variant
+                                     dictionary-encoded, one array per metric
+  web/data/index/manifest.json       shard list with counts, byte sizes and sha256,
+                                     plus the facet values needed to build filters
+  web/data/index/search-<year>.json  trigram/prefix inverted index over name, city,
+                                     county, ZIP and normalized facility ID; doc ids
+                                     are row positions across that year's shards in
+                                     manifest order, postings are delta-encoded
+
+Detail views (loaded by the dashboard's detail panel):
+  web/data/views/<year>-<type>.pack      minified {meta, payload, display} documents
+                                         (no unmapped_fields), one per line
+  web/data/views/<year>-<type>.idx.json  slug -> [byte offset, length] into the pack,
+                                         for HTTP Range reads or mmap
+  web/data/views/display-<schema>.json   per-schema field label/section/order/
+                                         description/required, fetched once per type
+
+Row metrics and rollup totals come from mappings/metrics.json via
+scripts/facility_metrics.py (cached per payload fingerprint in out/cache/).
+
+Area profile rollups (what the hfsrb-ui HSA/HPA summary tables hold):
+  web/data/rollups/<year>-<type>.json  per county, HSA, HPA and statewide: facility and
+                                       variant counts, summed beds/admissions/days,
+                                       occupancy, and payer/race/ethnicity shares
+                                       weighted by each facility's reported counts
+  meta.geo (scripts/tag_facility_geography.py) takes precedence for county/HSA/HPA;
+  HSA/HPA fall back to references/{hsa,hpa}_county_map.csv when a payload lacks them.
 """
 from __future__ import annotations
 
-import json
+import csv
+import hashlib
+import re
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from facility_metrics import MetricDefs, MetricsCache, fingerprint, to_num
+from json_io import dumps, loads, read_json, write_bytes, write_json
+from profiling import run_main, trace_span
 
 DATA = Path('data')
 OUT = Path('web/data')
+SHARDS = OUT / 'index'
+SHARD_VERSION = 1
+# Low-cardinality fields stored as an index into a per-shard dictionary
+DICT_FIELDS = ['county', 'city', 'region', 'variant']
+PLAIN_FIELDS = ['slug', 'name', 'zip', 'fid']
+# Row fields tokenized into the search index (web/index_shards.js tokenizes the same way)
+SEARCH_FIELDS = ['name', 'city', 'county', 'zip', 'fid']
+
+VIEWS = OUT / 'views'
+# Schema property keys the detail panel and CSV export read
+DISPLAY_KEYS = ['x_label', 'title', 'x_section', 'x_section_order', 'x_order', 'description', 'x_required']
+
+ROLLUPS = OUT / 'rollups'
+REFS = Path('references')
+GEOS = ['county', 'hsa', 'hpa']
+# Categorical count groups; shares are sum(category) / sum(all categories)
+_RACE_INP = {
+    'white': ['race_inp_white'], 'black': ['race_inp_black'], 'asian': ['race_inp_asian'],
+    'ai_an': ['race_inp_ai_an'], 'nh_pi': ['race_inp_nh_pi'], 'unknown': ['race_inp_unknown'],
+}
+_RACE_PAT = {
+    'white': ['race_white'], 'black': ['race_black', 'race_black_african_american'],
+    'asian': ['race_asian'], 'ai_an': ['race_american_indian', 'race_ai_an'],
+    'nh_pi': ['race_native_hawaiian_pacific_islander', 'race_nh_pi'], 'unknown': ['race_unknown'],
+}
+_ETH_PAT = {
+    'hispanic': ['ethnicity_hispanic_latino', 'eth_hispanic'],
+    'non_hispanic': ['ethnicity_non_hispanic', 'eth_not_hispanic'],
+    'unknown': ['ethnicity_unknown', 'eth_unknown'],
+}
+_PAYER_PAT = {
+    'medicare': ['pat_medicare'], 'medicaid': ['pat_medicaid'], 'private_ins': ['pat_private_insurance'],
+    'other_public': ['pat_other_public'], 'private_pay': ['pat_private_payment'], 'charity': ['pat_charity'],
+}
+ROLLUP_SHARES: Dict[str, Dict[str, Dict[str, List[str]]]] = {
+    'Hospital': {
+        'payer': {
+            'medicare': ['pay_inp_medicare'], 'medicaid': ['pay_inp_medicaid'],
+            'private_ins': ['pay_inp_private_ins'], 'other_public': ['pay_inp_other_public'],
+            'private_pay': ['pay_inp_private_pay'],
+        },
+        'race': _RACE_INP,
+        'eth': {
+            'hispanic': ['eth_inp_hispanic'], 'non_hispanic': ['eth_inp_not_hispanic'],
+            'unknown': ['eth_inp_unknown'],
+        },
+    },
+    'ESRD': {'payer': _PAYER_PAT, 'race': _RACE_PAT, 'eth': _ETH_PAT},
+    'ASTC': {'payer': _PAYER_PAT, 'race': _RACE_PAT, 'eth': _ETH_PAT},
+    'LTC': {
+        'payer': {
+            'medicare': ['patient_days_medicare'], 'medicaid': ['patient_days_medicaid'],
+            'private_ins': ['patient_days_private_insurance'], 'other_public': ['patient_days_other_public'],
+            'private_pay': ['patient_days_private_payment'], 'charity': ['patient_days_charity_care'],
+        },
+        'race': _RACE_PAT,
+        'eth': _ETH_PAT,
+    },
+}
 
 
 def load_json(p: Path) -> Dict[str, Any]:
-    return json.loads(p.read_text(encoding='utf-8'))
+    return read_json(p)
+
+
+def columnar_shard(year: int, ftype: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode one (year, type) slice of index rows column-wise."""
+    cols: Dict[str, List[Any]] = {f: [r.get(f, '') for r in rows] for f in PLAIN_FIELDS}
+    dicts: Dict[str, List[str]] = {}
+    for f in DICT_FIELDS:
+        values = sorted({str(r.get(f) or '') for r in rows})
+        pos = {v: i for i, v in enumerate(values)}
+        dicts[f] = values
+        cols[f] = [pos[str(r.get(f) or '')] for r in rows]
+    metric_names = sorted({k for r in rows for k in (r.get('metrics') or {})})
+    metrics = {m: [(r.get('metrics') or {}).get(m) for r in rows] for m in metric_names}
+    return {
+        'v': SHARD_VERSION,
+        'year': year,
+        'type': ftype,
+        'n': len(rows),
+        # data_path = base + slug + '/schema_payload.json'
+        'base': f"{DATA.as_posix()}/{year}/{ftype}/",
+        'dict': dicts,
+        'cols': cols,
+        'metrics': metrics,
+    }
+
+
+def search_tokens(text: str) -> List[str]:
+    return re.sub(r'[^a-z0-9]+', ' ', str(text or '').lower()).split()
+
+
+def search_keys(token: str) -> set:
+    """Index keys for one token: '^' + 1/2-char prefixes plus every trigram."""
+    keys = {'^' + token[:n] for n in (1, 2) if len(token) >= n}
+    keys.update(token[i:i + 3] for i in range(len(token) - 2))
+    return keys
+
+
+def search_shard(year: int, groups: List[tuple]) -> Dict[str, Any]:
+    """Inverted index for one year; groups are that year's (type, rows) in shard order."""
+    postings: Dict[str, List[int]] = {}
+    types = []
+    doc = 0
+    for ftype, grp in groups:
+        types.append({'type': ftype, 'offset': doc, 'count': len(grp)})
+        for r in grp:
+            keys = set()
+            for f in SEARCH_FIELDS:
+                for tok in search_tokens(r.get(f)):
+                    keys |= search_keys(tok)
+            for k in keys:
+                postings.setdefault(k, []).append(doc)
+            doc += 1
+    # Doc ids are appended in increasing order, so each list is already sorted
+    grams = {}
+    for k in sorted(postings):
+        ids = postings[k]
+        grams[k] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+    return {'v': SHARD_VERSION, 'year': year, 'docs': doc, 'types': types, 'grams': grams}
+
+
+def _display_name(schema_spec: str) -> str:
+    return Path(schema_spec or '').name.replace('.schema.json', '')
+
+
+def write_views(views: Dict[tuple, List[tuple]]) -> Dict[str, Any]:
+    """Write per-(year, type) view packs with offset indexes, plus per-schema display metadata."""
+    VIEWS.mkdir(parents=True, exist_ok=True)
+    written = set()
+    packs = []
+    schemas: Dict[str, str] = {}
+    for (year, ftype), docs in sorted(views.items(), key=lambda kv: (-kv[0][0], kv[0][1])):
+        entries: Dict[str, List[int]] = {}
+        chunks: List[bytes] = []
+        offset = 0
+        for slug, doc in docs:
+            display = _display_name(doc.get('schema') or '')
+            if display:
+                schemas.setdefault(display, doc['schema'])
+            view = {'meta': doc.get('meta', {}), 'payload': doc.get('payload', {}), 'display': display}
+            chunk = dumps(view, compact=True, newline=False)
+            entries[slug] = [offset, len(chunk)]
+            chunks.append(chunk + b'\n')
+            offset += len(chunk) + 1
+        body = b''.join(chunks)
+        name = f"{year}-{ftype}"
+        write_bytes(VIEWS / f"{name}.pack", body)
+        sha = hashlib.sha256(body).hexdigest()
+        idx = {'v': SHARD_VERSION, 'year': year, 'type': ftype, 'pack': f"views/{name}.pack",
+               'bytes': len(body), 'sha256': sha, 'entries': entries}
+        idx_body = dumps(idx, compact=True, newline=False)
+        write_bytes(VIEWS / f"{name}.idx.json", idx_body)
+        written.update({f"{name}.pack", f"{name}.idx.json"})
+        packs.append({'year': year, 'type': ftype, 'index': f"views/{name}.idx.json",
+                      'count': len(entries), 'bytes': len(body), 'sha256': hashlib.sha256(idx_body).hexdigest()})
+    display = {}
+    for dname, spec in sorted(schemas.items()):
+        sp = Path(spec)
+        if not sp.exists():
+            continue
+        props = (load_json(sp).get('properties') or {})
+        slim = {k: {dk: v[dk] for dk in DISPLAY_KEYS if dk in v} for k, v in props.items()}
+        body = dumps(slim, compact=True, newline=False)
+        fname = f"display-{dname}.json"
+        write_bytes(VIEWS / fname, body)
+        written.add(fname)
+        display[dname] = {'path': f"views/{fname}", 'sha256': hashlib.sha256(body).hexdigest()}
+    for old in VIEWS.iterdir():
+        if old.name not in written:
+            old.unlink()
+    return {'packs': packs, 'display': display}
+
+
+def write_shards(rows: List[Dict[str, Any]], views: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    SHARDS.mkdir(parents=True, exist_ok=True)
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault((r['year'], r['type']), []).append(r)
+    shards = []
+    written = set()
+    by_year: Dict[int, List[tuple]] = {}
+    for (year, ftype), grp in sorted(groups.items(), key=lambda kv: (-kv[0][0], kv[0][1])):
+        by_year.setdefault(year, []).append((ftype, grp))
+        body = dumps(columnar_shard(year, ftype, grp), compact=True, newline=False)
+        name = f"{year}-{ftype}.json"
+        write_bytes(SHARDS / name, body)
+        written.add(name)
+        shards.append({
+            'year': year,
+            'type': ftype,
+            'path': f"index/{name}",
+            'count': len(grp),
+            'bytes': len(body),
+            'sha256': hashlib.sha256(body).hexdigest(),
+        })
+    search = []
+    for year, year_groups in by_year.items():
+        body = dumps(search_shard(year, year_groups), compact=True, newline=False)
+        name = f"search-{year}.json"
+        write_bytes(SHARDS / name, body)
+        written.add(name)
+        search.append({
+            'year': year,
+            'path': f"index/{name}",
+            'docs': sum(len(g) for _, g in year_groups),
+            'bytes': len(body),
+            'sha256': hashlib.sha256(body).hexdigest(),
+        })
+    # Drop shards for (year, type) pairs that no longer exist
+    for old in SHARDS.glob('*.json'):
+        if old.name != 'manifest.json' and old.name not in written:
+            old.unlink()
+    manifest = {
+        'v': SHARD_VERSION,
+        'count': len(rows),
+        'fields': PLAIN_FIELDS + DICT_FIELDS,
+        'years': sorted({r['year'] for r in rows}, reverse=True),
+        'types': sorted({r['type'] for r in rows}),
+        'facets': {
+            'county': sorted({r['county'] for r in rows if r.get('county')}),
+            'region': sorted({str(r['region']) for r in rows if r.get('region')}),
+        },
+        'shards': shards,
+        'search': search,
+    }
+    if views:
+        manifest['views'] = views
+    write_json(SHARDS / 'manifest.json', manifest, compact=True, newline=False)
+    return manifest
+
+
+def _pick(payload: Dict[str, Any], keys: List[str]) -> float | None:
+    """First numeric value among keys."""
+    for k in keys:
+        x = to_num(payload.get(k))
+        if x is not None:
+            return x
+    return None
+
+
+def _norm_county(s: str) -> str:
+    return re.sub(r'[^a-z]+', '', re.sub(r'\bcounty\b', '', str(s or '').strip().lower()))
+
+
+def load_county_map(path: Path, col: str) -> Dict[str, str]:
+    if not path.exists():
+        return {}
+    with path.open(newline='', encoding='utf-8') as f:
+        return {_norm_county(r['county']): str(r[col]).strip() for r in csv.DictReader(f) if r.get(col)}
+
+
+def rollup_record(ftype: str, payload: Dict[str, Any], metrics: Dict[str, Any], defs: MetricDefs) -> Dict[str, Any]:
+    """Per-facility numeric inputs for the area rollups."""
+    sums, ratios = {}, {}
+    for name in defs.names(ftype, 'rollup'):
+        r = defs.ratio(ftype, name)
+        if r:
+            # Only facilities reporting both sides contribute to the area ratio
+            if metrics.get(r[0]) is not None and metrics.get(r[1]):
+                ratios[name] = (metrics[r[0]], metrics[r[1]])
+        else:
+            sums[name] = metrics.get(name)
+    shares = {}
+    for group, cats in ROLLUP_SHARES.get(ftype, {}).items():
+        counts = {c: _pick(payload, keys) for c, keys in cats.items()}
+        if any(v is not None for v in counts.values()):
+            shares[group] = counts
+    return {'sums': sums, 'shares': shares, 'ratios': ratios}
+
+
+def _round(x: float) -> float | int:
+    return int(x) if float(x).is_integer() else round(x, 2)
+
+
+def build_rollups(records: List[Dict[str, Any]], defs: MetricDefs) -> Dict[tuple, Dict[str, Any]]:
+    """Group facility records by (year, type) then geography code and aggregate.
+
+    One pass accumulates every geography at once; shares are count-weighted
+    (category totals over the group total), matching the admissions-weighted
+    shares in hfsrb-ui/scripts/load_hospital_profiles_2024.ts.
+    """
+    acc: Dict[tuple, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+    for rec in records:
+        by_geo = acc.setdefault((rec['year'], rec['type']), {g: {} for g in GEOS + ['state']})
+        keys = [(g, rec.get(g)) for g in GEOS] + [('state', 'IL')]
+        for geo, code in keys:
+            if not code:
+                continue
+            a = by_geo[geo].setdefault(code, {'facilities': 0, 'by_variant': {}, 'totals': {}, 'reporting': {}, 'counts': {}, 'ratios': {}})
+            a['facilities'] += 1
+            if rec.get('variant'):
+                a['by_variant'][rec['variant']] = a['by_variant'].get(rec['variant'], 0) + 1
+            for name, v in rec['sums'].items():
+                if v is not None:
+                    a['totals'][name] = a['totals'].get(name, 0.0) + v
+                    a['reporting'][name] = a['reporting'].get(name, 0) + 1
+            for name, (num, den) in rec['ratios'].items():
+                pair = a['ratios'].setdefault(name, [0.0, 0.0])
+                pair[0] += num
+                pair[1] += den
+            for group, counts in rec['shares'].items():
+                g = a['counts'].setdefault(group, {'n': 0, 'sum': {}})
+                g['n'] += 1
+                for c, v in counts.items():
+                    if v is not None:
+                        g['sum'][c] = g['sum'].get(c, 0.0) + v
+    out: Dict[tuple, Dict[str, Any]] = {}
+    for (year, ftype), by_geo in acc.items():
+        doc: Dict[str, Any] = {}
+        for geo, areas in by_geo.items():
+            doc[geo] = {}
+            for code in sorted(areas, key=lambda c: (len(str(c)), str(c))):
+                a = areas[code]
+                prof: Dict[str, Any] = {
+                    'facilities': a['facilities'],
+                    'by_variant': dict(sorted(a['by_variant'].items())),
+                    'totals': {k: _round(v) for k, v in a['totals'].items()},
+                    'reporting': a['reporting'],
+                }
+                for name, (num, den) in a['ratios'].items():
+                    if den > 0:
+                        prof[name] = round(num / (den * defs.ratio(ftype, name)[2]), 4)
+                shares = {}
+                for group, g in a['counts'].items():
+                    grand = sum(g['sum'].values())
+                    if grand > 0:
+                        shares[group] = {
+                            'n': g['n'],
+                            'base': _round(grand),
+                            'share': {c: round(v / grand, 4) for c, v in g['sum'].items()},
+                        }
+                prof['shares'] = shares
+                doc[geo][code] = prof
+        out[(year, ftype)] = doc
+    return out
+
+
+def write_rollups(records: List[Dict[str, Any]], defs: MetricDefs) -> int:
+    ROLLUPS.mkdir(parents=True, exist_ok=True)
+    written = set()
+    areas = 0
+    for (year, ftype), doc in sorted(build_rollups(records, defs).items()):
+        name = f"{year}-{ftype}.json"
+        body = {'year': year, 'type': ftype, **doc}
+        write_json(ROLLUPS / name, body, compact=True, newline=False)
+        written.add(name)
+        areas += sum(len(doc[g]) for g in GEOS)
+    for old in ROLLUPS.glob('*.json'):
+        if old.name not in written:
+            old.unlink()
+    return areas
 
 
 def main() -> None:
     OUT.mkdir(parents=True, exist_ok=True)
+    hsa_by_county = load_county_map(REFS / 'hsa_county_map.csv', 'hsa')
+    hpa_by_county = load_county_map(REFS / 'hpa_county_map.csv', 'hpa')
+    metrics_cache = MetricsCache()
     rows = []
+    records: List[Dict[str, Any]] = []
+    # (year, type) -> [(fingerprint, payload, row, record)], metrics filled in per batch
+    pending: Dict[tuple, List[tuple]] = {}
+    views: Dict[tuple, List[tuple]] = {}
     summary: Dict[str, Dict[str, Dict[str, Dict[str, int]]]] = {}
+    index_row = trace_span('index_row')
     for year_dir in sorted(DATA.iterdir()):
         if not year_dir.is_dir() or not year_dir.name.isdigit():
             continue
@@ -36,13 +429,15 @@ def main() -> None:
             if not base.exists():
                 continue
             for fac_dir in sorted(base.iterdir()):
+                index_row.start()
                 if not fac_dir.is_dir():
                     continue
                 sp = fac_dir / 'schema_payload.json'
                 if not sp.exists():
                     continue
                 try:
-                    doc = load_json(sp)
+                    raw = sp.read_bytes()
+                    doc = loads(raw)
                 except Exception:
                     continue
                 meta = doc.get('meta', {})
@@ -60,89 +455,17 @@ def main() -> None:
                 city = payload.get('address_city') or payload.get('facility_city') or ''
                 zipc = payload.get('address_zip') or payload.get('facility_zip') or ''
                 variant = meta.get('ahq_variant') or meta.get('ltc_variant') or ''
-                county = payload.get('county') or fields.get('county') or ''
+                # Point-in-polygon tags from tag_facility_geography.py win over free-text fields
+                geo = meta.get('geo') or {}
+                county = geo.get('county') or payload.get('county') or fields.get('county') or ''
                 # Region/HSA if available
                 region = (
-                    payload.get('hsa')
+                    geo.get('hsa')
+                    or payload.get('hsa')
                     or fields.get('hsa')
                     or fields.get('health_service_area')
                     or ''
                 )
-                # Curated numeric metrics for NL query (optional per type)
-                def to_num(v):
-                    try:
-                        s = str(v)
-                        s = ''.join(ch for ch in s if (ch.isdigit() or ch in '.-'))
-                        if not s:
-                            return None
-                        x = float(s)
-                        return int(x) if x.is_integer() else x
-                    except Exception:
-                        return None
-                def first_num(keys):
-                    for k in keys:
-                        if k in payload and payload[k] not in (None, ''):
-                            n = to_num(payload.get(k))
-                            if n is not None:
-                                return n
-                    return None
-                def sum_prefix(prefix):
-                    total = 0
-                    found = False
-                    for k, v in (payload or {}).items():
-                        if isinstance(k, str) and k.startswith(prefix) and v not in (None, ''):
-                            n = to_num(v)
-                            if n is not None:
-                                total += n
-                                found = True
-                    return total if found else None
-                metrics = {}
-                if ftype == 'Hospital':
-                    metrics['ms_beds'] = first_num(['ms_beds_10_1_23','med_surg_beds_oct1'])
-                    metrics['icu_beds'] = first_num(['total_icu_beds_10_1_23','icu_beds_oct1'])
-                    metrics['op_visits_total'] = first_num(['op_visits_total'])
-                    # Aggregate OR rooms across ip/op/combined
-                    or_rooms = sum_prefix('or_rooms_')
-                    if or_rooms is not None:
-                        metrics['or_rooms_total'] = or_rooms
-                    # Aggregate OR cases across ip/op and class B where available
-                    or_cases = 0; found_cases = False
-                    for key in ['or_cases_ip','or_cases_op','procB_cases_ip','procB_cases_op']:
-                        n = to_num(payload.get(key))
-                        if n is not None:
-                            or_cases += n; found_cases = True
-                    if found_cases:
-                        metrics['or_cases_total'] = or_cases
-                    # Separate class C vs class B cases if available
-                    oc = 0; ocf=False
-                    for key in ['or_cases_ip','or_cases_op']:
-                        n = to_num(payload.get(key))
-                        if n is not None: oc += n; ocf=True
-                    if ocf: metrics['or_cases_class_c'] = oc
-                    ob = 0; obf=False
-                    for key in ['procB_cases_ip','procB_cases_op']:
-                        n = to_num(payload.get(key))
-                        if n is not None: ob += n; obf=True
-                    if obf: metrics['or_cases_class_b'] = ob
-                    # ED visits if present (best-effort)
-                    metrics['ed_visits'] = first_num(['ed_visits','er_visits','ed_total_visits'])
-                    # Inpatient payer counts
-                    metrics['pay_medicare'] = first_num(['pay_inp_medicare'])
-                    metrics['pay_medicaid'] = first_num(['pay_inp_medicaid'])
-                    metrics['pay_private_ins'] = first_num(['pay_inp_private_ins'])
-                    metrics['pay_other_public'] = first_num(['pay_inp_other_public'])
-                    metrics['pay_private_pay'] = first_num(['pay_inp_private_pay'])
-                elif ftype == 'ESRD':
-                    metrics['stations_setup'] = first_num(['stations_oct_setup_staffed'])
-                    metrics['fte_total'] = first_num(['fte_total'])
-                elif ftype == 'ASTC':
-                    metrics['or_rooms_class_c'] = first_num(['rooms_or_class_c'])
-                    metrics['rooms_exam'] = first_num(['rooms_exam'])
-                    metrics['fte_total'] = first_num(['fte_total'])
-                elif ftype == 'LTC':
-                    metrics['beds_licensed_idd'] = first_num(['beds_licensed_idd'])
-                    metrics['days_total_idd'] = first_num(['days_total_idd'])
-
                 rows.append({
                     'year': year,
                     'type': ftype,
@@ -153,9 +476,21 @@ def main() -> None:
                     'county': county,
                     'region': region,
                     'variant': variant,
+                    'fid': str(meta.get('facility_id_normalized') or meta.get('facility_id') or ''),
                     'data_path': str(sp),
-                    'metrics': metrics,
+                    'metrics': {},
+                })
+                views.setdefault((year, ftype), []).append((fac_dir.name, doc))
+                ckey = _norm_county(county)
+                records.append({
+                    'year': year,
+                    'type': ftype,
+                    'variant': variant,
+                    'county': county,
+                    'hsa': str(region or hsa_by_county.get(ckey, '')),
+                    'hpa': str(geo.get('hpa') or fields.get('hpa') or payload.get('hpa') or hpa_by_county.get(ckey, '')),
                 })
+                pending.setdefault((year, ftype), []).append((fingerprint(raw), payload, rows[-1], records[-1]))
                 # Build summary rollups
                 ykey = str(year)
                 tkey = ftype
@@ -171,10 +506,31 @@ def main() -> None:
                 br = bucket.setdefault('by_region', {})
                 if region:
                     br[region] = br.get(region, 0) + 1
-    (OUT / 'index.json').write_text(json.dumps(rows, indent=2), encoding='utf-8')
-    (OUT / 'summary.json').write_text(json.dumps(summary, indent=2), encoding='utf-8')
+                index_row.stop()
+    # Evaluate metrics once per (year, type) batch; unchanged payloads come from the cache
+    for (year, ftype), items in pending.items():
+        index_names = metrics_cache.defs.names(ftype, 'index')
+        computed = metrics_cache.compute(ftype, [(fp, payload) for fp, payload, _, _ in items])
+        for (fp, payload, row, rec), m in zip(items, computed):
+            row['metrics'] = {n: m[n] for n in index_names if n in m}
+            rec.update(rollup_record(ftype, payload, m, metrics_cache.defs))
+    metrics_cache.save()
+    write_json(OUT / 'index.json', rows, ensure_ascii=True, newline=False)
+    write_json(OUT / 'summary.json', summary, ensure_ascii=True, newline=False)
+    view_info = write_views(views)
+    manifest = write_shards(rows, view_info)
+    shard_bytes = sum(sh['bytes'] for sh in manifest['shards'])
     print(f"Wrote {len(rows)} facilities to {OUT/'index.json'} and rollups to {OUT/'summary.json'}")
+    search_bytes = sum(sh['bytes'] for sh in manifest['search'])
+    print(f"Wrote {len(manifest['shards'])} columnar shards ({shard_bytes:,} bytes), "
+          f"{len(manifest['search'])} search shards ({search_bytes:,} bytes) and {SHARDS/'manifest.json'}")
+    pack_bytes = sum(p['bytes'] for p in view_info['packs'])
+    print(f"Wrote {len(view_info['packs'])} view packs ({pack_bytes:,} bytes) and "
+          f"{len(view_info['display'])} display metadata files to {VIEWS}/")
+    areas = write_rollups(records, metrics_cache.defs)
+    print(f"Wrote {areas} county/HSA/HPA profile rollups to {ROLLUPS}/")
+    print(f"Metrics: {metrics_cache.misses} evaluated, {metrics_cache.hits} from cache ({metrics_cache.path})")
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
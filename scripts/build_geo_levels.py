@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Build multi-resolution map overlays from the full-precision boundary GeoJSON.
+
+Inputs (defaults): hfsrb-ui/public/geo/{counties.il,hsa,hpa,chicago_community_areas}.geojson
+
+Outputs:
+- hfsrb-ui/public/geo/levels/<level>/<name>.geojson for each level in LEVELS
+- hfsrb-ui/public/geo/levels/report.json — bytes and vertex counts per output
+
+Rings are cut into arcs at junctions (vertices where the set of neighbouring
+vertices changes, i.e. where a shared border starts or ends). Each distinct arc
+is simplified once with Douglas–Peucker, keeping its end points, and snapped to
+the level's coordinate grid, so neighbouring polygons keep identical borders
+(no slivers or gaps) at every level. The map picks the level for its zoom.
+
+Usage:
+  python3 scripts/build_geo_levels.py
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from json_io import dumps, read_json, write_bytes, write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+GEO = ROOT / 'hfsrb-ui' / 'public' / 'geo'
+INPUTS = ['counties.il.geojson', 'hsa.geojson', 'hpa.geojson', 'chicago_community_areas.geojson']
+
+# name -> (Douglas–Peucker tolerance in degrees, grid decimals, highest map zoom served)
+LEVELS = {
+    'state': (0.005, 3, 8),
+    'region': (0.001, 4, 11),
+    'street': (0.0001, 5, 22),
+}
+
+Point = Tuple[float, float]
+Ring = List[Point]
+
+
+def load_geojson(path: Path) -> Optional[dict]:
+    try:
+        doc = read_json(path)
+    except (OSError, ValueError):
+        return None
+    return doc if isinstance(doc, dict) and doc.get('features') else None
+
+
+def geometry_polygons(geom: Optional[dict]) -> List[List[Ring]]:
+    """(Multi)Polygon -> list of polygons, each a list of closed rings of tuples."""
+    if not geom or geom.get('type') not in ('Polygon', 'MultiPolygon'):
+        return []
+    polys = [geom['coordinates']] if geom['type'] == 'Polygon' else geom['coordinates']
+    out = []
+    for poly in polys:
+        rings = []
+        for ring in poly:
+            r = [(float(p[0]), float(p[1])) for p in ring]
+            if len(r) >= 3:
+                if r[0] != r[-1]:
+                    r.append(r[0])
+                rings.append(r)
+        if rings:
+            out.append(rings)
+    return out
+
+
+def polygons_geometry(polys: List[List[Ring]]) -> Optional[dict]:
+    coords = [[[list(p) for p in ring] for ring in poly] for poly in polys]
+    if not coords:
+        return None
+    if len(coords) == 1:
+        return {'type': 'Polygon', 'coordinates': coords[0]}
+    return {'type': 'MultiPolygon', 'coordinates': coords}
+
+
+def find_junctions(rings: Iterable[Ring]) -> Set[Point]:
+    """Vertices with more than two distinct neighbours across all rings."""
+    neighbours: Dict[Point, Set[Point]] = {}
+    for r in rings:
+        n = len(r) - 1
+        for i in range(n):
+            s = neighbours.setdefault(r[i], set())
+            s.add(r[i - 1] if i else r[n - 1])
+            s.add(r[i + 1])
+    return {p for p, s in neighbours.items() if len(s) > 2}
+
+
+def split_ring(ring: Ring, junctions: Set[Point]) -> List[Ring]:
+    """Cut a closed ring into arcs that start and end at junctions (or one closed arc)."""
+    body = ring[:-1]
+    cuts = [i for i, p in enumerate(body) if p in junctions]
+    if not cuts:
+        return [ring]
+    k = cuts[0]
+    rot = body[k:] + body[:k] + [body[k]]
+    arcs, start = [], 0
+    for i in range(1, len(rot)):
+        if rot[i] in junctions:
+            arcs.append(rot[start:i + 1])
+            start = i
+    return arcs
+
+
+def canonical(arc: Ring) -> Tuple[Tuple[Point, ...], bool]:
+    """Direction-independent key for an arc; closed junction-free rings are also rotated.
+    Returns (key, reversed) where reversed says the key runs against the input arc."""
+    if arc[0] == arc[-1] and len(arc) > 2:
+        body = arc[:-1]
+        k = body.index(min(body))
+        fwd = body[k:] + body[:k]
+        rev = [fwd[0]] + fwd[1:][::-1]
+        if tuple(rev) < tuple(fwd):
+            return tuple(rev + [rev[0]]), True
+        return tuple(fwd + [fwd[0]]), False
+    rev = tuple(arc[::-1])
+    fwd = tuple(arc)
+    return (rev, True) if rev < fwd else (fwd, False)
+
+
+def _seg_dist2(p: Point, a: Point, b: Point) -> float:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    l2 = dx * dx + dy * dy
+    if l2 == 0:
+        return (p[0] - a[0]) ** 2 + (p[1] - a[1]) ** 2
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / l2))
+    x, y = a[0] + t * dx, a[1] + t * dy
+    return (p[0] - x) ** 2 + (p[1] - y) ** 2
+
+
+def _farthest(pts: Ring, i: int, j: int) -> Tuple[int, float]:
+    best, dmax = -1, -1.0
+    for k in range(i + 1, j):
+        d = _seg_dist2(pts[k], pts[i], pts[j])
+        if d > dmax:
+            best, dmax = k, d
+    return best, dmax
+
+
+def douglas_peucker(pts: Ring, tol: float) -> Ring:
+    """Keep end points; closed arcs keep at least two interior points, open arcs one."""
+    n = len(pts)
+    if n <= 2:
+        return list(pts)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tol * tol
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        k, d = _farthest(pts, i, j)
+        if k >= 0 and d > tol2:
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    need = min(n - 2, 2 if pts[0] == pts[-1] else 1)
+    while sum(keep) - 2 < need:
+        idx = [i for i in range(n) if keep[i]]
+        cand = max((_farthest(pts, a, b) for a, b in zip(idx, idx[1:])), key=lambda c: c[1])
+        keep[cand[0]] = True
+    return [p for p, k in zip(pts, keep) if k]
+
+
+def quantize(pts: Ring, digits: int) -> Ring:
+    out: Ring = []
+    for x, y in pts:
+        q = (round(x, digits), round(y, digits))
+        if not out or out[-1] != q:
+            out.append(q)
+    return out
+
+
+class ArcSimplifier:
+    """Simplifies each distinct arc once, so shared borders stay identical on both sides."""
+
+    def __init__(self, tol: float, digits: int) -> None:
+        self.tol = tol
+        self.digits = digits
+        self.cache: Dict[Tuple[Point, ...], Ring] = {}
+
+    def arc(self, arc: Ring) -> Ring:
+        key, rev = canonical(arc)
+        out = self.cache.get(key)
+        if out is None:
+            out = self.cache[key] = quantize(douglas_peucker(list(key), self.tol), self.digits)
+        return out[::-1] if rev else out
+
+    def ring(self, ring: Ring, junctions: Set[Point]) -> Optional[Ring]:
+        out: Ring = []
+        for a in split_ring(ring, junctions):
+            s = self.arc(a)
+            out.extend(s[1:] if out and out[-1] == s[0] else s)
+        if out and out[0] != out[-1]:
+            out.append(out[0])
+        return out if len(out) >= 4 else None
+
+
+def vertex_count(doc: dict) -> int:
+    return sum(len(r) for f in doc.get('features', []) for poly in geometry_polygons(f.get('geometry')) for r in poly)
+
+
+def simplify_layers(docs: Dict[str, dict], level: str) -> Dict[str, Tuple[dict, int]]:
+    """Simplify all layers together: junctions and arcs are shared across layers, so an HSA
+    border stays identical to the county borders it follows."""
+    tol, digits, _ = LEVELS[level]
+    shapes = {name: [(f, geometry_polygons(f.get('geometry'))) for f in doc['features']] for name, doc in docs.items()}
+    junctions = find_junctions(r for feats in shapes.values() for _, polys in feats for poly in polys for r in poly)
+    simp = ArcSimplifier(tol, digits)
+    result = {}
+    for name, feats in shapes.items():
+        dropped = 0
+        out = {'type': 'FeatureCollection', 'features': []}
+        for f, polys in feats:
+            new_polys = []
+            for poly in polys:
+                rings = [simp.ring(r, junctions) for r in poly]
+                if rings[0] is None:
+                    dropped += len(rings)
+                    continue
+                dropped += sum(1 for r in rings if r is None)
+                new_polys.append([r for r in rings if r is not None])
+            geom = polygons_geometry(new_polys)
+            if geom is None:
+                dropped += 1
+                continue
+            out['features'].append({'type': 'Feature', 'geometry': geom, 'properties': f.get('properties', {})})
+        result[name] = (out, dropped)
+    return result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Write simplified, quantized overlay levels and a size report')
+    ap.add_argument('--geo-dir', default=str(GEO))
+    ap.add_argument('--outdir', default=str(GEO / 'levels'))
+    ap.add_argument('--input', action='append', help='GeoJSON file name under --geo-dir (repeatable; default: all overlays)')
+    args = ap.parse_args()
+
+    geo_dir, outdir = Path(args.geo_dir), Path(args.outdir)
+    report = {'levels': {k: {'tolerance': v[0], 'decimals': v[1], 'max_zoom': v[2]} for k, v in LEVELS.items()}, 'files': {}}
+    docs: Dict[str, dict] = {}
+    for name in args.input or INPUTS:
+        src = geo_dir / name
+        doc = load_geojson(src)
+        if doc is None:
+            print(f"Skipping {src} (missing, empty or not GeoJSON)")
+            continue
+        stem = name[:-len('.geojson')] if name.endswith('.geojson') else name
+        docs[stem] = doc
+        report['files'][stem] = {'source': {'bytes': src.stat().st_size, 'vertices': vertex_count(doc), 'features': len(doc['features'])}}
+    for level in LEVELS:
+        for stem, (simplified, dropped) in simplify_layers(docs, level).items():
+            dst = outdir / level / f'{stem}.geojson'
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            body = dumps(simplified, compact=True, newline=False)
+            write_bytes(dst, body)
+            report['files'][stem][level] = {'bytes': len(body), 'vertices': vertex_count(simplified),
+                                            'features': len(simplified['features']), 'dropped_rings': dropped}
+    for stem, entry in report['files'].items():
+        src_e = entry['source']
+        print(f"{stem}: {src_e['bytes'] / 1024:.0f} KB / {src_e['vertices']} vertices -> " + ', '.join(
+            f"{lv} {entry[lv]['bytes'] / 1024:.0f} KB / {entry[lv]['vertices']}" for lv in LEVELS))
+    outdir.mkdir(parents=True, exist_ok=True)
+    write_json(outdir / 'report.json', report, ensure_ascii=True)
+    print(f"Wrote {outdir}/<level>/*.geojson and {outdir / 'report.json'}")
+
+
+if __name__ == '__main__':
+    run_main(main)
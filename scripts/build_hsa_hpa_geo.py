@@ -12,16 +12,22 @@ Outputs:
 
 Notes:
 - This uses naive HTML-to-text stripping and heuristics to parse mappings.
-- It assigns properties to counties and emits one combined GeoJSON with all county features annotated.
-- Leaflet overlay loads the entire GeoJSON; it does not dissolve polygons by code (no geometry libs required).
+- Member polygons (counties, Chicago community areas) are dissolved into one
+  Polygon/MultiPolygon per HSA/HPA code by cancelling the edges neighbouring
+  members share (pure Python, no geometry libs). Members must tile without
+  overlapping, which counties and community areas do.
+- --no-dissolve keeps the old output: one annotated copy of each member polygon.
 """
 from __future__ import annotations
 import argparse
 import csv
-import json
 import re
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
+
+from json_io import read_json, write_json
+from profiling import run_main
 
 ROOT = Path(__file__).resolve().parent.parent
 
@@ -164,7 +170,7 @@ def parse_hpa_chicago_from_text(txt: str) -> Dict[str, List[Dict[str, Any]]]:
 
 
 def load_chicago_community_areas(path: Path):
-    data = json.loads(path.read_text(encoding='utf-8'))
+    data = read_json(path)
     feats = data.get('features') or []
     if not feats:
         raise SystemExit('No features in Chicago community areas GeoJSON')
@@ -220,6 +226,157 @@ def annotate_chicago_hpa(ca_geo_path: Path, hpa_ca_map: Dict[str, List[Dict[str,
     return out
 
 
+Point = Tuple[float, float]
+
+
+def _signed_area(ring: List[Point]) -> float:
+    return sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(ring, ring[1:])) / 2.0
+
+
+def _point_in_ring(pt: Point, ring: List[Point]) -> bool:
+    x, y = pt
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def _oriented_rings(geom: dict) -> List[List[Point]]:
+    """Closed rings of a (Multi)Polygon with outer rings counter-clockwise and holes clockwise."""
+    if not geom:
+        return []
+    polys = [geom['coordinates']] if geom.get('type') == 'Polygon' else geom.get('coordinates') or []
+    out = []
+    for poly in polys:
+        for i, ring in enumerate(poly):
+            r = [(float(p[0]), float(p[1])) for p in ring]
+            if len(r) < 3:
+                continue
+            if r[0] != r[-1]:
+                r.append(r[0])
+            if (_signed_area(r) > 0) != (i == 0):
+                r.reverse()
+            out.append(r)
+    return out
+
+
+def _split_edges(rings: List[List[Point]], cell: float = 0.05) -> List[Tuple[Point, Point]]:
+    """Directed edges of all rings, split wherever another member's vertex lies on an edge
+    (a T-junction), so both sides of a shared border consist of identical segments."""
+    grid: Dict[Tuple[int, int], List[Point]] = defaultdict(list)
+    for p in {p for r in rings for p in r}:
+        grid[(int(p[0] // cell), int(p[1] // cell))].append(p)
+    edges = []
+    for r in rings:
+        for a, b in zip(r, r[1:]):
+            if a == b:
+                continue
+            dx, dy = b[0] - a[0], b[1] - a[1]
+            l2 = dx * dx + dy * dy
+            x0, x1 = sorted((a[0], b[0]))
+            y0, y1 = sorted((a[1], b[1]))
+            mids = []
+            for gx in range(int(x0 // cell), int(x1 // cell) + 1):
+                for gy in range(int(y0 // cell), int(y1 // cell) + 1):
+                    for p in grid.get((gx, gy), ()):
+                        if p == a or p == b or not (x0 <= p[0] <= x1 and y0 <= p[1] <= y1):
+                            continue
+                        cross = (p[0] - a[0]) * dy - (p[1] - a[1]) * dx
+                        if cross * cross <= 1e-18 * l2:
+                            mids.append((((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / l2, p))
+            pts = [a] + [p for _, p in sorted(mids)] + [b]
+            edges.extend(zip(pts, pts[1:]))
+    return edges
+
+
+def _assemble_rings(edges: List[Tuple[Point, Point]]) -> List[List[Point]]:
+    """Walk directed edges into closed rings, cutting a ring off whenever the walk revisits a vertex
+    (so polygons touching at a single point come out as separate rings)."""
+    nxt: Dict[Point, List[Point]] = defaultdict(list)
+    for u, v in edges:
+        nxt[u].append(v)
+    rings = []
+    while nxt:
+        cur = next(iter(nxt))
+        path = [cur]
+        pos = {cur: 0}
+        while True:
+            outs = nxt.get(cur)
+            if not outs:
+                break
+            v = outs.pop()
+            if not outs:
+                del nxt[cur]
+            if v in pos:
+                i = pos[v]
+                rings.append(path[i:] + [v])
+                for p in path[i + 1:]:
+                    del pos[p]
+                path = path[:i + 1]
+            else:
+                pos[v] = len(path)
+                path.append(v)
+            cur = v
+    return [r for r in rings if len(r) >= 4 and _signed_area(r) != 0]
+
+
+def dissolve(geoms: List[dict]) -> Optional[dict]:
+    """Merge non-overlapping (Multi)Polygons into one geometry by cancelling shared edges."""
+    rings = [r for g in geoms for r in _oriented_rings(g)]
+    # A shared border appears once in each direction; keep only edges without a reverse twin
+    count: Dict[Tuple[Point, Point], int] = defaultdict(int)
+    for u, v in _split_edges(rings):
+        if count.get((v, u), 0) > 0:
+            count[(v, u)] -= 1
+        else:
+            count[(u, v)] += 1
+    boundary = [e for e, n in count.items() for _ in range(n)]
+    shells, holes = [], []
+    for r in _assemble_rings(boundary):
+        (shells if _signed_area(r) > 0 else holes).append(r)
+    if not shells:
+        return None
+    shells.sort(key=_signed_area)
+    polys = [[s] for s in shells]
+    for h in holes:
+        # Smallest shell containing the hole
+        for i, s in enumerate(shells):
+            if any(_point_in_ring(p, s) for p in h[:3]):
+                polys[i].append(h)
+                break
+    coords = [[[list(p) for p in ring] for ring in poly] for poly in reversed(polys)]
+    if len(coords) == 1:
+        return {"type": "Polygon", "coordinates": coords[0]}
+    return {"type": "MultiPolygon", "coordinates": coords}
+
+
+def dissolve_by_code(fc: dict, code_prop: str) -> dict:
+    """One feature per code from member features annotated with code_prop."""
+    members: Dict[str, List[dict]] = {}
+    for f in fc.get('features', []):
+        code = f.get('properties', {}).get(code_prop)
+        if code is not None:
+            members.setdefault(str(code), []).append(f)
+    out = {"type": "FeatureCollection", "features": []}
+    for code in sorted(members):
+        feats = members[code]
+        geom = dissolve([f.get('geometry') for f in feats])
+        if geom is None:
+            continue
+        names = sorted({str(f['properties'].get('name') or f['properties'].get('NAMELSAD') or '') for f in feats} - {''})
+        out["features"].append({
+            "type": "Feature",
+            "geometry": geom,
+            "properties": {code_prop: code, "name": f"{code_prop} {code}", "members": names},
+        })
+    return out
+
+
+def vertex_count(fc: dict) -> int:
+    return sum(len(r) for f in fc.get('features', []) for r in _oriented_rings(f.get('geometry')))
+
+
 def load_csv_map(path: Path, code_key: str) -> Dict[str, List[str]]:
     """Parse CSV with headers: county,<code_key> (e.g., county,hsa)
     Returns dict mapping code -> list[county]."""
@@ -245,6 +402,7 @@ def main():
     ap.add_argument('--hpa_csv', default=str(ROOT / 'references' / 'hpa_county_map.csv'))
     ap.add_argument('--chicago_ca', default=str(ROOT / 'hfsrb-ui' / 'public' / 'geo' / 'chicago_community_areas.geojson'))
     ap.add_argument('--outdir', default=str(ROOT / 'hfsrb-ui' / 'public' / 'geo'))
+    ap.add_argument('--no-dissolve', action='store_true', help='Emit one annotated copy of each member polygon instead of dissolved areas')
     args = ap.parse_args()
 
     html_path = Path(args.html)
@@ -253,15 +411,19 @@ def main():
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    if not html_path.exists():
-        raise SystemExit(f"Missing HTML: {html_path}")
     if not counties_path.exists():
         raise SystemExit(f"Missing counties GeoJSON: {counties_path}")
 
     # Prefer CSV mappings if present
     hsa_map = load_csv_map(Path(args.hsa_csv), 'hsa')
     hpa_map = load_csv_map(Path(args.hpa_csv), 'hpa')
-    txt = read_text_strip_html(html_path)
+    if html_path.exists():
+        txt = read_text_strip_html(html_path)
+    elif hsa_map or hpa_map:
+        print(f"Note: {html_path} not found; using the county CSVs only")
+        txt = ''
+    else:
+        raise SystemExit(f"Missing HTML: {html_path}")
     # Parse any HSA/HPA county lists directly (rare)
     hsa_map2, hpa_map2 = parse_mapping_from_text(txt)
     # Merge parsed county lists into CSV maps
@@ -275,7 +437,7 @@ def main():
     if not (hsa_map or hpa_map or hpa_ca_map):
         raise SystemExit("No HSA/HPA mappings found: provide CSVs or HTML with county/community lists.")
 
-    base_geo = json.loads(counties_path.read_text(encoding='utf-8'))
+    base_geo = read_json(counties_path)
     hsa_geo, hpa_geo_counties = annotate_counties(base_geo, hsa_map, hpa_map)
     # If we have Chicago community area mapping, annotate and merge into HPA
     if hpa_ca_map and chicago_ca_path.exists():
@@ -291,9 +453,19 @@ def main():
     else:
         hpa_geo = hpa_geo_counties
 
-    (outdir / 'hsa.geojson').write_text(json.dumps(hsa_geo), encoding='utf-8')
-    (outdir / 'hpa.geojson').write_text(json.dumps(hpa_geo), encoding='utf-8')
+    if not args.no_dissolve:
+        for name, fc, code_prop in (('HSA', hsa_geo, 'HSA'), ('HPA', hpa_geo, 'HPA')):
+            dissolved = dissolve_by_code(fc, code_prop)
+            print(f"{name}: dissolved {len(fc['features'])} member polygons ({vertex_count(fc)} vertices) "
+                  f"into {len(dissolved['features'])} areas ({vertex_count(dissolved)} vertices)")
+            if code_prop == 'HSA':
+                hsa_geo = dissolved
+            else:
+                hpa_geo = dissolved
+
+    write_json(outdir / 'hsa.geojson', hsa_geo, indent=None, ensure_ascii=True, newline=False)
+    write_json(outdir / 'hpa.geojson', hpa_geo, indent=None, ensure_ascii=True, newline=False)
     print(f"Wrote overlays: {outdir / 'hsa.geojson'} and {outdir / 'hpa.geojson'}")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Precompute nearest-neighbour tables over facility locations so distance
+columns ("nearest competing facility") need no runtime haversine scans.
+
+For each year, facilities of every type are placed in one KD-tree per type,
+built over unit-sphere (x, y, z) vectors: chord length is monotonic in
+great-circle distance, so Euclidean pruning in 3-D gives exact kNN and radius
+answers with no projection error. Coordinates come from the same sources as
+tag_facility_geography.py. ZIP centroids come from references/zip_centroids.csv
+(zip,lat,lng — e.g. the Census ZCTA gazetteer) when present, otherwise from the
+mean location of the facilities with that ZIP.
+
+Outputs (out/proximity):
+- <year>.json — per facility the k nearest same-type and other-type
+  facilities, per ZIP the k nearest of each type, distances in km
+- nearest_<year>.csv — one row per facility with its nearest competitor columns
+
+Query API:
+  from build_proximity import ProximityIndex
+  idx = ProximityIndex.from_data(2024)
+  idx.nearest(41.88, -87.63, k=5, types=['Hospital'])   # [(km, facility), ...]
+  idx.within(41.88, -87.63, 25)
+
+Usage:
+  python3 scripts/build_proximity.py                     # all years, k=5
+  python3 scripts/build_proximity.py --year 2024 --near 41.88,-87.63 --radius-km 25
+  python3 scripts/build_proximity.py --check             # compare the tree with brute force
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import math
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tag_facility_geography import COORDS_CSV, facility_location, load_coords, _num
+from json_io import read_json, write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / 'data'
+OUTDIR = ROOT / 'out' / 'proximity'
+ZIP_CSV = ROOT / 'references' / 'zip_centroids.csv'
+EARTH_KM = 6371.0088
+LEAF = 8
+
+Vec = Tuple[float, float, float]
+
+
+def to_xyz(lat: float, lng: float) -> Vec:
+    la, lo = math.radians(lat), math.radians(lng)
+    c = math.cos(la)
+    return (c * math.cos(lo), c * math.sin(lo), math.sin(la))
+
+
+def chord_to_km(c2: float) -> float:
+    return 2 * EARTH_KM * math.asin(min(1.0, math.sqrt(c2) / 2))
+
+
+def km_to_chord2(km: float) -> float:
+    return (2 * math.sin(min(math.pi, km / EARTH_KM) / 2)) ** 2
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _d2(a: Vec, b: Vec) -> float:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class KDTree:
+    """Static 3-D KD-tree; leaves hold up to LEAF points, splits on the widest axis at the median."""
+
+    def __init__(self, points: Sequence[Vec]) -> None:
+        self.points = list(points)
+        self.order = list(range(len(self.points)))
+        # node: (axis, split, left, right, lo, hi); axis -1 marks a leaf over order[lo:hi]
+        self.nodes: List[Tuple[int, float, int, int, int, int]] = []
+        self.visits = 0
+        if self.points:
+            self._build(0, len(self.order))
+
+    def _build(self, lo: int, hi: int) -> int:
+        node = len(self.nodes)
+        self.nodes.append((-1, 0.0, -1, -1, lo, hi))
+        if hi - lo <= LEAF:
+            return node
+        pts = self.points
+        spans = [max(pts[i][a] for i in self.order[lo:hi]) - min(pts[i][a] for i in self.order[lo:hi]) for a in range(3)]
+        axis = spans.index(max(spans))
+        self.order[lo:hi] = sorted(self.order[lo:hi], key=lambda i: pts[i][axis])
+        mid = (lo + hi) // 2
+        split = pts[self.order[mid]][axis]
+        left = self._build(lo, mid)
+        right = self._build(mid, hi)
+        self.nodes[node] = (axis, split, left, right, lo, hi)
+        return node
+
+    def knn(self, q: Vec, k: int, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        """k nearest points as (squared chord, index), nearest first."""
+        heap: List[Tuple[float, int]] = []  # max-heap via negated distances
+        if not self.nodes or k <= 0:
+            return []
+
+        def visit(n: int) -> None:
+            self.visits += 1
+            axis, split, left, right, lo, hi = self.nodes[n]
+            if axis < 0:
+                for i in self.order[lo:hi]:
+                    if i == exclude:
+                        continue
+                    d = _d2(q, self.points[i])
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, i))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, i))
+                return
+            diff = q[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(0)
+        return sorted((-d, i) for d, i in heap)
+
+    def within(self, q: Vec, r2: float) -> List[Tuple[float, int]]:
+        """All points within squared chord r2 as (squared chord, index), nearest first."""
+        out: List[Tuple[float, int]] = []
+        stack = [0] if self.nodes else []
+        while stack:
+            n = stack.pop()
+            self.visits += 1
+            axis, split, left, right, lo, hi = self.nodes[n]
+            if axis < 0:
+                for i in self.order[lo:hi]:
+                    d = _d2(q, self.points[i])
+                    if d <= r2:
+                        out.append((d, i))
+                continue
+            diff = q[axis] - split
+            stack.append(left if diff < 0 else right)
+            if diff * diff <= r2:
+                stack.append(right if diff < 0 else left)
+        return sorted(out)
+
+
+def _key(f: dict) -> str:
+    return str(f.get('slug') or f.get('id'))
+
+
+class ProximityIndex:
+    """One KD-tree per facility type; facilities are dicts with id, type, name, slug, lat, lng."""
+
+    def __init__(self, facilities: Iterable[dict]) -> None:
+        self.by_type: Dict[str, List[dict]] = defaultdict(list)
+        for f in facilities:
+            self.by_type[f['type']].append(f)
+        self.trees = {t: KDTree([to_xyz(f['lat'], f['lng']) for f in fs]) for t, fs in self.by_type.items()}
+        # Facility ids are not unique within a year (see build_trends.py), the data directory slug is
+        self._pos = {(f['type'], _key(f)): i for fs in self.by_type.values() for i, f in enumerate(fs)}
+
+    @classmethod
+    def from_data(cls, year: int, coords_csv: Path = COORDS_CSV) -> 'ProximityIndex':
+        return cls(load_facilities(year, load_coords(coords_csv))[0])
+
+    def _types(self, types: Optional[Iterable[str]]) -> List[str]:
+        return [t for t in (types or self.trees) if t in self.trees]
+
+    def nearest(self, lat: float, lng: float, k: int = 5, types: Optional[Iterable[str]] = None,
+                exclude: Optional[dict] = None) -> List[Tuple[float, dict]]:
+        """k nearest facilities as (km, facility); exclude is any dict with the type and slug of a facility to skip."""
+        q = to_xyz(lat, lng)
+        hits = []
+        for t in self._types(types):
+            skip = self._pos.get((t, _key(exclude))) if exclude is not None and exclude.get('type') == t else None
+            hits.extend((d, self.by_type[t][i]) for d, i in self.trees[t].knn(q, k, skip))
+        hits.sort(key=lambda h: h[0])
+        return [(round(chord_to_km(d), 3), f) for d, f in hits[:k]]
+
+    def within(self, lat: float, lng: float, km: float, types: Optional[Iterable[str]] = None) -> List[Tuple[float, dict]]:
+        q, r2 = to_xyz(lat, lng), km_to_chord2(km)
+        hits = [(d, self.by_type[t][i]) for t in self._types(types) for d, i in self.trees[t].within(q, r2)]
+        hits.sort(key=lambda h: h[0])
+        return [(round(chord_to_km(d), 3), f) for d, f in hits]
+
+
+def _zip5(v) -> str:
+    s = ''.join(ch for ch in str(v or '') if ch.isdigit())
+    return s[:5] if len(s) >= 5 else ''
+
+
+def load_facilities(year: int, coords: Dict[str, Tuple[float, float]]) -> Tuple[List[dict], int]:
+    out, missing = [], 0
+    for fac_dir in sorted(p.parent for p in (DATA / str(year)).glob('*/*/data.json')):
+        meta = read_json(fac_dir / 'data.json').get('meta', {})
+        pt = facility_location(meta, coords)
+        if pt is None:
+            missing += 1
+            continue
+        payload = {}
+        sp = fac_dir / 'schema_payload.json'
+        if sp.exists():
+            payload = read_json(sp).get('payload', {})
+        out.append({
+            'id': str(meta.get('facility_id_normalized') or meta.get('facility_id') or fac_dir.name),
+            'type': fac_dir.parent.name,
+            'name': meta.get('facility_name') or fac_dir.name,
+            'slug': fac_dir.name,
+            'zip': _zip5(payload.get('address_zip') or payload.get('facility_zip')),
+            'lat': pt[1],
+            'lng': pt[0],
+        })
+    return out, missing
+
+
+def zip_centroids(facilities: List[dict], path: Path) -> Dict[str, dict]:
+    """zip -> {lat, lng, source}; the CSV wins, facility means fill the rest."""
+    out: Dict[str, dict] = {}
+    if path.exists():
+        with path.open('r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                z = _zip5(row.get('zip') or row.get('zcta') or row.get('GEOID'))
+                lat = _num(row.get('lat') or row.get('INTPTLAT'))
+                lng = _num(row.get('lng') or row.get('lon') or row.get('INTPTLONG'))
+                if z and lat is not None and lng is not None:
+                    out[z] = {'lat': lat, 'lng': lng, 'source': path.name}
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for f in facilities:
+        if f['zip'] and f['zip'] not in out:
+            groups[f['zip']].append(f)
+    for z, fs in groups.items():
+        out[z] = {'lat': sum(f['lat'] for f in fs) / len(fs), 'lng': sum(f['lng'] for f in fs) / len(fs), 'source': 'facilities'}
+    return out
+
+
+def build_year(year: int, k: int, coords, zip_csv: Path) -> Tuple[dict, List[dict], int]:
+    facilities, missing = load_facilities(year, coords)
+    idx = ProximityIndex(facilities)
+    table: Dict[str, dict] = {}
+    rows = []
+    for f in facilities:
+        others = [t for t in idx.trees if t != f['type']]
+        same = idx.nearest(f['lat'], f['lng'], k, [f['type']], exclude=f)
+        other = idx.nearest(f['lat'], f['lng'], k, others) if others else []
+        table[f"{f['type']}/{f['id']}"] = {
+            'same_type': [[g['id'], d] for d, g in same],
+            'other_type': [[g['type'], g['id'], d] for d, g in other],
+        }
+        ns = same[0] if same else (None, {})
+        no = other[0] if other else (None, {})
+        rows.append({
+            'facility_id': f['id'], 'type': f['type'], 'name': f['name'],
+            'nearest_same_id': ns[1].get('id', ''), 'nearest_same_name': ns[1].get('name', ''), 'nearest_same_km': ns[0] if ns[0] is not None else '',
+            'same_within_10km': len(idx.within(f['lat'], f['lng'], 10, [f['type']])) - 1,
+            'nearest_other_id': no[1].get('id', ''), 'nearest_other_type': no[1].get('type', ''), 'nearest_other_km': no[0] if no[0] is not None else '',
+        })
+    zips = {}
+    for z, c in sorted(zip_centroids(facilities, zip_csv).items()):
+        zips[z] = {**{key: c[key] for key in ('lat', 'lng', 'source')},
+                   'nearest': {t: [[g['id'], d] for d, g in idx.nearest(c['lat'], c['lng'], k, [t])] for t in sorted(idx.trees)}}
+    doc = {'year': year, 'k': k, 'facilities': table, 'zips': zips}
+    return doc, rows, missing
+
+
+def self_check(n: int = 2000, queries: int = 200, k: int = 5) -> int:
+    """Random points over Illinois: tree answers must equal brute-force haversine."""
+    rng = random.Random(42)
+    facs = [{'id': str(i), 'type': 'T', 'name': '', 'slug': '', 'lat': rng.uniform(36.97, 42.51), 'lng': rng.uniform(-91.51, -87.5)}
+            for i in range(n)]
+    idx = ProximityIndex(facs)
+    tree = idx.trees['T']
+    bad = 0
+    t_tree = t_brute = 0.0
+    for _ in range(queries):
+        lat, lng, r = rng.uniform(36.5, 43), rng.uniform(-92, -87), rng.uniform(1, 60)
+        t0 = time.perf_counter()
+        got_k = [f['id'] for _, f in idx.nearest(lat, lng, k)]
+        got_r = sorted(f['id'] for _, f in idx.within(lat, lng, r))
+        t1 = time.perf_counter()
+        dist = sorted((haversine_km(lat, lng, f['lat'], f['lng']), f['id']) for f in facs)
+        t2 = time.perf_counter()
+        want_k = [i for _, i in dist[:k]]
+        # Ignore points sitting on the radius within float noise
+        want_r = sorted(i for d, i in dist if d <= r - 1e-6)
+        edge = {i for d, i in dist if abs(d - r) <= 1e-6}
+        bad += got_k != want_k
+        bad += [i for i in got_r if i not in edge] != want_r
+        t_tree += t1 - t0
+        t_brute += t2 - t1
+    print(f"{queries} kNN+radius queries over {n} points: {bad} mismatches vs brute force; "
+          f"{tree.visits / queries:.0f} nodes visited per query of {len(tree.nodes)}; "
+          f"tree {t_tree * 1000 / queries:.2f} ms vs brute {t_brute * 1000 / queries:.2f} ms per query")
+    return bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Precompute kNN/radius tables over facility locations')
+    ap.add_argument('--year', type=int, action='append', help='Year(s) to build (default: all under data/)')
+    ap.add_argument('--k', type=int, default=5)
+    ap.add_argument('--coords', default=str(COORDS_CSV), help='CSV with facility_id,lat,lng')
+    ap.add_argument('--zips', default=str(ZIP_CSV), help='CSV with zip,lat,lng centroids')
+    ap.add_argument('--outdir', default=str(OUTDIR))
+    ap.add_argument('--near', help='Query mode: LAT,LNG origin (prints nearest / within results, writes nothing)')
+    ap.add_argument('--radius-km', type=float, help='Query mode: list facilities within this distance')
+    ap.add_argument('--type', action='append', choices=['Hospital', 'ASTC', 'ESRD', 'LTC'], help='Query mode: restrict types')
+    ap.add_argument('--check', action='store_true', help='Verify the KD-tree against brute force on random points')
+    args = ap.parse_args()
+
+    if args.check:
+        raise SystemExit(1 if self_check(k=args.k) else 0)
+    years = args.year or sorted(int(p.name) for p in DATA.iterdir() if p.is_dir() and p.name.isdigit())
+    coords = load_coords(Path(args.coords))
+
+    if args.near:
+        lat, lng = (float(v) for v in args.near.split(','))
+        for year in years:
+            idx = ProximityIndex(load_facilities(year, coords)[0])
+            hits = idx.within(lat, lng, args.radius_km, args.type) if args.radius_km else idx.nearest(lat, lng, args.k, args.type)
+            print(f"{year}: {len(hits)} facilities")
+            for d, f in hits:
+                print(f"  {d:8.2f} km  {f['type']:8s} {f['id']:10s} {f['name']}")
+        return
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    for year in years:
+        t0 = time.perf_counter()
+        doc, rows, missing = build_year(year, args.k, coords, Path(args.zips))
+        write_json(outdir / f'{year}.json', doc, compact=True, ensure_ascii=True)
+        cols = ['facility_id', 'type', 'name', 'nearest_same_id', 'nearest_same_name', 'nearest_same_km',
+                'same_within_10km', 'nearest_other_id', 'nearest_other_type', 'nearest_other_km']
+        with (outdir / f'nearest_{year}.csv').open('w', newline='', encoding='utf-8') as f:
+            w = csv.DictWriter(f, fieldnames=cols)
+            w.writeheader()
+            w.writerows(rows)
+        print(f"{year}: {len(rows)} facilities ({missing} without coordinates), {len(doc['zips'])} ZIPs, "
+              f"k={args.k} in {time.perf_counter() - t0:.2f}s -> {outdir / f'{year}.json'}")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Cut the boundary overlays and facility points into a static z/x/y tile pyramid
+of small GeoJSON files, so the map fetches only the tiles in view and the whole
+thing can be served from out/site with no database.
+
+Boundaries: rings of the county, HSA, HPA and community-area layers are cut
+into shared arcs at junctions (see build_geo_levels.py). For each zoom every
+arc is simplified once with a tolerance of --tolerance-px screen pixels and
+clipped, in Web Mercator tile space, to each tile it crosses plus a small
+buffer. The map draws outlines only, so tiles carry lines (one MultiLineString
+per layer) rather than clipped polygons, which would draw the tile edges.
+
+Facility points: every year and type under data/, one point per facility
+(latest year wins) with coordinates from meta.lat/meta.lng,
+references/facility_coordinates.csv or a previous meta.geo tag. Properties are
+limited to what a popup and a profile link need.
+
+Outputs (default out/site/tiles):
+- <z>/<x>/<y>.json — FeatureCollection; empty tiles are not written
+- tiles.json — zoom range, bounds, layers and per-zoom tile counts/bytes;
+  clients overzoom from maxzoom
+Tiles from an earlier build that this run did not produce are removed,
+including whole zoom directories outside --min-zoom..--max-zoom.
+
+Usage:
+  python3 scripts/build_tiles.py
+  python3 scripts/build_tiles.py --min-zoom 6 --max-zoom 11 --outdir out/site/tiles
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import shutil
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from build_geo_levels import GEO, canonical, douglas_peucker, find_junctions, geometry_polygons, load_geojson, split_ring
+from tag_facility_geography import COORDS_CSV, facility_location, load_coords
+from json_io import dumps, read_json, write_bytes, write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / 'data'
+OUTDIR = ROOT / 'out' / 'site' / 'tiles'
+
+# layer name in tiles -> source file under GEO
+LAYERS = {
+    'county': 'counties.il.geojson',
+    'hsa': 'hsa.geojson',
+    'hpa': 'hpa.geojson',
+    'community_area': 'chicago_community_areas.geojson',
+}
+TILE_PX = 256
+
+Point = Tuple[float, float]
+
+
+# --- Web Mercator tile space ---
+
+def project(lon: float, lat: float, n: int) -> Point:
+    """lon/lat -> fractional tile coordinates at a zoom with n tiles per side."""
+    lat = max(-85.05112878, min(85.05112878, lat))
+    s = math.sin(math.radians(lat))
+    return ((lon + 180.0) / 360.0 * n, (0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)) * n)
+
+
+def unproject(fx: float, fy: float, n: int) -> Point:
+    return (fx / n * 360.0 - 180.0, math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * fy / n)))))
+
+
+def zoom_decimals(z: int) -> int:
+    """Enough decimals for a quarter of a pixel at this zoom."""
+    px = 360.0 / (TILE_PX * 2 ** z)
+    return max(0, math.ceil(-math.log10(px / 4)))
+
+
+def clip_segment(a: Point, b: Point, box: Tuple[float, float, float, float]) -> Optional[Tuple[Point, Point]]:
+    """Liang–Barsky; end points inside the box are returned unchanged."""
+    x0, y0, x1, y1 = box
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, a[0] - x0), (dx, x1 - a[0]), (-dy, a[1] - y0), (dy, y1 - a[1])):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return None
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return None
+            t1 = min(t1, t)
+    ca = a if t0 == 0.0 else (a[0] + t0 * dx, a[1] + t0 * dy)
+    cb = b if t1 == 1.0 else (a[0] + t1 * dx, a[1] + t1 * dy)
+    return ca, cb
+
+
+# --- Inputs ---
+
+def boundary_arcs(geo_dir: Path) -> Tuple[List[List[Point]], List[Set[str]]]:
+    """Distinct arcs across all layers and, for each, the layers it borders."""
+    shapes = {}
+    for layer, fname in LAYERS.items():
+        doc = load_geojson(geo_dir / fname)
+        if doc is None:
+            print(f"Skipping {layer}: {geo_dir / fname} missing or not GeoJSON")
+            continue
+        shapes[layer] = [r for f in doc['features'] for poly in geometry_polygons(f.get('geometry')) for r in poly]
+    junctions = find_junctions(r for rings in shapes.values() for r in rings)
+    index: Dict[tuple, int] = {}
+    arcs: List[List[Point]] = []
+    layers: List[Set[str]] = []
+    for layer, rings in shapes.items():
+        for ring in rings:
+            for arc in split_ring(ring, junctions):
+                key, _ = canonical(arc)
+                i = index.get(key)
+                if i is None:
+                    i = index[key] = len(arcs)
+                    arcs.append(list(key))
+                    layers.append(set())
+                layers[i].add(layer)
+    return arcs, layers
+
+
+def facility_points(coords_csv: Path) -> Tuple[List[dict], int]:
+    """One point feature per facility (type + id), properties from its latest year.
+
+    When two facilities share an ID within one year, the later slug is keyed as
+    "<id>/<slug>" (as in build_trends.py) so it gets its own point.
+    """
+    coords = load_coords(coords_csv)
+    latest: Dict[Tuple[str, str], dict] = {}
+    years: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+    seen: Dict[Tuple[str, str, int], str] = {}  # (type, id, year) -> slug
+    missing = 0
+    for dp in sorted(DATA.glob('*/*/*/data.json')):
+        meta = read_json(dp).get('meta', {})
+        geo = meta.get('geo') or {}
+        fid = str(meta.get('facility_id_normalized') or meta.get('facility_id') or '')
+        pt = facility_location(meta, coords)
+        if pt is None:
+            missing += 1
+            continue
+        lng, lat = pt
+        ftype, year = dp.parent.parent.name, int(dp.parent.parent.parent.name)
+        key = (ftype, fid or dp.parent.name)
+        if seen.setdefault((*key, year), dp.parent.name) != dp.parent.name:
+            key = (ftype, f"{key[1]}/{dp.parent.name}")
+        years[key].add(year)
+        if key in latest and latest[key]['properties']['year'] > year:
+            continue
+        latest[key] = {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(lng, 5), round(lat, 5)]},
+            'properties': {
+                'layer': 'facility',
+                'id': fid,
+                'name': meta.get('facility_name') or dp.parent.name,
+                'type': ftype,
+                'year': year,
+                'slug': dp.parent.name,
+                'county': geo.get('county') or meta.get('county'),
+                'hsa': geo.get('hsa') or meta.get('hsa'),
+                'hpa': geo.get('hpa') or meta.get('hpa'),
+            },
+        }
+    feats = []
+    for key, f in sorted(latest.items()):
+        f['properties']['years'] = sorted(years[key])
+        f['properties'] = {k: v for k, v in f['properties'].items() if v is not None}
+        feats.append(f)
+    return feats, missing
+
+
+# --- Tiling ---
+
+def tile_zoom(z: int, arcs: List[List[Point]], arc_layers: List[Set[str]], points: List[dict],
+              tolerance_px: float, buffer_px: float) -> Dict[Tuple[int, int], List[dict]]:
+    n = 2 ** z
+    tol = tolerance_px * 360.0 / (TILE_PX * n)
+    b = buffer_px / TILE_PX
+    digits = zoom_decimals(z)
+    # tile -> arc index -> clipped polylines in tile space
+    lines: Dict[Tuple[int, int], Dict[int, List[List[Point]]]] = defaultdict(lambda: defaultdict(list))
+    for ai, arc in enumerate(arcs):
+        pts = [project(x, y, n) for x, y in douglas_peucker(arc, tol)]
+        for a, c in zip(pts, pts[1:]):
+            for tx in range(math.floor(min(a[0], c[0]) - b), math.floor(max(a[0], c[0]) + b) + 1):
+                for ty in range(math.floor(min(a[1], c[1]) - b), math.floor(max(a[1], c[1]) + b) + 1):
+                    seg = clip_segment(a, c, (tx - b, ty - b, tx + 1 + b, ty + 1 + b))
+                    if seg is None or seg[0] == seg[1]:
+                        continue
+                    polys = lines[(tx, ty)][ai]
+                    if polys and polys[-1][-1] == seg[0]:
+                        polys[-1].append(seg[1])
+                    else:
+                        polys.append([seg[0], seg[1]])
+
+    tiles: Dict[Tuple[int, int], List[dict]] = defaultdict(list)
+    for tile, by_arc in lines.items():
+        per_layer: Dict[str, List[List[List[float]]]] = defaultdict(list)
+        for ai, polys in by_arc.items():
+            for poly in polys:
+                out: List[List[float]] = []
+                for fx, fy in poly:
+                    lon, lat = unproject(fx, fy, n)
+                    q = [round(lon, digits), round(lat, digits)]
+                    if not out or out[-1] != q:
+                        out.append(q)
+                if len(out) < 2:
+                    continue
+                for layer in arc_layers[ai]:
+                    per_layer[layer].append(out)
+        for layer in LAYERS:
+            if per_layer.get(layer):
+                tiles[tile].append({'type': 'Feature', 'geometry': {'type': 'MultiLineString', 'coordinates': per_layer[layer]},
+                                    'properties': {'layer': layer}})
+    for f in points:
+        fx, fy = project(*f['geometry']['coordinates'], n)
+        tiles[(math.floor(fx), math.floor(fy))].append(f)
+    return tiles
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Write a static z/x/y GeoJSON tile pyramid of boundaries and facilities')
+    ap.add_argument('--geo-dir', default=str(GEO))
+    ap.add_argument('--coords', default=str(COORDS_CSV), help='CSV with facility_id,lat,lng (used when meta has none)')
+    ap.add_argument('--outdir', default=str(OUTDIR))
+    ap.add_argument('--min-zoom', type=int, default=5)
+    ap.add_argument('--max-zoom', type=int, default=12)
+    ap.add_argument('--tolerance-px', type=float, default=0.5, help='Simplification tolerance in screen pixels')
+    ap.add_argument('--buffer-px', type=float, default=4.0, help='Clip buffer around each tile in pixels')
+    args = ap.parse_args()
+
+    arcs, arc_layers = boundary_arcs(Path(args.geo_dir))
+    points, missing = facility_points(Path(args.coords))
+    if not arcs and not points:
+        raise SystemExit('Nothing to tile: no boundary layers and no facility coordinates')
+    lons = [p[0] for a in arcs for p in a] + [f['geometry']['coordinates'][0] for f in points]
+    lats = [p[1] for a in arcs for p in a] + [f['geometry']['coordinates'][1] for f in points]
+
+    outdir = Path(args.outdir)
+    manifest = {
+        'format': 'geojson',
+        'tiles': '{z}/{x}/{y}.json',
+        'minzoom': args.min_zoom,
+        'maxzoom': args.max_zoom,
+        'bounds': [round(min(lons), 5), round(min(lats), 5), round(max(lons), 5), round(max(lats), 5)],
+        'layers': sorted({layer for s in arc_layers for layer in s}, key=list(LAYERS).index) + (['facility'] if points else []),
+        'facilities': len(points),
+        'zooms': {},
+    }
+    total_files = total_bytes = 0
+    for z in range(args.min_zoom, args.max_zoom + 1):
+        tiles = tile_zoom(z, arcs, arc_layers, points, args.tolerance_px, args.buffer_px)
+        nbytes = largest = 0
+        keep = set()
+        for (x, y), feats in tiles.items():
+            path = outdir / str(z) / str(x) / f'{y}.json'
+            body = dumps({'type': 'FeatureCollection', 'features': feats}, compact=True, newline=False)
+            write_bytes(path, body)
+            keep.add(path)
+            nbytes += len(body)
+            largest = max(largest, len(body))
+        # Unchanged tiles are left in place; drop tiles of the previous build that no longer exist
+        if (outdir / str(z)).is_dir():
+            for old in (outdir / str(z)).rglob('*'):
+                if old.is_file() and old not in keep:
+                    old.unlink()
+        manifest['zooms'][str(z)] = {'tiles': len(tiles), 'bytes': nbytes, 'max_tile_bytes': largest, 'decimals': zoom_decimals(z)}
+        total_files += len(tiles)
+        total_bytes += nbytes
+        print(f"  z{z}: {len(tiles)} tiles, {nbytes / 1024:.0f} KB (largest {largest / 1024:.1f} KB)")
+    # Zooms built by an earlier run with a wider range
+    if outdir.is_dir():
+        for zdir in outdir.iterdir():
+            if zdir.is_dir() and zdir.name.isdigit() and not args.min_zoom <= int(zdir.name) <= args.max_zoom:
+                shutil.rmtree(zdir)
+    write_json(outdir / 'tiles.json', manifest, ensure_ascii=True)
+    print(f"Wrote {total_files} tiles ({total_bytes / 1024 / 1024:.1f} MB) for z{args.min_zoom}-{args.max_zoom} under {outdir}: "
+          f"{len(arcs)} boundary arcs, {len(points)} facilities ({missing} facility-years without coordinates)")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Encode the county, HSA, HPA and Chicago community-area layers into one
+TopoJSON-style topology with shared arcs.
+
+HSA/HPA borders are county borders, and neighbouring polygons share edges, so
+rings from all layers are cut into arcs at junctions (see build_geo_levels.py)
+and every distinct arc is stored once, referenced by index (~i when reversed).
+Coordinates are quantized to integers on a 10^-decimals grid (transform
+scale/translate) and delta-encoded within each arc. The default 6 decimals
+(about 0.1 m) matches the precision of the Census county source.
+
+Outputs:
+- hfsrb-ui/public/geo/il.topo.json (objects: counties, hsa, hpa, chicago_community_areas)
+- with --level <name>: encodes levels/<name>/*.geojson into levels/<name>/il.topo.json
+
+The map decodes it with hfsrb-ui/src/lib/topology.ts. --check decodes the
+topology again and compares every ring with the input GeoJSON.
+
+Usage:
+  python3 scripts/build_topology.py
+  python3 scripts/build_topology.py --level state --check
+"""
+from __future__ import annotations
+
+import argparse
+import math
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from build_geo_levels import GEO, INPUTS, LEVELS, canonical, find_junctions, geometry_polygons, load_geojson, split_ring
+from json_io import dumps, loads, write_bytes
+from profiling import run_main
+
+IntPoint = Tuple[int, int]
+
+LAYER_NAMES = {
+    'counties.il.geojson': 'counties',
+    'hsa.geojson': 'hsa',
+    'hpa.geojson': 'hpa',
+    'chicago_community_areas.geojson': 'chicago_community_areas',
+}
+
+
+def quantize_ring(ring, tx: float, ty: float, k: float) -> List[IntPoint]:
+    out: List[IntPoint] = []
+    for x, y in ring:
+        q = (round((x - tx) * k), round((y - ty) * k))
+        if not out or out[-1] != q:
+            out.append(q)
+    if out[0] != out[-1]:
+        out.append(out[0])
+    return out
+
+
+def encode(layers: Dict[str, dict], decimals: int) -> dict:
+    k = 10 ** decimals
+    xs = [p[0] for doc in layers.values() for f in doc['features'] for poly in geometry_polygons(f.get('geometry')) for r in poly for p in r]
+    ys = [p[1] for doc in layers.values() for f in doc['features'] for poly in geometry_polygons(f.get('geometry')) for r in poly for p in r]
+    tx, ty = math.floor(min(xs) * k) / k, math.floor(min(ys) * k) / k
+
+    # Quantize first so junctions and shared arcs are found on the integer grid
+    shapes: Dict[str, List[Tuple[dict, List[List[List[IntPoint]]]]]] = {}
+    for name, doc in layers.items():
+        items = []
+        for f in doc['features']:
+            polys = []
+            for poly in geometry_polygons(f.get('geometry')):
+                rings = [quantize_ring(r, tx, ty, k) for r in poly]
+                rings = [r for r in rings if len(r) >= 4]
+                if rings:
+                    polys.append(rings)
+            items.append((f, polys))
+        shapes[name] = items
+    junctions = find_junctions(r for items in shapes.values() for _, polys in items for poly in polys for r in poly)
+
+    arcs: List[List[IntPoint]] = []
+    index: Dict[tuple, int] = {}
+
+    def arc_ref(arc: List[IntPoint]) -> int:
+        key, rev = canonical(arc)
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(arcs)
+            arcs.append(list(key))
+        return ~i if rev else i
+
+    objects = {}
+    for name, items in shapes.items():
+        geoms = []
+        for f, polys in items:
+            refs = [[[arc_ref(a) for a in split_ring(r, junctions)] for r in poly] for poly in polys]
+            if not refs:
+                g: dict = {'type': None}
+            elif len(refs) == 1:
+                g = {'type': 'Polygon', 'arcs': refs[0]}
+            else:
+                g = {'type': 'MultiPolygon', 'arcs': refs}
+            g['properties'] = f.get('properties', {})
+            geoms.append(g)
+        objects[name] = {'type': 'GeometryCollection', 'geometries': geoms}
+
+    encoded = []
+    for arc in arcs:
+        px, py = 0, 0
+        out = []
+        for x, y in arc:
+            out.append([x - px, y - py])
+            px, py = x, y
+        encoded.append(out)
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [1 / k, 1 / k], 'translate': [tx, ty]},
+        'objects': objects,
+        'arcs': encoded,
+    }
+
+
+# --- Decoder (mirrors hfsrb-ui/src/lib/topology.ts) ---
+
+def decode_arcs(topo: dict) -> List[List[Tuple[float, float]]]:
+    (sx, sy), (tx, ty) = topo['transform']['scale'], topo['transform']['translate']
+    out = []
+    for arc in topo['arcs']:
+        x = y = 0
+        pts = []
+        for dx, dy in arc:
+            x += dx
+            y += dy
+            pts.append((x * sx + tx, y * sy + ty))
+        out.append(pts)
+    return out
+
+
+def decode_ring(refs: List[int], arcs: List[List[Tuple[float, float]]]) -> List[Tuple[float, float]]:
+    ring: List[Tuple[float, float]] = []
+    for i in refs:
+        pts = arcs[~i][::-1] if i < 0 else arcs[i]
+        ring.extend(pts[1:] if ring else pts)
+    return ring
+
+
+def to_geojson(topo: dict, name: str) -> dict:
+    arcs = decode_arcs(topo)
+    feats = []
+    for g in topo['objects'][name]['geometries']:
+        if g['type'] == 'Polygon':
+            geom = {'type': 'Polygon', 'coordinates': [[list(p) for p in decode_ring(r, arcs)] for r in g['arcs']]}
+        elif g['type'] == 'MultiPolygon':
+            geom = {'type': 'MultiPolygon', 'coordinates': [[[list(p) for p in decode_ring(r, arcs)] for r in poly] for poly in g['arcs']]}
+        else:
+            geom = None
+        feats.append({'type': 'Feature', 'geometry': geom, 'properties': g.get('properties', {})})
+    return {'type': 'FeatureCollection', 'features': feats}
+
+
+def _cyclic(ring: List[Tuple[int, int]]) -> Tuple[Tuple[int, int], ...]:
+    body = ring[:-1]
+    k = body.index(min(body))
+    return tuple(body[k:] + body[:k])
+
+
+def check(topo: dict, layers: Dict[str, dict], decimals: int) -> int:
+    """Decode every layer and compare ring by ring with the input; returns the mismatch count."""
+    k = 10 ** decimals
+    tx, ty = topo['transform']['translate']
+    half = 0.5 / k + 1e-9
+    bad = 0
+    max_err = 0.0
+    for name, doc in layers.items():
+        decoded = to_geojson(topo, name)['features']
+        for src, dec in zip(doc['features'], decoded):
+            if src.get('properties', {}) != dec['properties']:
+                bad += 1
+                continue
+            want = [[quantize_ring(r, tx, ty, k) for r in poly] for poly in geometry_polygons(src.get('geometry'))]
+            want = [[r for r in poly if len(r) >= 4] for poly in want]
+            want = [poly for poly in want if poly]
+            got = geometry_polygons(dec['geometry'])
+            if len(want) != len(got) or any(len(a) != len(b) for a, b in zip(want, got)):
+                bad += 1
+                continue
+            for wpoly, gpoly in zip(want, got):
+                for wr, gr in zip(wpoly, gpoly):
+                    gq = [(round((x - tx) * k), round((y - ty) * k)) for x, y in gr]
+                    if _cyclic(wr) != _cyclic(gq):
+                        bad += 1
+            for poly in geometry_polygons(src.get('geometry')):
+                for x, y in (p for r in poly for p in r):
+                    max_err = max(max_err, abs(round((x - tx) * k) / k + tx - x), abs(round((y - ty) * k) / k + ty - y))
+        print(f"  {name}: {len(decoded)} features decoded")
+    print(f"Round trip: {bad} mismatched rings (max quantization error {max_err:.2e} deg, limit {half:.1e})")
+    return bad if max_err <= half else bad + 1
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Encode boundary layers into one shared-arc topology')
+    ap.add_argument('--geo-dir', default=str(GEO))
+    ap.add_argument('--level', choices=list(LEVELS), help='Encode the simplified level under levels/<level>/ instead')
+    ap.add_argument('--decimals', type=int, help='Quantization grid (default 6, or the level grid)')
+    ap.add_argument('--out', help='Output path (default <dir>/il.topo.json)')
+    ap.add_argument('--check', action='store_true', help='Decode the result and compare with the input GeoJSON (exit 1 on mismatch)')
+    args = ap.parse_args()
+
+    src_dir = Path(args.geo_dir) / 'levels' / args.level if args.level else Path(args.geo_dir)
+    decimals = args.decimals if args.decimals is not None else (LEVELS[args.level][1] if args.level else 6)
+    layers: Dict[str, dict] = {}
+    src_bytes = 0
+    for fname in INPUTS:
+        path = src_dir / fname
+        doc = load_geojson(path)
+        if doc is None:
+            print(f"Skipping {path} (missing, empty or not GeoJSON)")
+            continue
+        layers[LAYER_NAMES[fname]] = doc
+        src_bytes += path.stat().st_size
+    if not layers:
+        raise SystemExit(f"No layers found in {src_dir}")
+
+    topo = encode(layers, decimals)
+    out = Path(args.out) if args.out else src_dir / 'il.topo.json'
+    body = dumps(topo, compact=True, newline=False)
+    write_bytes(out, body)
+    npts = sum(len(a) for a in topo['arcs'])
+    print(f"Wrote {out}: {len(layers)} layers, {len(topo['arcs'])} arcs / {npts} positions, "
+          f"{len(body) / 1024:.0f} KB (GeoJSON inputs {src_bytes / 1024:.0f} KB)")
+    if args.check:
+        raise SystemExit(1 if check(loads(body), layers, decimals) else 0)
+
+
+if __name__ == '__main__':
+    run_main(main)
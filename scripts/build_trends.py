@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Build cross-year facility trends for the dashboard and history views.
+
+Facilities are hash-joined across every data/<year>/<type>/ tree on
+meta.facility_id_normalized (not the slug, which changes with names), and the
+metrics flagged "trend" in mappings/metrics.json are laid out as aligned
+per-year series with year-over-year deltas.
+
+Writes: web/data/trends/<type>.json
+  {
+    "type", "years": [2023, 2024], "metrics": [...],
+    "facilities": {
+      "<facility_id_normalized>": {
+        "name": latest name, "slugs": {"2023": slug, ...},
+        "series": {metric: [value per year or null]},
+        "delta":  {metric: [change vs previous year, aligned to years[1:]]},
+        "pct":    {metric: [percent change vs previous year]}
+      }
+    }
+  }
+Only metrics with at least one value are kept per facility. When two
+facilities share an ID within one year, the later slug is keyed as
+"<id>/<slug>" and counted in "duplicates" rather than overwriting.
+
+Usage:
+  python3 scripts/build_trends.py
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from facility_metrics import MetricsCache, fingerprint
+from json_io import loads, write_json
+from profiling import run_main
+
+DATA = Path('data')
+OUT = Path('web/data/trends')
+TYPES = ['Hospital', 'ESRD', 'ASTC', 'LTC']
+
+
+def _delta(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None or b is None:
+        return None
+    d = b - a
+    return int(d) if float(d).is_integer() else round(d, 4)
+
+
+def _pct(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None or b is None or a == 0:
+        return None
+    return round((b - a) / abs(a) * 100, 1)
+
+
+def build_type(ftype: str, years: List[int], cache: MetricsCache) -> Dict[str, Any]:
+    names = cache.defs.names(ftype, 'trend')
+    # Build side: facility id -> {year: (slug, name, metrics)}
+    joined: Dict[str, Dict[int, tuple]] = {}
+    unkeyed = 0
+    duplicates = 0
+    present_years = []
+    for year in years:
+        base = DATA / str(year) / ftype
+        if not base.exists():
+            continue
+        items, info = [], []
+        for sp in sorted(base.glob('*/schema_payload.json')):
+            try:
+                raw = sp.read_bytes()
+                doc = loads(raw)
+            except Exception:
+                continue
+            meta = doc.get('meta', {})
+            fid = str(meta.get('facility_id_normalized') or '').strip()
+            if not fid:
+                unkeyed += 1
+                continue
+            payload = doc.get('payload', {})
+            items.append((fingerprint(raw), payload))
+            info.append((fid, sp.parent.name, meta.get('facility_name') or payload.get('facility_name') or sp.parent.name))
+        if not items:
+            continue
+        present_years.append(year)
+        for (fid, slug, name), m in zip(info, cache.compute(ftype, items)):
+            if year in joined.get(fid, {}):
+                duplicates += 1
+                fid = f"{fid}/{slug}"
+            joined.setdefault(fid, {})[year] = (slug, name, m)
+
+    facilities: Dict[str, Any] = {}
+    for fid in sorted(joined):
+        by_year = joined[fid]
+        latest = by_year[max(by_year)]
+        series, delta, pct = {}, {}, {}
+        for n in names:
+            vals = [by_year[y][2].get(n) if y in by_year else None for y in present_years]
+            if all(v is None for v in vals):
+                continue
+            series[n] = vals
+            if len(vals) > 1:
+                delta[n] = [_delta(a, b) for a, b in zip(vals, vals[1:])]
+                pct[n] = [_pct(a, b) for a, b in zip(vals, vals[1:])]
+        facilities[fid] = {
+            'name': latest[1],
+            'slugs': {str(y): by_year[y][0] for y in sorted(by_year)},
+            'series': series,
+            'delta': delta,
+            'pct': pct,
+        }
+    return {'type': ftype, 'years': present_years, 'metrics': names, 'facilities': facilities,
+            'unkeyed': unkeyed, 'duplicates': duplicates}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Join facilities across years on normalized ID and write trend series')
+    ap.add_argument('--type', choices=TYPES, action='append', help='Limit to a facility type (repeatable)')
+    args = ap.parse_args()
+
+    years = sorted(int(p.name) for p in DATA.iterdir() if p.is_dir() and p.name.isdigit())
+    cache = MetricsCache()
+    OUT.mkdir(parents=True, exist_ok=True)
+    for ftype in args.type or TYPES:
+        doc = build_type(ftype, years, cache)
+        if not doc['facilities']:
+            continue
+        write_json(OUT / f"{ftype}.json", doc, compact=True, newline=False)
+        multi = sum(1 for f in doc['facilities'].values() if len(f['slugs']) > 1)
+        print(f"{ftype}: {len(doc['facilities'])} facilities over {doc['years']} "
+              f"({multi} in more than one year, {doc['unkeyed']} without an ID, {doc['duplicates']} duplicate IDs)")
+    cache.save()
+    print(f"Wrote trends to {OUT}/ (metrics: {cache.misses} evaluated, {cache.hits} from cache)")
+
+
+if __name__ == '__main__':
+    run_main(main)
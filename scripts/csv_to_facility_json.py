@@ -14,11 +14,13 @@ Notes:
 from __future__ import annotations
 
 import csv
-import json
 import re
 from pathlib import Path
 from typing import Dict, Iterable, Optional, Tuple
 
+from json_io import write_json
+from profiling import run_main
+
 BASE = Path('data')
 
 CSV_FILES = [
@@ -125,7 +127,7 @@ def convert_csv(csv_path: Path, ftype: str, year: int) -> int:
                 'raw': raw,
             }
 
-            out_path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding='utf-8')
+            write_json(out_path, data)
             count += 1
     return count
 
@@ -146,5 +148,5 @@ def main() -> None:
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
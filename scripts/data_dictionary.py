@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Compile the Markdown data dictionaries (schemas/<name>/README.md) once into a
+cached artifact shared by every consumer.
+
+Each README is parsed a single time into:
+  fields     Fields table rows, in order (column name -> cell text)
+  enums      ## Enumerations: "### name" -> codes from "- code — label" bullets
+  rules      ## Validation Rules bullets
+  sections   "## " headings in document order
+  schema     the Draft-07 JSON Schema written to schemas/json/<name>.schema.json
+  profile    field_name -> {field_id, label, section_key, section_label, page,
+             notes, required, order} for scripts/render_profiles.py
+
+Compiled entries are stored in out/cache/dictionaries.json keyed by the sha1 of
+the README bytes and COMPILER_VERSION, so a consumer only re-parses Markdown when
+a dictionary (or this compiler) changes. Within a process, load() is memoized
+on the README's mtime/size.
+
+Consumers: generate_schemas.py, generate_ingestion_schemas.py,
+render_profiles.py / serve_profiles.py and apply_mappings.py.
+
+Usage:
+  python3 scripts/data_dictionary.py            # compile every README, report cache use
+  python3 scripts/data_dictionary.py --force    # ignore the cached artifact
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from json_io import read_json, write_json
+from profiling import run_main
+
+COMPILER_VERSION = 1
+SCHEMAS_DIR = Path('schemas')
+CACHE_PATH = Path('out/cache/dictionaries.json')
+
+
+# --- Markdown parsing ---
+
+def parse_markdown_table(lines: List[str], start_idx: int) -> Tuple[List[Dict[str, str]], int]:
+    rows = []
+    i = start_idx
+    # Skip header lines (header and separator)
+    if i >= len(lines):
+        return rows, i
+    header = [h.strip().lower() for h in lines[i].strip().strip('|').split('|')]
+    i += 1
+    if i < len(lines) and set(lines[i].strip()) <= set('|- '):
+        i += 1
+    while i < len(lines):
+        line = lines[i].rstrip('\n')
+        if not line.strip():
+            break
+        if line.startswith('## '):
+            break
+        if '|' not in line:
+            break
+        cols = [c.strip() for c in line.strip().strip('|').split('|')]
+        # Pad columns to header length
+        while len(cols) < len(header):
+            cols.append('')
+        row = {header[j]: cols[j] for j in range(len(header))}
+        rows.append(row)
+        i += 1
+    return rows, i
+
+
+def extract_enums(lines: List[str]) -> Dict[str, List[str]]:
+    enums: Dict[str, List[str]] = {}
+    in_enums = False
+    current_name = None
+    bullet_re = re.compile(r'^-\s+(.*)')
+    for line in lines:
+        if line.startswith('## Enumerations'):
+            in_enums = True
+            continue
+        if in_enums and line.startswith('## '):
+            break
+        if in_enums:
+            if line.startswith('### '):
+                current_name = line[4:].strip().lower().replace(' ', '_')
+                enums.setdefault(current_name, [])
+            else:
+                m = bullet_re.match(line)
+                if m and current_name:
+                    item = m.group(1)
+                    # Accept formats like "code — label" or "code - label"
+                    code = item.split('—', 1)[0].split('-', 1)[0].strip()
+                    if code:
+                        enums[current_name].append(code)
+    return enums
+
+
+def extract_rules(lines: List[str]) -> List[str]:
+    rules: List[str] = []
+    in_rules = False
+    for line in lines:
+        if line.startswith('## '):
+            in_rules = line[3:].strip().lower() == 'validation rules'
+            continue
+        if in_rules and line.startswith('- '):
+            rules.append(line[2:].strip())
+    return rules
+
+
+def fields_table_start(lines: List[str]) -> Optional[int]:
+    for i, line in enumerate(lines):
+        if line.strip().lower().startswith('## fields'):
+            # The header line is the next non-empty line
+            j = i + 1
+            while j < len(lines) and not lines[j].strip():
+                j += 1
+            return j
+    return None
+
+
+# --- JSON Schema ---
+
+def mmddyyyy_pattern() -> str:
+    return r'^(0[1-9]|1[0-2])/(0[1-9]|[12]\d|3[01])/(19|20)\d{2}$'
+
+
+def build_property_spec(row: Dict[str, str], enum_sets: Dict[str, List[str]]) -> Dict:
+    t = row.get('type', '').strip().lower()
+    fmt = row.get('format', '').strip()
+    allowed = row.get('allowed_values', '').strip()
+    prop: Dict = {}
+
+    def set_type(json_type: str):
+        prop['type'] = json_type
+
+    if t in ('string', 'integer', 'number', 'boolean', 'array', 'object'):
+        set_type(t)
+    elif t in ('date', 'datetime'):
+        set_type('string')
+        # prefer pattern if format hints mm/dd/yyyy
+        if fmt and 'mm/dd/yyyy' in fmt.lower():
+            prop['pattern'] = mmddyyyy_pattern()
+        else:
+            prop['format'] = 'date'
+    elif t == 'enum':
+        set_type('string')
+    else:
+        # default to string
+        set_type('string')
+
+    # Allowed values handling
+    if allowed:
+        key = allowed.strip().lower()
+        if key in enum_sets:
+            prop['enum'] = enum_sets[key]
+        else:
+            # Inline comma-separated values support
+            if ',' in allowed:
+                prop['enum'] = [v.strip() for v in allowed.split(',') if v.strip()]
+
+    # Format/pattern handling
+    if fmt:
+        if fmt.startswith('^'):
+            prop['pattern'] = fmt
+        else:
+            low = fmt.lower()
+            if low in ('email', 'uri'):
+                prop['format'] = low
+            elif 'mm/dd/yyyy' in low:
+                prop['pattern'] = mmddyyyy_pattern()
+            elif low == 'year' and prop.get('type') == 'integer':
+                prop['minimum'] = 1900
+                prop['maximum'] = 2100
+
+    description_bits = []
+    label = row.get('field_label', '').strip()
+    notes = row.get('notes', '').strip()
+    section = row.get('section/page', '').strip()
+    if label:
+        description_bits.append(label)
+    if section:
+        description_bits.append(f'(Section/Page: {section})')
+    if notes:
+        description_bits.append(notes)
+    if description_bits:
+        prop['description'] = ' '.join(description_bits)
+
+    # Enrich with dashboard metadata to enable grouping/order in UI
+    if label:
+        prop['x_label'] = label
+    # Section is derived from the first segment of field_id (e.g., facility.name -> Facility)
+    fid = row.get('field_id', '').strip()
+    if fid:
+        top = fid.split('.', 1)[0]
+        # Humanize: replace separators and title-case
+        sec_label = top.replace('_', ' ').replace('-', ' ').strip().title()
+        if sec_label:
+            prop['x_section'] = sec_label
+
+    return prop
+
+
+def build_schema(title: str, rows: List[Dict[str, str]], enum_sets: Dict[str, List[str]]) -> Dict:
+    properties: Dict[str, Dict] = {}
+    required: List[str] = []
+    # Track section order by first appearance
+    section_first_index: Dict[str, int] = {}
+    # Assign incremental order for fields within the schema
+    field_order = 0
+    for row in rows:
+        field_name = row.get('field_name', '').strip()
+        if not field_name:
+            continue
+        prop = build_property_spec(row, enum_sets)
+        # Order metadata for dashboard rendering
+        field_order += 1
+        prop['x_order'] = field_order
+        sec = prop.get('x_section') or 'Other'
+        if sec not in section_first_index:
+            section_first_index[sec] = len(section_first_index) + 1
+        prop['x_section_order'] = section_first_index[sec]
+        req = row.get('required', '').strip().lower()
+        if req == 'yes':
+            prop['x_required'] = True
+            required.append(field_name)
+        properties[field_name] = prop
+
+    schema = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "title": title,
+        "type": "object",
+        "properties": properties,
+    }
+    if required:
+        schema['required'] = required
+    return schema
+
+
+# --- Profile metadata ---
+
+def build_profile(rows: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    order = 0
+    for row in rows:
+        fname = row.get('field_name', '').strip()
+        fid = row.get('field_id', '').strip()
+        label = row.get('field_label', '').strip() or fname
+        segs = fid.split('.') if fid else []
+        if len(segs) >= 2:
+            section_key = '.'.join(segs[:2])
+        elif segs:
+            section_key = segs[0]
+        else:
+            section_key = 'Other'
+        # Derive a readable section label from field_id without forcing Title Case
+        section_label = section_key.replace('_', ' ').replace('.', ' — ').strip()
+        if fname:
+            out[fname] = {
+                'field_id': fid,
+                'label': label,
+                'section_key': section_key,
+                'section_label': section_label,
+                'page': row.get('section/page', '').strip(),
+                'notes': row.get('notes', '').strip(),
+                'required': (row.get('required', '') or '').strip().lower() == 'yes',
+                'order': order,
+            }
+            order += 1
+    return out
+
+
+# --- Compiler and cache ---
+
+def compile_readme(readme: Path, raw: bytes) -> Dict[str, Any]:
+    lines = raw.decode('utf-8').splitlines()
+    start = fields_table_start(lines)
+    rows = parse_markdown_table(lines, start)[0] if start is not None else []
+    enums = extract_enums(lines)
+    title = lines[0].lstrip('#').strip() if lines else readme.parent.name
+    return {
+        'version': COMPILER_VERSION,
+        'sha1': hashlib.sha1(raw).hexdigest(),
+        'name': readme.parent.name,
+        'title': title,
+        'sections': [line[3:].strip() for line in lines if line.startswith('## ')],
+        'has_fields': start is not None,
+        'fields': rows,
+        'enums': enums,
+        'rules': extract_rules(lines),
+        'schema': build_schema(title, rows, enums),
+        'profile': build_profile(rows),
+    }
+
+
+class DictionaryCache:
+    """Compiled dictionaries persisted in one JSON artifact, keyed by README hash."""
+
+    def __init__(self, path: Optional[Path] = CACHE_PATH) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._memo: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        if path and path.exists():
+            try:
+                doc = read_json(path)
+                if doc.get('version') == COMPILER_VERSION:
+                    self.entries = doc.get('entries', {})
+            except Exception:
+                self.entries = {}
+
+    def load(self, readme: Path) -> Optional[Dict[str, Any]]:
+        try:
+            st = readme.stat()
+        except OSError:
+            return None
+        key = str(readme)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo and memo[0] == stamp:
+                return memo[1]
+            raw = readme.read_bytes()
+            sha = hashlib.sha1(raw).hexdigest()
+            entry = self.entries.get(key)
+            if entry and entry.get('sha1') == sha:
+                self.hits += 1
+            else:
+                entry = compile_readme(readme, raw)
+                self.entries[key] = entry
+                self.misses += 1
+                self._dirty = True
+            self._memo[key] = (stamp, entry)
+            return entry
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            write_json(self.path, {'version': COMPILER_VERSION, 'entries': self.entries}, compact=True, newline=False)
+            self._dirty = False
+
+
+_cache: Optional[DictionaryCache] = None
+
+
+def cache() -> DictionaryCache:
+    global _cache
+    if _cache is None:
+        _cache = DictionaryCache()
+    return _cache
+
+
+def readme_for_schema(schema_path: Path | str) -> Path:
+    """schemas/json/ahq-short.schema.json (or json_ingestion/...) -> schemas/ahq-short/README.md"""
+    p = Path(schema_path)
+    return p.parent.parent / p.name.replace('.schema.json', '').replace('.json', '') / 'README.md'
+
+
+def load(readme: Path) -> Optional[Dict[str, Any]]:
+    """Compiled dictionary for a README; recompiles (and updates the artifact) only when it changed."""
+    c = cache()
+    entry = c.load(readme)
+    c.save()
+    return entry
+
+
+def for_schema(schema_path: Path | str) -> Optional[Dict[str, Any]]:
+    return load(readme_for_schema(schema_path))
+
+
+def readmes() -> List[Path]:
+    return sorted(p for p in SCHEMAS_DIR.glob('*/README.md') if not p.parent.name.startswith('_'))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Compile schemas/*/README.md into the cached dictionary artifact')
+    ap.add_argument('--force', action='store_true', help='Recompile every README, ignoring the cached artifact')
+    args = ap.parse_args()
+
+    c = DictionaryCache(None if args.force else CACHE_PATH)
+    c.path = CACHE_PATH
+    for readme in readmes():
+        d = c.load(readme)
+        print(f"{d['name']}: {len(d['fields'])} fields, {len(d['enums'])} enumerations, "
+              f"{len(d['rules'])} rules, {len(d['sections'])} sections")
+    c.save()
+    print(f"Wrote {CACHE_PATH} (compiler v{COMPILER_VERSION}: {c.misses} compiled, {c.hits} from cache)")
+
+
+if __name__ == '__main__':
+    run_main(main)
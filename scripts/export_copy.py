@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Export the hfsrb-ui database tables as Postgres COPY files straight from the
+schema payloads, instead of upserting row by row from the TypeScript loaders.
+
+Tables (columns as in hfsrb-ui/src/db/schema.ts; created_at/updated_at are
+left to their defaults):
+- facility — every facility of every year and type (latest year wins)
+- survey_esrd_2023 — data/2023/ESRD, mapped like scripts/load_esrd_2023.ts
+- hospital_profile_2024 — data/2024/Hospital, mapped like load_hospital_2024_from_json.ts
+- hospital_profile_by_year — the same mapping for every Hospital year
+
+Outputs (out/db):
+- <table>.tsv — COPY text format: tab-separated, \\N for NULL, backslash escapes
+- manifest.json — load order, columns, Postgres types, conflict key, row count
+  and sha256 per file
+
+scripts/load_copy.py streams the files into Postgres (or SQLite for a local
+check). --check loads the files into an in-memory SQLite database and compares
+every row with the payload-derived values.
+
+Usage:
+  python3 scripts/export_copy.py
+  python3 scripts/export_copy.py --check
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tag_facility_geography import COORDS_CSV, facility_location, load_coords
+from json_io import read_json, write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / 'data'
+OUTDIR = ROOT / 'out' / 'db'
+
+PROFILE_COLUMNS = [
+    ('facility_id', 'text'), ('year', 'integer'), ('hospital_type', 'text'),
+    ('ms_con', 'integer'), ('icu_con', 'integer'), ('ped_con', 'integer'), ('obgyn_con', 'integer'), ('ltc_con', 'integer'),
+    ('ms_admissions', 'integer'), ('ms_patient_days', 'integer'), ('ms_observation_days', 'integer'),
+    ('race_white', 'numeric'), ('race_black', 'numeric'), ('race_native_american', 'numeric'), ('race_asian', 'numeric'),
+    ('race_pacific_islander', 'numeric'), ('race_unknown', 'numeric'),
+    ('ethnicity_hispanic', 'numeric'), ('ethnicity_non_hispanic', 'numeric'), ('ethnicity_unknown', 'numeric'),
+    ('payer_medicare', 'numeric'), ('payer_medicaid', 'numeric'), ('payer_private', 'numeric'),
+    ('payer_other_public', 'numeric'), ('payer_private_pay', 'numeric'), ('payer_charity', 'numeric'),
+]
+
+# table -> (columns with Postgres types, conflict key); listed in load order (facility first for the FKs)
+TABLES: Dict[str, Tuple[List[Tuple[str, str]], List[str]]] = {
+    'facility': ([
+        ('id', 'text'), ('type', 'text'), ('name', 'text'), ('county', 'text'), ('hsa', 'text'), ('hpa', 'text'),
+        ('address', 'jsonb'), ('lat', 'numeric'), ('lng', 'numeric'), ('active', 'boolean'),
+    ], ['id']),
+    'survey_esrd_2023': ([
+        ('facility_id', 'text'), ('year', 'integer'), ('stations', 'integer'), ('shifts', 'integer'),
+        ('patients_total', 'integer'), ('incenter_treatments', 'integer'), ('fte_total', 'numeric'),
+        ('payer_medicare', 'numeric'), ('payer_medicaid', 'numeric'), ('payer_private', 'numeric'), ('revenue_total', 'numeric'),
+        ('race_white', 'numeric'), ('race_black', 'numeric'), ('race_asian', 'numeric'), ('race_hispanic', 'numeric'),
+    ], ['facility_id', 'year']),
+    'hospital_profile_2024': (PROFILE_COLUMNS, ['facility_id']),
+    'hospital_profile_by_year': (PROFILE_COLUMNS, ['facility_id', 'year']),
+}
+
+
+def clean_num(v: Any) -> Optional[float]:
+    """Number('1,234') semantics of the TypeScript loaders: blanks and junk become NULL."""
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        x = float(v)
+    else:
+        s = str(v).replace(',', '').strip()
+        if not s:
+            return None
+        try:
+            x = float(s)
+        except ValueError:
+            return None
+    return x if math.isfinite(x) else None
+
+
+def copy_value(v: Any, pg_type: str) -> str:
+    if v is None:
+        return '\\N'
+    if pg_type == 'boolean':
+        return 't' if v else 'f'
+    if pg_type == 'integer':
+        return str(int(round(v)))
+    if pg_type == 'numeric':
+        return str(int(v)) if float(v).is_integer() else repr(float(v))
+    if pg_type == 'jsonb':
+        v = json.dumps(v, ensure_ascii=False, separators=(',', ':'))
+    s = str(v)
+    return s.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+# --- Row mappings (mirroring the hfsrb-ui loaders) ---
+
+def facility_key(meta: dict, payload: dict) -> str:
+    """Normalized id, so a facility keeps one row across years ('26' in 2023 is '0000026' in 2024)."""
+    return str(meta.get('facility_id_normalized') or payload.get('facility_id') or meta.get('facility_id'))
+
+
+def facility_row(ftype: str, meta: dict, payload: dict, pt) -> dict:
+    geo = meta.get('geo') or {}
+    street = payload.get('address_street') or payload.get('address_line1') or payload.get('facility_address')
+    city, zipc = payload.get('address_city'), payload.get('address_zip')
+    address = {k: v for k, v in (('street', street), ('city', city), ('zip', zipc)) if v}
+    return {
+        'id': facility_key(meta, payload),
+        'type': ftype,
+        'name': str(payload.get('facility_name') or meta.get('facility_name') or ftype),
+        'county': geo.get('county') or payload.get('county'),
+        'hsa': geo.get('hsa') or payload.get('hsa'),
+        'hpa': geo.get('hpa') or payload.get('hpa'),
+        'address': {**address, 'state': 'IL'} if address else None,
+        'lat': pt[1] if pt else None,
+        'lng': pt[0] if pt else None,
+        'active': True,
+    }
+
+
+def esrd_row(year: int, meta: dict, p: dict) -> dict:
+    shifts = [x for x in (clean_num(p.get(f'shifts_{d}')) for d in ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')) if x is not None]
+    return {
+        'facility_id': facility_key(meta, p),
+        'year': year,
+        'stations': clean_num(p.get('stations_oct_setup_staffed')),
+        'shifts': sum(shifts) if shifts else None,
+        'patients_total': clean_num(p.get('patients_unduplicated')),
+        'incenter_treatments': clean_num(p.get(f'treatments_incenter_{year}')),
+        'fte_total': clean_num(p.get('fte_total')),
+        'payer_medicare': clean_num(p.get('pat_medicare')),
+        'payer_medicaid': clean_num(p.get('pat_medicaid')),
+        'payer_private': clean_num(p.get('pat_private_insurance')),
+        'revenue_total': clean_num(p.get('rev_total')),
+        'race_white': clean_num(p.get('race_white')),
+        'race_black': clean_num(p.get('race_black')),
+        'race_asian': clean_num(p.get('race_asian')),
+        'race_hispanic': clean_num(p.get('eth_hispanic')),
+    }
+
+
+PROFILE_SOURCES = {
+    'ms_con': 'med_surg_beds_oct1', 'icu_con': 'icu_beds_oct1', 'ped_con': 'peds_beds_oct1', 'obgyn_con': 'obgyn_beds_oct1',
+    'ms_admissions': 'med_surg_admissions', 'ms_patient_days': 'med_surg_days_total',
+    'ms_observation_days': 'med_surg_observation_days',
+    'race_white': 'race_inp_white', 'race_black': 'race_inp_black', 'race_native_american': 'race_inp_ai_an',
+    'race_asian': 'race_inp_asian', 'race_pacific_islander': 'race_inp_nh_pi', 'race_unknown': 'race_inp_unknown',
+    'ethnicity_hispanic': 'eth_inp_hispanic', 'ethnicity_non_hispanic': 'eth_inp_not_hispanic', 'ethnicity_unknown': 'eth_inp_unknown',
+}
+
+
+def profile_row(year: int, meta: dict, p: dict) -> dict:
+    row = {name: None for name, _ in PROFILE_COLUMNS}
+    row.update({'facility_id': facility_key(meta, p), 'year': year, 'hospital_type': p.get('hospital_type')})
+    row.update({col: clean_num(p.get(src)) for col, src in PROFILE_SOURCES.items()})
+    return row
+
+
+def build_rows(coords) -> Dict[str, List[dict]]:
+    tables: Dict[str, Dict[tuple, dict]] = {name: {} for name in TABLES}
+    # Ascending years, so the latest year's facility row replaces earlier ones
+    for sp in sorted(DATA.glob('*/*/*/schema_payload.json'), key=lambda p: (p.parent.parent.parent.name, str(p))):
+        fac_dir = sp.parent
+        ftype, year = fac_dir.parent.name, int(fac_dir.parent.parent.name)
+        dp = fac_dir / 'data.json'
+        meta = read_json(dp).get('meta', {}) if dp.exists() else {}
+        payload = read_json(sp).get('payload', {})
+        if not meta.get('facility_id'):
+            continue
+        row = facility_row(ftype, meta, payload, facility_location(meta, coords))
+        tables['facility'][(row['id'],)] = row
+        derived: List[Tuple[str, Callable[[int, dict, dict], dict]]] = []
+        if ftype == 'ESRD' and year == 2023:
+            derived.append(('survey_esrd_2023', esrd_row))
+        if ftype == 'Hospital':
+            derived.append(('hospital_profile_by_year', profile_row))
+            if year == 2024:
+                derived.append(('hospital_profile_2024', profile_row))
+        for table, fn in derived:
+            r = fn(year, meta, payload)
+            tables[table][tuple(r[k] for k in TABLES[table][1])] = r
+    return {name: list(rows.values()) for name, rows in tables.items()}
+
+
+def write_table(outdir: Path, table: str, rows: List[dict]) -> dict:
+    columns, key = TABLES[table]
+    path = outdir / f'{table}.tsv'
+    h = hashlib.sha256()
+    with path.open('w', encoding='utf-8', newline='\n') as f:
+        for r in rows:
+            line = '\t'.join(copy_value(r[name], t) for name, t in columns) + '\n'
+            f.write(line)
+            h.update(line.encode('utf-8'))
+    return {
+        'table': table,
+        'file': path.name,
+        'columns': [name for name, _ in columns],
+        'types': [t for _, t in columns],
+        'key': key,
+        'rows': len(rows),
+        'bytes': path.stat().st_size,
+        'sha256': h.hexdigest(),
+    }
+
+
+def check(outdir: Path, manifest: dict, tables: Dict[str, List[dict]]) -> int:
+    """Load the files into in-memory SQLite and compare every row with the source values."""
+    import sqlite3
+    from load_copy import load_sqlite
+
+    conn = sqlite3.connect(':memory:')
+    load_sqlite(conn, outdir, manifest)
+    bad = 0
+    for entry in manifest['tables']:
+        cols, key = entry['columns'], entry['key']
+        got = {tuple(r[:len(key)]): r for r in conn.execute(
+            f"SELECT {', '.join(key + cols)} FROM {entry['table']}")}
+        mismatches = 0
+        for r in tables[entry['table']]:
+            k = tuple(r[c] for c in key)
+            db = got.get(k)
+            want = []
+            for c, t in zip(cols, entry['types']):
+                v = r[c]
+                if v is not None and t == 'integer':
+                    v = int(round(v))
+                elif v is not None and t == 'boolean':
+                    v = int(bool(v))
+                elif v is not None and t == 'jsonb':
+                    v = json.dumps(v, ensure_ascii=False, separators=(',', ':'))
+                want.append(v)
+            if db is None or list(db[len(key):]) != want:
+                mismatches += 1
+        extra = len(got) - len(tables[entry['table']])
+        print(f"  {entry['table']}: {len(got)} rows loaded, {mismatches} mismatched, {extra} unexpected")
+        bad += mismatches + abs(extra)
+    return bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Write Postgres COPY files and a manifest from the schema payloads')
+    ap.add_argument('--outdir', default=str(OUTDIR))
+    ap.add_argument('--coords', default=str(COORDS_CSV), help='CSV with facility_id,lat,lng for facility.lat/lng')
+    ap.add_argument('--check', action='store_true', help='Round-trip the files through SQLite and compare with the payloads')
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    tables = build_rows(load_coords(Path(args.coords)))
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    manifest = {'format': 'postgres-copy-text', 'schema': 'hfsrb-ui/src/db/schema.ts',
+                'tables': [write_table(outdir, name, tables[name]) for name in TABLES]}
+    write_json(outdir / 'manifest.json', manifest, ensure_ascii=True)
+    print(f"Wrote {outdir / 'manifest.json'} in {time.perf_counter() - t0:.2f}s: "
+          + ', '.join(f"{e['table']} {e['rows']}" for e in manifest['tables']))
+    if args.check:
+        raise SystemExit(1 if check(outdir, manifest, tables) else 0)
+
+
+if __name__ == '__main__':
+    run_main(main)
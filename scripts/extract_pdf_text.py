@@ -1,29 +1,268 @@
 #!/usr/bin/env python3
+"""
+Extract text from the questionnaire PDFs.
+
+Single file (whole document, plain text):
+  python3 scripts/extract_pdf_text.py <input.pdf> <output.txt>
+
+Batch mode (every *.pdf in the repo root, or the PDFs given):
+  python3 scripts/extract_pdf_text.py --batch
+  python3 scripts/extract_pdf_text.py --batch "2023 ESRD Questionnaire.pdf" --workers 4
+
+Batch mode splits each PDF into page chunks that are extracted in parallel
+worker processes. Per-page results are cached under out/cache/pdf_text by the
+PDF's sha256 and page number, so unchanged forms are not re-parsed on later
+runs. With pdfminer, characters are grouped into lines by baseline and split
+into cells at wide horizontal gaps; PyPDF2 (fallback) splits its line text at
+runs of spaces instead. Cache entries record the backend and the LINE_TOL,
+CELL_GAP and COL_PT values they were made with, and are re-parsed when any of
+these differ from the current run (so pages cached by the fallback are redone
+once pdfminer is installed).
+
+Outputs per PDF under references/forms/<slug>/ (written only when changed):
+- page-NNN.txt — layout-preserving text (cells placed at their x position)
+- tables.tsv — rows with two or more cells: page, line, cells...
+- index.json — source file, sha256, pages, table rows per page
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Tuple
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: extract_pdf_text.py <input.pdf> <output.txt>")
-        sys.exit(1)
-    inp = Path(sys.argv[1])
-    outp = Path(sys.argv[2])
+from json_io import read_json, write_json, write_text
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE = ROOT / 'out' / 'cache' / 'pdf_text'
+OUTDIR = ROOT / 'references' / 'forms'
+# Bump when the cached per-page structure changes
+CACHE_VERSION = 2
+CHUNK_PAGES = 4
+LINE_TOL = 2.0      # points; characters whose baselines differ by less share a line
+CELL_GAP = 2.5      # gaps wider than this many character widths start a new cell
+COL_PT = 4.8        # points per output column in the layout text (~128 columns on Letter)
+# Stored with every cache entry; entries made with other values are re-parsed
+PARAMS = [LINE_TOL, CELL_GAP, COL_PT]
+
+# A line: (y, [(x0, text), ...]) with cells ordered left to right
+Line = Tuple[float, List[Tuple[float, str]]]
+
+
+def extract_whole(inp: Path) -> str:
     try:
         from pdfminer.high_level import extract_text
-        text = extract_text(str(inp))
+        return extract_text(str(inp))
     except Exception as e:
         # Fallback to PyPDF2 if pdfminer fails
         try:
             import PyPDF2
             reader = PyPDF2.PdfReader(str(inp))
-            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+            return "\n".join(page.extract_text() or "" for page in reader.pages)
         except Exception as e2:
             sys.stderr.write(f"Failed to extract text: {e}\nFallback failed: {e2}\n")
             sys.exit(2)
-    outp.parent.mkdir(parents=True, exist_ok=True)
-    outp.write_text(text or "", encoding='utf-8')
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def page_count(path: Path) -> int:
+    try:
+        from pdfminer.pdfpage import PDFPage
+        with path.open('rb') as f:
+            return sum(1 for _ in PDFPage.get_pages(f))
+    except ImportError:
+        import PyPDF2
+        return len(PyPDF2.PdfReader(str(path)).pages)
+
+
+def _chars_to_lines(chars: List[Tuple[float, float, float, str]]) -> List[Line]:
+    """Group (x0, x1, y0, text) characters into lines and cells."""
+    chars.sort(key=lambda c: (-c[2], c[0]))
+    rows: List[List[Tuple[float, float, float, str]]] = []
+    for c in chars:
+        if rows and abs(rows[-1][0][2] - c[2]) < LINE_TOL:
+            rows[-1].append(c)
+        else:
+            rows.append([c])
+    lines: List[Line] = []
+    for row in rows:
+        row.sort(key=lambda c: c[0])
+        widths = sorted(c[1] - c[0] for c in row if c[3].strip())
+        cw = widths[len(widths) // 2] if widths else 5.0
+        cells: List[Tuple[float, str]] = []
+        start, buf, prev_x1 = row[0][0], [], None
+        for x0, x1, _, t in row:
+            if prev_x1 is not None and x0 - prev_x1 > CELL_GAP * cw:
+                if ''.join(buf).strip():
+                    cells.append((start, re.sub(r'\s+', ' ', ''.join(buf)).strip()))
+                start, buf = x0, []
+            elif prev_x1 is not None and x0 - prev_x1 > 0.25 * cw and buf and not buf[-1].isspace():
+                buf.append(' ')
+            buf.append(t)
+            prev_x1 = x1
+        if ''.join(buf).strip():
+            cells.append((start, re.sub(r'\s+', ' ', ''.join(buf)).strip()))
+        if cells:
+            lines.append((round(row[0][2], 1), cells))
+    return lines
+
+
+def batch_backend() -> str:
+    """'pdfminer' when it is installed, else 'pypdf2' (what extract_chunk will use)."""
+    try:
+        import pdfminer.high_level  # noqa: F401
+        return 'pdfminer'
+    except ImportError:
+        return 'pypdf2'
+
+
+def extract_chunk(task: Tuple[str, List[int]]) -> Tuple[str, List[Tuple[int, List[Line]]]]:
+    """(backend, lines for the given 0-based pages of one PDF); runs in a worker process."""
+    path, pages = task
+    try:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams, LTChar, LTContainer
+    except ImportError:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(path)
+        out = []
+        for i in pages:
+            text = reader.pages[i].extract_text() or ''
+            lines: List[Line] = []
+            for n, t in enumerate(text.splitlines()):
+                cells = [(m.start() * COL_PT, m.group(0)) for m in re.finditer(r'\S+(?: \S+)*', t)]
+                if cells:
+                    lines.append((float(-n), cells))
+            out.append((i, lines))
+        return 'pypdf2', out
+
+    def walk(obj, acc):
+        if isinstance(obj, LTChar):
+            acc.append((obj.x0, obj.x1, obj.y0, obj.get_text()))
+        elif isinstance(obj, LTContainer):
+            for child in obj:
+                walk(child, acc)
+
+    out = []
+    for i, layout in zip(pages, extract_pages(path, page_numbers=pages, laparams=LAParams())):
+        chars: List[Tuple[float, float, float, str]] = []
+        walk(layout, chars)
+        out.append((i, _chars_to_lines(chars)))
+    return 'pdfminer', out
+
+
+def layout_text(lines: List[Line]) -> str:
+    out = []
+    for _, cells in lines:
+        s = ''
+        for x0, text in cells:
+            col = int(x0 / COL_PT)
+            s += ' ' * max(1 if s else 0, col - len(s)) + text
+        out.append(s.rstrip())
+    return '\n'.join(out) + '\n'
+
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def run_batch(pdfs: List[Path], outdir: Path, cache: Path, workers: int) -> None:
+    t0 = time.perf_counter()
+    docs: Dict[Path, dict] = {}
+    tasks: List[Tuple[str, List[int]]] = []
+    cached_pages = 0
+    backend = batch_backend()
+    for pdf in pdfs:
+        digest = file_sha256(pdf)
+        cdir = cache / digest[:16]
+        n = page_count(pdf)
+        pages: Dict[int, List[Line]] = {}
+        for i in range(n):
+            cp = cdir / f'{i + 1}.json'
+            if cp.exists():
+                entry = read_json(cp)
+                if entry.get('v') == CACHE_VERSION and entry.get('backend') == backend and entry.get('params') == PARAMS:
+                    pages[i] = [(y, [tuple(c) for c in cells]) for y, cells in entry['lines']]
+        missing = [i for i in range(n) if i not in pages]
+        cached_pages += n - len(missing)
+        for k in range(0, len(missing), CHUNK_PAGES):
+            tasks.append((str(pdf), missing[k:k + CHUNK_PAGES]))
+        docs[pdf] = {'sha256': digest, 'cache': cdir, 'pages': pages, 'count': n}
+
+    if tasks:
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                results = list(zip(tasks, ex.map(extract_chunk, tasks)))
+        else:
+            results = [(t, extract_chunk(t)) for t in tasks]
+        for (path, _), (used, chunk) in results:
+            doc = docs[Path(path)]
+            for i, lines in chunk:
+                doc['pages'][i] = lines
+                write_json(doc['cache'] / f'{i + 1}.json',
+                           {'v': CACHE_VERSION, 'backend': used, 'params': PARAMS, 'lines': lines},
+                           indent=None, ensure_ascii=True, newline=False)
+    t1 = time.perf_counter()
+
+    written = table_rows = 0
+    for pdf, doc in docs.items():
+        dest = outdir / slugify(pdf.stem)
+        tsv = ['page\tline\tcells']
+        per_page = []
+        for i in range(doc['count']):
+            lines = doc['pages'].get(i, [])
+            written += write_text(dest / f'page-{i + 1:03d}.txt', layout_text(lines))
+            rows = [(n + 1, cells) for n, (_, cells) in enumerate(lines) if len(cells) >= 2]
+            tsv += [f"{i + 1}\t{n}\t" + '\t'.join(t.replace('\t', ' ') for _, t in cells) for n, cells in rows]
+            per_page.append(len(rows))
+        table_rows += sum(per_page)
+        written += write_text(dest / 'tables.tsv', '\n'.join(tsv) + '\n')
+        index = {'source': pdf.name, 'sha256': doc['sha256'], 'pages': doc['count'], 'table_rows': per_page}
+        written += write_json(dest / 'index.json', index, ensure_ascii=True)
+
+    total = sum(d['count'] for d in docs.values())
+    print(f"Extracted {len(docs)} PDFs, {total} pages ({cached_pages} cached, {total - cached_pages} parsed in "
+          f"{len(tasks)} chunks) in {t1 - t0:.2f}s; {table_rows} table rows; {written} files updated under {outdir}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Extract text from questionnaire PDFs')
+    ap.add_argument('input', nargs='?', help='PDF to extract (single-file mode)')
+    ap.add_argument('output', nargs='?', help='Text file to write (single-file mode)')
+    ap.add_argument('--batch', nargs='*', metavar='PDF', help='Batch mode over these PDFs (default: every *.pdf in the repo root)')
+    ap.add_argument('--outdir', default=str(OUTDIR))
+    ap.add_argument('--cache', default=str(CACHE))
+    ap.add_argument('--workers', type=int, default=0, help='Worker processes (default: CPU count)')
+    args = ap.parse_args()
+
+    if args.batch is not None:
+        pdfs = [Path(p) for p in args.batch] or sorted(ROOT.glob('*.pdf'))
+        if not pdfs:
+            raise SystemExit('No PDFs to extract')
+        run_batch(pdfs, Path(args.outdir), Path(args.cache), args.workers or os.cpu_count() or 1)
+        return
+    if not args.input or not args.output:
+        print("Usage: extract_pdf_text.py <input.pdf> <output.txt>  |  extract_pdf_text.py --batch [PDF ...]")
+        sys.exit(1)
+    inp = Path(args.input)
+    outp = Path(args.output)
+    text = extract_whole(inp)
+    write_text(outp, text or "")
     print(f"Wrote {outp}")
 
-if __name__ == "__main__":
-    main()
 
+if __name__ == "__main__":
+    run_main(main)
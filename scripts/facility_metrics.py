@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Declarative facility metrics shared by the dashboard index, area rollups and
+profile renderer.
+
+Definitions live in mappings/metrics.json, per facility type:
+  {"first": [keys...]}                  first key with a numeric value
+  {"sum": [keys...]}                    sum of the keys that are present
+  {"prefix": "or_rooms_"}               sum of every key with that prefix
+  {"ratio": {"num", "den", "per"}}      num / (den * per) over metrics defined earlier
+Flags: "index" (copied into web/data/index.json rows), "rollup" (aggregated
+in web/data/rollups; ratios are re-derived from summed num/den), "trend"
+(cross-year series from scripts/build_trends.py).
+
+Metrics are evaluated column-wise for all facilities of a (year, type) at
+once and cached per payload fingerprint (sha1 of schema_payload.json bytes)
+in out/cache/metrics.json; the cache resets when the definitions change.
+
+Usage:
+  python3 scripts/facility_metrics.py --year 2024 --type Hospital   # print metrics per facility
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from json_io import loads, read_json, write_json
+from profiling import run_main
+
+DEFS_PATH = Path('mappings/metrics.json')
+CACHE_PATH = Path('out/cache/metrics.json')
+DATA = Path('data')
+
+
+def to_num(v: Any) -> Optional[float]:
+    """Lenient numeric parse: strips everything but digits, '.', '-' (e.g. '1,234' -> 1234)."""
+    if v is None or v == '' or isinstance(v, bool):
+        return None
+    if isinstance(v, int):
+        return v
+    if isinstance(v, float):
+        return int(v) if v.is_integer() else v
+    s = ''.join(ch for ch in str(v) if ch.isdigit() or ch in '.-')
+    if not s:
+        return None
+    try:
+        x = float(s)
+    except ValueError:
+        return None
+    return int(x) if x.is_integer() else x
+
+
+def fingerprint(raw: bytes) -> str:
+    return hashlib.sha1(raw).hexdigest()
+
+
+class MetricDefs:
+    def __init__(self, path: Path = DEFS_PATH) -> None:
+        raw = path.read_bytes() if path.exists() else b'{}'
+        self.sha = fingerprint(raw)
+        self.types: Dict[str, Dict[str, Dict[str, Any]]] = loads(raw).get('types', {})
+
+    def specs(self, ftype: str) -> Dict[str, Dict[str, Any]]:
+        return self.types.get(ftype, {})
+
+    def names(self, ftype: str, flag: str) -> List[str]:
+        return [n for n, spec in self.specs(ftype).items() if spec.get(flag)]
+
+    def keys(self, ftype: str, name: str) -> List[str]:
+        """Payload keys a metric reads (for 'first'/'sum'), in fallback order."""
+        spec = self.specs(ftype).get(name, {})
+        return list(spec.get('first') or spec.get('sum') or [])
+
+    def ratio(self, ftype: str, name: str) -> Optional[Tuple[str, str, float]]:
+        r = self.specs(ftype).get(name, {}).get('ratio')
+        return (r['num'], r['den'], float(r.get('per', 1))) if r else None
+
+    def evaluate(self, ftype: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Evaluate every metric for a batch of payloads, one column per metric."""
+        cols: Dict[str, List[Any]] = {}
+        for name, spec in self.specs(ftype).items():
+            if 'first' in spec:
+                keys = spec['first']
+                col = []
+                for p in payloads:
+                    val = None
+                    for k in keys:
+                        val = to_num(p.get(k))
+                        if val is not None:
+                            break
+                    col.append(val)
+            elif 'sum' in spec or 'prefix' in spec:
+                if 'sum' in spec:
+                    keys = spec['sum']
+                    parts = [[to_num(p.get(k)) for k in keys] for p in payloads]
+                else:
+                    pre = spec['prefix']
+                    parts = [[to_num(v) for k, v in p.items() if isinstance(k, str) and k.startswith(pre)] for p in payloads]
+                col = []
+                for vals in parts:
+                    vals = [x for x in vals if x is not None]
+                    col.append(sum(vals) if vals else None)
+            elif 'ratio' in spec:
+                num, den, per = self.ratio(ftype, name)
+                col = [round(a / (b * per), 4) if a is not None and b else None
+                       for a, b in zip(cols.get(num, []), cols.get(den, []))]
+            else:
+                col = [None] * len(payloads)
+            cols[name] = col
+        return [{n: cols[n][i] for n in cols if cols[n][i] is not None} for i in range(len(payloads))]
+
+
+class MetricsCache:
+    """Per-fingerprint metric results, persisted across builds."""
+
+    def __init__(self, defs: Optional[MetricDefs] = None, path: Optional[Path] = CACHE_PATH) -> None:
+        self.defs = defs or MetricDefs()
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if path and path.exists():
+            try:
+                doc = read_json(path)
+                if doc.get('defs') == self.defs.sha:
+                    self.entries = doc.get('entries', {})
+            except Exception:
+                self.entries = {}
+
+    def compute(self, ftype: str, items: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """items: (fingerprint, payload) pairs of one facility type; returns metrics in order."""
+        missing = [(fp, p) for fp, p in items if f'{ftype}:{fp}' not in self.entries]
+        self.misses += len(missing)
+        self.hits += len(items) - len(missing)
+        if missing:
+            for (fp, _), m in zip(missing, self.defs.evaluate(ftype, [p for _, p in missing])):
+                self.entries[f'{ftype}:{fp}'] = m
+            self._dirty = True
+        return [self.entries[f'{ftype}:{fp}'] for fp, _ in items]
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        write_json(self.path, {'defs': self.defs.sha, 'entries': self.entries}, compact=True, ensure_ascii=True, newline=False)
+        self._dirty = False
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Evaluate mappings/metrics.json for one year/type')
+    ap.add_argument('--year', type=int, required=True)
+    ap.add_argument('--type', required=True, choices=['Hospital', 'ESRD', 'ASTC', 'LTC'])
+    args = ap.parse_args()
+
+    cache = MetricsCache()
+    items, slugs = [], []
+    for sp in sorted((DATA / str(args.year) / args.type).glob('*/schema_payload.json')):
+        raw = sp.read_bytes()
+        items.append((fingerprint(raw), loads(raw).get('payload', {})))
+        slugs.append(sp.parent.name)
+    for slug, m in zip(slugs, cache.compute(args.type, items)):
+        print(json.dumps({'slug': slug, **m}))
+    cache.save()
+    print(f"{len(items)} facilities ({cache.hits} cached, {cache.misses} evaluated)")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -20,6 +20,8 @@ import csv
 from collections import Counter, defaultdict
 from pathlib import Path
 
+from profiling import run_main
+
 ROOT = Path(__file__).resolve().parent.parent
 
 CSV_2024 = ROOT / 'hospital_survey_2024.csv'
@@ -87,5 +89,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
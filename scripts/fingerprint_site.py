@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Fingerprint static assets in the staged site and write precompressed siblings.
+
+Run after scripts/publish_site.py (make publish does both).
+
+Fingerprinting: every JS/CSS/JSON/SVG asset outside the per-facility trees
+(data/<year>/, out/, schemas/, tiles/) that another page or asset names by
+literal path is renamed to name.<hash>.ext, where hash is the first 10 hex
+digits of the sha256 of the asset after its own references were rewritten.
+References are rewritten in every page and asset that mentions them, including
+any leftover ?v=/?_= query strings. Assets are processed leaves first, so
+a change to data/index.json also changes the hash of app.js. Entry pages
+(*.html) keep their names and should be served no-cache; everything renamed
+can be cached as immutable. Files whose URL is built at runtime (payloads,
+profiles, index shards, view packs, tiles) keep their names, as does
+build.json, which changes on every build and is fetched with cache: 'no-cache'.
+
+Compression: every text file in the site gets .gz (level 9) and, when the
+brotli package is installed, .br (quality 11) siblings, in parallel worker
+processes. Files below --min-bytes, or that would not shrink, are skipped, as
+are siblings newer than their source.
+
+Writes asset-manifest.json (original -> fingerprinted path, immutable list,
+no_cache list of entry pages and build.json for host cache rules,
+compression totals) at the site root. Renamed files and rewritten pages are
+written to a temp file and moved into place, never edited in place, so the
+hardlinks publish_site.py made back to web/ are never modified.
+
+Usage:
+  python3 scripts/fingerprint_site.py
+  python3 scripts/fingerprint_site.py --site /tmp/site --workers 4 --no-compress
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Set, Tuple
+
+from json_io import read_json, write_bytes, write_json
+from profiling import run_main
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent.parent
+SITE = ROOT / 'out' / 'site'
+MANIFEST = 'asset-manifest.json'
+ASSET_EXT = {'.js', '.css', '.json', '.svg'}
+TEXT_EXT = ASSET_EXT | {'.html', '.txt', '.csv', '.geojson', '.xml', '.map'}
+# Trees whose URLs are computed at runtime; never renamed or scanned for references
+DYNAMIC = ('out', 'schemas', 'tiles', 'data/index', 'data/views')
+# Rewritten on every build (make build-info stamps built_at), so hashing it would change
+# the hash of app.js on every publish; kept under its name and listed as no-cache
+NO_CACHE = ('build.json',)
+HASHED = re.compile(r'\.[0-9a-f]{10}\.[a-z]+$')
+
+
+def is_dynamic(rel: str) -> bool:
+    parts = rel.split('/')
+    if len(parts) > 1 and parts[0] == 'data' and parts[1].isdigit():
+        return True
+    return rel in NO_CACHE or any(rel == d or rel.startswith(d + '/') for d in DYNAMIC)
+
+
+def hashed_name(rel: str, body: bytes) -> str:
+    p = PurePosixPath(rel)
+    return str(p.with_name(f'{p.stem}.{hashlib.sha256(body).hexdigest()[:10]}{p.suffix}'))
+
+
+def ref_from(referrer: str, target: str) -> str:
+    """Path of target as written in referrer (relative to the referrer's directory)."""
+    return os.path.relpath(target, str(PurePosixPath(referrer).parent) or '.').replace(os.sep, '/')
+
+
+def ref_pattern(ref: str) -> re.Pattern:
+    # The literal must be a whole quoted/attribute value; a trailing ?query is dropped
+    return re.compile(r'(?<=["\'(=])' + re.escape(ref) + r'(?:\?[^"\')\s]*)?(?=["\')\s>])')
+
+
+def fingerprint(site: Path) -> Tuple[Dict[str, str], int]:
+    """Rename referenced assets and rewrite references; returns (mapping, pages rewritten)."""
+    files = sorted(p.relative_to(site).as_posix() for p in site.rglob('*') if p.is_file())
+    static = [f for f in files if not is_dynamic(f) and PurePosixPath(f).suffix in TEXT_EXT and f != MANIFEST]
+    candidates = [f for f in static if PurePosixPath(f).suffix in ASSET_EXT and not HASHED.search(f)]
+    body = {f: (site / f).read_bytes() for f in static}
+    text = {f: b.decode('utf-8', errors='replace') for f, b in body.items()}
+
+    # referrer -> candidates it names
+    deps: Dict[str, Set[str]] = {f: set() for f in static}
+    for f in static:
+        for c in candidates:
+            if c != f and ref_pattern(ref_from(f, c)).search(text[f]):
+                deps[f].add(c)
+
+    mapping: Dict[str, str] = {}
+    done: Set[str] = set()
+    order: List[str] = []
+
+    def visit(f: str, stack: Tuple[str, ...] = ()) -> None:
+        if f in done or f in stack:
+            return
+        for d in sorted(deps[f]):
+            visit(d, stack + (f,))
+        done.add(f)
+        order.append(f)
+
+    for f in static:
+        visit(f)
+    referenced = set().union(*deps.values()) if deps else set()
+    rewritten = 0
+    for f in order:
+        src = text[f]
+        for c in sorted(deps[f]):
+            if c in mapping:
+                src = ref_pattern(ref_from(f, c)).sub(ref_from(f, mapping[c]), src)
+        new = src.encode('utf-8') if src != text[f] else body[f]
+        if f in candidates and f in referenced:
+            mapping[f] = hashed_name(f, new)
+            write_bytes(site / mapping[f], new)
+            (site / f).unlink()
+        elif new is not body[f]:
+            write_bytes(site / f, new)
+            rewritten += 1
+    return mapping, rewritten
+
+
+def compress_one(task: Tuple[str, int, bool]) -> Tuple[int, int, int, int]:
+    """Write .gz/.br siblings for one file; returns (raw bytes, gz bytes, br bytes, siblings written)."""
+    path, min_bytes, use_br = task
+    src = Path(path)
+    raw = src.read_bytes()
+    if len(raw) < min_bytes:
+        return 0, 0, 0, 0
+    mtime = src.stat().st_mtime
+    sizes = [0, 0]
+    wrote = 0
+    for i, (ext, enabled) in enumerate((('.gz', True), ('.br', use_br))):
+        if not enabled:
+            continue
+        out = src.with_name(src.name + ext)
+        if out.exists() and out.stat().st_mtime >= mtime:
+            sizes[i] = out.stat().st_size
+            continue
+        data = gzip.compress(raw, compresslevel=9, mtime=0) if ext == '.gz' else brotli.compress(raw, quality=11)
+        if len(data) >= len(raw):
+            if out.exists():
+                out.unlink()
+            continue
+        write_bytes(out, data)
+        sizes[i] = len(data)
+        wrote += 1
+    return len(raw), sizes[0], sizes[1], wrote
+
+
+def compress(site: Path, workers: int, min_bytes: int) -> Dict[str, int]:
+    tasks = [(str(p), min_bytes, brotli is not None) for p in sorted(site.rglob('*'))
+             if p.is_file() and p.suffix in TEXT_EXT and not p.name.startswith('.')]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(compress_one, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    else:
+        results = [compress_one(t) for t in tasks]
+    raw = sum(r[0] for r in results)
+    return {'files': sum(1 for r in results if r[0]), 'raw_bytes': raw,
+            'gz_bytes': sum(r[1] for r in results), 'br_bytes': sum(r[2] for r in results),
+            'written': sum(r[3] for r in results)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Content-hash site assets and write .gz/.br siblings')
+    ap.add_argument('--site', default=str(SITE))
+    ap.add_argument('--workers', type=int, default=0, help='Compression processes (default: CPU count)')
+    ap.add_argument('--min-bytes', type=int, default=512, help='Do not precompress files smaller than this')
+    ap.add_argument('--no-compress', action='store_true')
+    args = ap.parse_args()
+
+    site = Path(args.site)
+    if not site.is_dir():
+        raise SystemExit(f"{site} not found; run scripts/publish_site.py first")
+    t0 = time.perf_counter()
+    mapping, rewritten = fingerprint(site)
+    # Keep entries from an earlier run whose fingerprinted file is still in place
+    prev_path = site / MANIFEST
+    prev: Dict[str, str] = read_json(prev_path).get('assets', {}) if prev_path.exists() else {}
+    assets = {k: v for k, v in prev.items() if (site / v).exists() and not (site / k).exists()}
+    assets.update(mapping)
+    t1 = time.perf_counter()
+    comp: Optional[Dict[str, int]] = None
+    if not args.no_compress:
+        comp = compress(site, args.workers or os.cpu_count() or 1, args.min_bytes)
+    manifest = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'assets': dict(sorted(assets.items())),
+        'immutable': sorted(assets.values()),
+        'no_cache': sorted(p.relative_to(site).as_posix() for p in site.glob('*.html')) + [n for n in NO_CACHE if (site / n).exists()],
+        'compression': None if comp is None else {**comp, 'brotli': brotli is not None},
+    }
+    write_json(prev_path, manifest, ensure_ascii=True, newline=False)
+    if not args.no_compress:
+        # The manifest itself is a text asset too
+        compress_one((str(prev_path), args.min_bytes, brotli is not None))
+
+    print(f"Fingerprinted {len(mapping)} assets ({len(assets)} in manifest), rewrote {rewritten} pages in {t1 - t0:.2f}s")
+    if comp is not None:
+        br = f", br {comp['br_bytes'] / 1e6:.1f} MB" if brotli is not None else ' (brotli not installed; .br skipped)'
+        print(f"Precompressed {comp['files']} files ({comp['raw_bytes'] / 1e6:.1f} MB -> gz {comp['gz_bytes'] / 1e6:.1f} MB{br}); "
+              f"{comp['written']} siblings written in {time.perf_counter() - t1:.2f}s")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic survey corpus for benchmarking the pipeline at scale.
+
+The corpus is a self-contained copy of the repo layout under
+out/bench/corpus/<name>/ (scripts/, mappings/, schemas/, references/,
+templates/ and web/ without web/data), plus one survey CSV per year and
+facility type named like the real ones (hospital_survey_<year>.csv, ...), so
+every pipeline script runs unchanged with the corpus as its working directory.
+
+Rows are derived from the real CSVs in the repo root, which serve as templates.
+Headers are unchanged, so the existing mappings and schemas apply. Each type
+gets --scale times its real facility count; copies beyond the first get new
+ids and names. Each facility appears in every requested year, with numeric
+cells scaled by a small yearly trend and jitter. Blanks, text and enums are
+kept as they are. Years without a real mapping reuse the nearest template
+year's mapping files (copied into the corpus only).
+
+Usage:
+  python3 scripts/gen_synthetic_corpus.py --scale 1                  # 2008-2024
+  python3 scripts/gen_synthetic_corpus.py --scale 10 --years 2022-2024
+  python3 scripts/gen_synthetic_corpus.py --scale 100 --years 2024 --name x100-2024
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from csv_to_facility_json import CSV_FILES, id_name_columns
+from setup_data_dirs import YEARS
+from json_io import write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPORA = ROOT / 'out' / 'bench' / 'corpus'
+COPY_DIRS = ['scripts', 'mappings', 'schemas', 'references', 'templates']
+NUM_RE = re.compile(r'^-?\d[\d,]*(\.\d+)?$')
+TREND = 0.02    # relative change in counts per year away from the template year
+JITTER = 0.08   # relative per-cell noise
+
+
+def parse_years(spec: str) -> List[int]:
+    years: List[int] = []
+    for part in spec.split(','):
+        if '-' in part:
+            a, b = part.split('-', 1)
+            years += range(int(a), int(b) + 1)
+        elif part:
+            years.append(int(part))
+    bad = [y for y in years if y not in YEARS]
+    if bad:
+        raise SystemExit(f"Years outside {YEARS[0]}-{YEARS[-1]}: {bad}")
+    return sorted(set(years))
+
+
+def templates() -> Dict[str, Dict[int, Path]]:
+    """Real survey CSVs in the repo root by facility type and year."""
+    out: Dict[str, Dict[int, Path]] = {}
+    for path in sorted(ROOT.glob('*.csv')):
+        for pat, ftype in CSV_FILES:
+            m = pat.match(path.name)
+            if m:
+                out.setdefault(ftype, {})[int(m.group(1))] = path
+    return out
+
+
+def nearest(available: Dict[int, Path], year: int) -> int:
+    return min(available, key=lambda y: (abs(y - year), -y))
+
+
+def synthetic_id(fid: str, copy: int, width: int) -> str:
+    if copy == 0:
+        return fid
+    if fid.isdigit():
+        # Longer than any real id of the type, so copies never collide with real ones
+        return f"{copy}{fid.zfill(width)}"
+    return f"{fid}-S{copy}"
+
+
+def jitter(value: str, factor: float, rng: random.Random) -> str:
+    if not value or not NUM_RE.match(value.strip()):
+        return value
+    raw = value.strip().replace(',', '')
+    x = float(raw) * factor * (1 + rng.uniform(-JITTER, JITTER))
+    if '.' in raw:
+        return f"{x:.{len(raw.split('.')[1])}f}"
+    return str(max(0, int(round(x)))) if not raw.startswith('-') else str(int(round(x)))
+
+
+def write_type(dest: Path, ftype: str, src: Path, src_year: int, years: List[int], scale: int, rng: random.Random) -> int:
+    with src.open('r', encoding='utf-8-sig', newline='') as fh:
+        reader = csv.DictReader(fh)
+        headers = list(reader.fieldnames or [])
+        rows = list(reader)
+    id_col, name_col = id_name_columns(ftype, headers)
+    width = max((len((r.get(id_col or '') or '').strip()) for r in rows), default=1)
+    roster: List[Tuple[dict, str, str]] = []
+    for copy in range(scale):
+        for r in rows:
+            fid = synthetic_id((r.get(id_col or '') or '').strip(), copy, width)
+            name = (r.get(name_col or '') or '').strip()
+            roster.append((r, fid, f"{name} (Synthetic {copy + 1})" if copy else name))
+    for year in years:
+        factor = (1 + TREND) ** (year - src_year)
+        path = dest / f"{ftype.lower()}_survey_{year}.csv"
+        with path.open('w', encoding='utf-8', newline='') as fh:
+            w = csv.DictWriter(fh, fieldnames=headers)
+            w.writeheader()
+            for r, fid, name in roster:
+                out = {h: jitter(r.get(h) or '', factor, rng) for h in headers}
+                if id_col:
+                    out[id_col] = fid
+                if name_col:
+                    out[name_col] = name
+                w.writerow(out)
+    return len(roster)
+
+
+def copy_tree(dest: Path) -> None:
+    for d in COPY_DIRS:
+        if (ROOT / d).exists():
+            shutil.copytree(ROOT / d, dest / d, ignore=shutil.ignore_patterns('__pycache__', '*.pyc', 'forms'))
+    shutil.copytree(ROOT / 'web', dest / 'web', ignore=shutil.ignore_patterns('data'))
+
+
+def add_year_mappings(dest: Path, years: List[int]) -> int:
+    """mappings/<name>_<year>.json for years without one, copied from the nearest mapped year."""
+    mdir = dest / 'mappings'
+    by_stem: Dict[str, Dict[int, Path]] = {}
+    for p in mdir.glob('*_*.json'):
+        stem, _, y = p.stem.rpartition('_')
+        if y.isdigit():
+            by_stem.setdefault(stem, {})[int(y)] = p
+    added = 0
+    for stem, have in by_stem.items():
+        for year in years:
+            target = mdir / f'{stem}_{year}.json'
+            if not target.exists():
+                shutil.copyfile(have[nearest(have, year)], target)
+                added += 1
+    return added
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Generate a scaled synthetic survey corpus for benchmarks')
+    ap.add_argument('--scale', type=int, default=1, help='Multiple of the real facility count per type (1, 10, 100)')
+    ap.add_argument('--years', default=f'{YEARS[0]}-{YEARS[-1]}', help='Years to generate, e.g. 2008-2024 or 2023,2024')
+    ap.add_argument('--types', nargs='*', default=['Hospital', 'ASTC', 'ESRD', 'LTC'])
+    ap.add_argument('--name', help='Corpus name (default x<scale>-<first>-<last>)')
+    ap.add_argument('--outdir', default=str(CORPORA))
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+
+    years = parse_years(args.years)
+    name = args.name or f"x{args.scale}-{years[0]}-{years[-1]}"
+    dest = Path(args.outdir) / name
+    t0 = time.perf_counter()
+    if dest.exists():
+        shutil.rmtree(dest)
+    dest.mkdir(parents=True)
+    copy_tree(dest)
+    rng = random.Random(args.seed)
+    tmpl = templates()
+    counts: Dict[str, Dict[str, int]] = {}  # type -> year -> facilities (rosters differ by template year)
+    facility_years = 0
+    for ftype in args.types:
+        if ftype not in tmpl:
+            print(f"No template CSV for {ftype}; skipping")
+            continue
+        # One pass per template year so each synthetic year uses its nearest real form
+        by_src: Dict[int, List[int]] = {}
+        for y in years:
+            by_src.setdefault(nearest(tmpl[ftype], y), []).append(y)
+        for src_year, ys in sorted(by_src.items()):
+            n = write_type(dest, ftype, tmpl[ftype][src_year], src_year, ys, args.scale, rng)
+            counts.setdefault(ftype, {}).update({str(y): n for y in ys})
+            facility_years += n * len(ys)
+    added = add_year_mappings(dest, years)
+    info = {'name': name, 'scale': args.scale, 'years': years, 'facilities_per_year': counts,
+            'facility_years': facility_years, 'seed': args.seed}
+    write_json(dest / 'corpus.json', info, ensure_ascii=True)
+    size = sum(p.stat().st_size for p in dest.glob('*_survey_*.csv'))
+    per_type = [f"{t} {min(n.values())}" + (f"-{max(n.values())}" if max(n.values()) != min(n.values()) else '')
+                for t, n in counts.items()]
+    print(f"Wrote corpus {dest}: {info['facility_years']} facility-years over {len(years)} years "
+          f"({', '.join(per_type)} per year), {size / 1e6:.1f} MB of CSV, "
+          f"{added} year mappings added, in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -13,9 +13,11 @@ Outputs:
 """
 from __future__ import annotations
 import csv
-import json
 from pathlib import Path
 
+from json_io import read_json
+from profiling import run_main
+
 ROOT = Path(__file__).resolve().parent.parent
 COUNTIES = ROOT / 'hfsrb-ui' / 'public' / 'geo' / 'counties.il.geojson'
 HSA_CSV = ROOT / 'references' / 'hsa_county_map.csv'
@@ -23,7 +25,7 @@ HPA_CSV = ROOT / 'references' / 'hpa_county_map.csv'
 
 
 def load_geojson(path: Path):
-    data = json.loads(path.read_text(encoding='utf-8'))
+    data = read_json(path)
     feats = data.get('features') or []
     if not feats:
         raise SystemExit('No features in counties GeoJSON')
@@ -90,5 +92,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
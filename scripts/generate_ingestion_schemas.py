@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
-import json
+import copy
 from pathlib import Path
 
+import data_dictionary
+from json_io import read_json, write_json
+from profiling import run_main
+
 SRC = Path('schemas/json')
 DST = Path('schemas/json_ingestion')
 
@@ -75,13 +79,16 @@ def relax_noisy_fields(node):
 
 def main():
     DST.mkdir(parents=True, exist_ok=True)
+    # Start from the compiled dictionaries (same schema as SRC) rather than re-reading generated files
+    compiled = {d['name']: d for d in map(data_dictionary.load, data_dictionary.readmes()) if d and d['has_fields']}
     for path in SRC.glob('*.schema.json'):
-        schema = json.loads(path.read_text(encoding='utf-8'))
+        d = compiled.get(path.name[:-len('.schema.json')])
+        schema = copy.deepcopy(d['schema']) if d else read_json(path)
         schema = strip_required(schema)
         schema = relax_noisy_fields(schema)
         out = DST / path.name
-        out.write_text(json.dumps(schema, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        write_json(out, schema)
         print(f"Wrote {out}")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Shared JSON/file I/O for the scripts in scripts/.
+
+- Writes are atomic: the new content goes to a temp file in the same
+  directory, then os.replace() moves it over the target, so an interrupted
+  run leaves either the old file or the new one, never a truncated one.
+  Replacing also breaks hardlinks instead of editing through them.
+- Writes are skipped when the file already holds the same bytes, so unchanged
+  outputs keep their mtime and do not show up in git status.
+- Reads use orjson or ujson when installed, falling back to the stdlib (also
+  for input they reject, such as NaN). Writes use the stdlib encoder unless
+  HFSRB_JSON=orjson|ujson is set: the fast encoders format some floats
+  differently (1e-05 vs 1e-5), which would make every file look changed when
+  the same tree is built on machines with different packages installed.
+  HFSRB_JSON=json forces the stdlib for reads too.
+
+Counters (files written/skipped, bytes written/saved) are kept in STATS and
+printed to stderr at exit by any script that wrote through this module; set
+HFSRB_IO_STATS=0 to silence them.
+
+  from json_io import read_json, write_json, write_text
+  doc = read_json(path)
+  write_json(path, doc)                                  # indent=2, UTF-8, trailing newline
+  write_json(path, rows, compact=True, newline=False)    # separators=(',', ':')
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional, Union
+
+BACKEND = os.environ.get('HFSRB_JSON', 'auto').strip().lower()
+
+_orjson = _ujson = None
+if BACKEND in ('auto', 'orjson'):
+    try:
+        import orjson as _orjson  # type: ignore
+    except ImportError:
+        _orjson = None
+if _orjson is None and BACKEND in ('auto', 'ujson'):
+    try:
+        import ujson as _ujson  # type: ignore
+    except ImportError:
+        _ujson = None
+
+PathLike = Union[str, Path]
+
+
+class IOStats:
+    def __init__(self) -> None:
+        self.written = 0
+        self.skipped = 0
+        self.bytes_written = 0
+        self.bytes_saved = 0
+
+    def summary(self) -> str:
+        return (f"io: wrote {self.written} files ({self.bytes_written / 1e6:.1f} MB), "
+                f"skipped {self.skipped} unchanged ({self.bytes_saved / 1e6:.1f} MB not rewritten)")
+
+
+STATS = IOStats()
+
+
+@atexit.register
+def _report() -> None:
+    if (STATS.written or STATS.skipped) and os.environ.get('HFSRB_IO_STATS', '1') != '0':
+        sys.stderr.write(STATS.summary() + '\n')
+
+
+# --- decoding ---
+
+def loads(data: Union[bytes, str]) -> Any:
+    if _orjson is not None:
+        try:
+            return _orjson.loads(data)
+        except Exception:
+            pass
+    elif _ujson is not None:
+        try:
+            return _ujson.loads(data)
+        except Exception:
+            pass
+    return json.loads(data)
+
+
+def read_json(path: PathLike) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+# --- encoding ---
+
+def dumps(obj: Any, *, indent: Optional[int] = 2, compact: bool = False, ensure_ascii: bool = False,
+          sort_keys: bool = False, newline: bool = True) -> bytes:
+    """Encode like json.dumps(obj, indent=..., ensure_ascii=...) [+ '\\n'] and return UTF-8 bytes.
+
+    compact=True means separators=(',', ':') with no indent; indent=None without
+    compact gives the stdlib default separators (', ', ': ').
+    """
+    tail = b'\n' if newline else b''
+    if BACKEND == 'orjson' and _orjson is not None and not ensure_ascii and (compact or indent == 2):
+        opt = (0 if compact else _orjson.OPT_INDENT_2) | (_orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return _orjson.dumps(obj, option=opt | _orjson.OPT_NON_STR_KEYS) + tail
+        except TypeError:
+            pass
+    if BACKEND == 'ujson' and _ujson is not None and compact:
+        try:
+            return _ujson.dumps(obj, ensure_ascii=ensure_ascii, sort_keys=sort_keys,
+                                escape_forward_slashes=False).encode('utf-8') + tail
+        except (TypeError, OverflowError):
+            pass
+    if compact:
+        text = json.dumps(obj, separators=(',', ':'), ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+    else:
+        text = json.dumps(obj, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+    return text.encode('utf-8') + tail
+
+
+# --- writing ---
+
+def write_bytes(path: PathLike, data: bytes) -> bool:
+    """Atomically write data unless the file already has exactly these bytes. Returns True if written."""
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            STATS.skipped += 1
+            STATS.bytes_saved += len(data)
+            return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    STATS.written += 1
+    STATS.bytes_written += len(data)
+    return True
+
+
+def write_text(path: PathLike, text: str) -> bool:
+    return write_bytes(path, text.encode('utf-8'))
+
+
+def write_json(path: PathLike, obj: Any, **kwargs: Any) -> bool:
+    """write_bytes(path, dumps(obj, **kwargs)); see dumps() for the formatting options."""
+    return write_bytes(path, dumps(obj, **kwargs))
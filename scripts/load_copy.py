@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Stream the COPY files written by scripts/export_copy.py into a database.
+
+Postgres (DATABASE_URL or --dsn; needs psycopg 3 or psycopg2): each table is
+copied into a temporary staging table with COPY ... FROM STDIN, in 64 KB
+chunks, then upserted into the target with INSERT ... ON CONFLICT on the
+manifest key, so re-running a load updates rows like the TypeScript loaders.
+Everything runs in one transaction.
+
+Without a driver, --psql writes an equivalent psql script (\\copy) instead.
+--sqlite loads the same files into a local SQLite database to check them
+without Postgres.
+
+File checksums are compared with the manifest before anything is loaded.
+
+Usage:
+  python3 scripts/load_copy.py                          # Postgres at $DATABASE_URL
+  python3 scripts/load_copy.py --sqlite out/db/hfsrb.sqlite
+  python3 scripts/load_copy.py --psql out/db/load.sql && psql "$DATABASE_URL" -f out/db/load.sql
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from json_io import read_json, write_text
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+INDIR = ROOT / 'out' / 'db'
+CHUNK = 1 << 16
+
+SQLITE_TYPES = {'integer': 'INTEGER', 'numeric': 'NUMERIC', 'boolean': 'INTEGER', 'text': 'TEXT', 'jsonb': 'TEXT'}
+UNESCAPE = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+
+def load_manifest(indir: Path) -> dict:
+    path = indir / 'manifest.json'
+    if not path.exists():
+        raise SystemExit(f"{path} not found; run scripts/export_copy.py first")
+    return read_json(path)
+
+
+def verify_files(indir: Path, manifest: dict) -> None:
+    for e in manifest['tables']:
+        h = hashlib.sha256()
+        with (indir / e['file']).open('rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK), b''):
+                h.update(chunk)
+        if h.hexdigest() != e['sha256']:
+            raise SystemExit(f"{e['file']}: checksum does not match manifest.json (re-run export_copy.py)")
+
+
+def _unescape(field: str) -> Optional[str]:
+    if field == '\\N':
+        return None
+    if '\\' not in field:
+        return field
+    out, i = [], 0
+    while i < len(field):
+        ch = field[i]
+        if ch == '\\' and i + 1 < len(field):
+            out.append(UNESCAPE.get(field[i + 1], field[i + 1]))
+            i += 2
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def read_copy(path: Path) -> Iterator[List[Optional[str]]]:
+    """Rows of a COPY text file as lists of strings (None for \\N)."""
+    with path.open('r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            yield [_unescape(v) for v in line.rstrip('\n').split('\t')]
+
+
+# --- SQLite ---
+
+def load_sqlite(conn: sqlite3.Connection, indir: Path, manifest: dict) -> None:
+    for e in manifest['tables']:
+        table, cols, key = e['table'], e['columns'], e['key']
+        defs = ', '.join(f'"{c}" {SQLITE_TYPES.get(t, "TEXT")}' for c, t in zip(cols, e['types']))
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({defs}, PRIMARY KEY ({", ".join(key)}))')
+        bools = [i for i, t in enumerate(e['types']) if t == 'boolean']
+        updates = ', '.join(f'"{c}" = excluded."{c}"' for c in cols if c not in key)
+
+        def rows():
+            for r in read_copy(indir / e['file']):
+                for i in bools:
+                    if r[i] is not None:
+                        r[i] = 1 if r[i] == 't' else 0
+                yield r
+
+        conn.executemany(
+            f'INSERT INTO "{table}" ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))}) '
+            f'ON CONFLICT ({", ".join(key)}) DO UPDATE SET {updates}', rows())
+    conn.commit()
+
+
+# --- Postgres ---
+
+def upsert_sql(e: dict, stage: str) -> str:
+    cols = ', '.join(f'"{c}"' for c in e['columns'])
+    sets = [f'"{c}" = excluded."{c}"' for c in e['columns'] if c not in e['key']]
+    if e['table'] != 'facility':
+        sets.append('updated_at = now()')
+    return (f'INSERT INTO "{e["table"]}" ({cols}) SELECT {cols} FROM {stage} '
+            f'ON CONFLICT ({", ".join(e["key"])}) DO UPDATE SET {", ".join(sets)}')
+
+
+def stage_sql(e: dict, stage: str) -> str:
+    return f'CREATE TEMP TABLE {stage} (LIKE "{e["table"]}" INCLUDING DEFAULTS) ON COMMIT DROP'
+
+
+def copy_sql(e: dict, stage: str) -> str:
+    return f'COPY {stage} ({", ".join(chr(34) + c + chr(34) for c in e["columns"])}) FROM STDIN'
+
+
+def load_postgres(dsn: str, indir: Path, manifest: dict) -> None:
+    try:
+        import psycopg  # type: ignore
+        conn, v3 = psycopg.connect(dsn), True
+    except ImportError:
+        try:
+            import psycopg2  # type: ignore
+        except ImportError:
+            raise SystemExit('psycopg (or psycopg2) is required for Postgres loads; use --psql to write a psql script instead')
+        conn, v3 = psycopg2.connect(dsn), False
+    try:
+        with conn.cursor() as cur:
+            for e in manifest['tables']:
+                t0 = time.perf_counter()
+                stage = f'stage_{e["table"]}'
+                cur.execute(stage_sql(e, stage))
+                with (indir / e['file']).open('rb') as f:
+                    if v3:
+                        with cur.copy(copy_sql(e, stage)) as cp:
+                            for chunk in iter(lambda: f.read(CHUNK), b''):
+                                cp.write(chunk)
+                    else:
+                        cur.copy_expert(copy_sql(e, stage), f, size=CHUNK)
+                cur.execute(upsert_sql(e, stage))
+                print(f"  {e['table']}: {e['rows']} rows in {time.perf_counter() - t0:.2f}s")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def psql_script(indir: Path, manifest: dict) -> str:
+    lines = ['\\set ON_ERROR_STOP on', 'BEGIN;']
+    for e in manifest['tables']:
+        stage = f'stage_{e["table"]}'
+        path = (indir / e['file']).resolve()
+        lines += [stage_sql(e, stage) + ';',
+                  f"\\copy {stage} ({', '.join(e['columns'])}) FROM '{path}'",
+                  upsert_sql(e, stage) + ';']
+    lines.append('COMMIT;')
+    return '\n'.join(lines) + '\n'
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Load export_copy.py output into Postgres or SQLite')
+    ap.add_argument('--indir', default=str(INDIR))
+    ap.add_argument('--dsn', default=os.environ.get('DATABASE_URL'), help='Postgres connection string (default $DATABASE_URL)')
+    ap.add_argument('--sqlite', help='Load into this SQLite file instead of Postgres')
+    ap.add_argument('--psql', help='Write a psql script (\\copy + upsert) to this path instead of connecting')
+    args = ap.parse_args()
+
+    indir = Path(args.indir)
+    manifest = load_manifest(indir)
+    verify_files(indir, manifest)
+    t0 = time.perf_counter()
+    if args.psql:
+        write_text(args.psql, psql_script(indir, manifest))
+        print(f"Wrote {args.psql} for {len(manifest['tables'])} tables")
+        return
+    if args.sqlite:
+        conn = sqlite3.connect(args.sqlite)
+        load_sqlite(conn, indir, manifest)
+        counts = {e['table']: conn.execute(f'SELECT COUNT(*) FROM "{e["table"]}"').fetchone()[0] for e in manifest['tables']}
+        conn.close()
+        short = [t for t, n in counts.items() if n < next(e['rows'] for e in manifest['tables'] if e['table'] == t)]
+        print(f"Loaded {args.sqlite} in {time.perf_counter() - t0:.2f}s: " + ', '.join(f"{t} {n}" for t, n in counts.items()))
+        raise SystemExit(1 if short else 0)
+    if not args.dsn:
+        raise SystemExit('Set DATABASE_URL or pass --dsn (or use --sqlite / --psql)')
+    load_postgres(args.dsn, indir, manifest)
+    print(f"Loaded {len(manifest['tables'])} tables in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Small load test for scripts/serve_profiles.py and scripts/serve_api.py.
+
+Builds a target list from web/data/index.json (one profile URL per facility,
+or with --api a mix of /api/* routes), fires requests from N concurrent
+workers and reports throughput plus p50/p90/p99 latency. Run it twice to
+compare cold vs warm cache.
+
+Usage:
+  python3 scripts/loadtest_profiles.py --base http://127.0.0.1:8000 --concurrency 16 --requests 2000
+  python3 scripts/loadtest_profiles.py --api --base http://127.0.0.1:8010 --concurrency 16 --requests 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import List
+
+from json_io import read_json
+from profiling import run_main
+
+INDEX = Path('web/data/index.json')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(pct / 100.0 * (len(s) - 1)))))
+    return s[k]
+
+
+def load_targets(limit: int | None) -> List[str]:
+    rows = read_json(INDEX)
+    paths = [f"/out/profiles/{r['year']}/{r['type']}/{r['slug']}.html" for r in rows]
+    if limit:
+        paths = paths[:limit]
+    return paths
+
+
+def load_api_targets(limit: int | None) -> List[str]:
+    """List, detail, HSA/HPA summary and map routes, mirroring the dashboard's request mix."""
+    rows = read_json(INDEX)
+    hospitals = [r for r in rows if r['type'] == 'Hospital' and r.get('fid')]
+    if limit:
+        hospitals = hospitals[:limit]
+    regions = sorted({str(r['region']) for r in hospitals if r.get('region')})
+    paths = ['/api/health', '/api/facilities', '/api/map_data']
+    paths += [f'/api/facilities?hsa={h}' for h in regions] + [f'/api/hsa/{h}' for h in regions]
+    paths += [f"/api/facilities/{r['fid']}?year={r['year']}" for r in hospitals]
+    return paths
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Concurrent latency test against the profile server')
+    ap.add_argument('--base', default='http://127.0.0.1:8000')
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--requests', type=int, default=1000)
+    ap.add_argument('--facilities', type=int, help='Only use the first N facilities from the index (hot set)')
+    ap.add_argument('--gzip', action='store_true', help='Send Accept-Encoding: gzip')
+    ap.add_argument('--api', action='store_true', help='Target serve_api.py routes instead of profile pages')
+    ap.add_argument('--path', action='append', help='Explicit URL path(s) to hit instead of the index-derived profile list')
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+
+    targets = args.path or (load_api_targets if args.api else load_targets)(args.facilities)
+    if not targets:
+        raise SystemExit('No targets to request')
+    rng = random.Random(args.seed)
+    plan = [rng.choice(targets) for _ in range(args.requests)]
+
+    latencies: List[float] = []
+    errors = 0
+    nbytes = 0
+    lock = threading.Lock()
+    cursor = iter(plan)
+
+    def worker() -> None:
+        nonlocal errors, nbytes
+        while True:
+            with lock:
+                path = next(cursor, None)
+            if path is None:
+                return
+            req = urllib.request.Request(args.base.rstrip('/') + path)
+            if args.gzip:
+                req.add_header('Accept-Encoding', 'gzip')
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    body = resp.read()
+                ok = True
+            except Exception:
+                body = b''
+                ok = False
+            dt = (time.perf_counter() - t0) * 1000.0
+            with lock:
+                latencies.append(dt)
+                nbytes += len(body)
+                if not ok:
+                    errors += 1
+
+    t_start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, args.concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t_start
+
+    n = len(latencies)
+    print(f"Requests: {n} ({errors} errors) over {len(set(plan))} distinct URLs, concurrency {args.concurrency}")
+    print(f"Elapsed: {elapsed:.2f}s  Throughput: {n / elapsed if elapsed else 0:.1f} req/s  Transferred: {nbytes / 1e6:.1f} MB")
+    print(f"Latency ms: p50={percentile(latencies, 50):.1f} p90={percentile(latencies, 90):.1f} p99={percentile(latencies, 99):.1f} max={max(latencies) if latencies else 0:.1f}")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -7,10 +7,12 @@ Normalize ASTC ownership_type values to canonical enum codes.
   canonical codes like "for_profit:llc_ra".
 """
 from __future__ import annotations
-import json
 import sys
 from pathlib import Path
 
+from json_io import read_json, write_json
+from profiling import run_main
+
 YEAR = sys.argv[1] if len(sys.argv) > 1 else '2023'
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -76,12 +78,12 @@ def iter_schema_files(base: Path):
 
 def load_json(path: Path):
     try:
-        return json.loads(path.read_text(encoding='utf-8'))
+        return read_json(path)
     except Exception:
         return None
 
 def save_json(path: Path, obj):
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    write_json(path, obj)
 
 def main():
     files = iter_schema_files(ASTC_DIR)
@@ -110,5 +112,5 @@ def main():
     print(f"ASTC ownership_type normalized in {changed} files (Year={YEAR})")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
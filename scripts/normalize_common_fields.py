@@ -10,12 +10,14 @@ Targets files under data/<YEAR>/*/**/schema_payload.json (default YEAR=2023 and
 Idempotent and safe; only rewrites when a change occurs.
 """
 from __future__ import annotations
-import json
 import re
 import sys
 from pathlib import Path
 from typing import Any, Dict
 
+from json_io import read_json, write_json
+from profiling import run_main, traced
+
 ROOT = Path(__file__).resolve().parent.parent
 
 YEARS = ["2024", "2023"] if len(sys.argv) == 1 else sys.argv[1:]
@@ -69,6 +71,7 @@ def fmt_date(s: str) -> str | None:
     return f"{int(mm):02d}/{int(dd):02d}/{int(yy):04d}"
 
 
+@traced('normalize_payload')
 def normalize_payload(p: Dict[str, Any]) -> bool:
     changed = False
     # FEIN
@@ -117,8 +120,7 @@ def main():
         files = iter_schema_files(year)
         for path in files:
             try:
-                text = path.read_text(encoding='utf-8')
-                j = json.loads(text)
+                j = read_json(path)
             except Exception:
                 continue
             payload = j.get('payload', j)
@@ -130,10 +132,10 @@ def main():
                     j['payload'] = payload
                 else:
                     j = payload
-                path.write_text(json.dumps(j, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+                write_json(path, j)
                 total_changed += 1
     print(f"normalize_common_fields: changed {total_changed} files across years {', '.join(YEARS)}")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
 import re
 from pathlib import Path
 
+from json_io import read_json, write_json
+from profiling import run_main
+
 BASE = Path('data/2023/Hospital')
 
 
@@ -33,7 +35,7 @@ def main() -> None:
         if not data_path.exists():
             continue
         try:
-            data = json.loads(data_path.read_text(encoding='utf-8'))
+            data = read_json(data_path)
         except Exception:
             continue
         meta = data.get('meta', {})
@@ -57,12 +59,12 @@ def main() -> None:
         d.rename(target_dir)
         # write back normalized id
         data.setdefault('meta', {})['facility_id_normalized'] = norm
-        (target_dir / 'data.json').write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding='utf-8')
+        write_json(target_dir / 'data.json', data)
         print(f"Renamed: {d.name} -> {target_dir.name}")
         renamed += 1
     print(f"Done. Renamed {renamed} directories.")
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
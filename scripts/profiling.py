@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling for the scripts in scripts/.
+
+Every script runs its main() through run_main(), so any of them can be
+profiled without editing it:
+
+  HFSRB_PROFILE=cpu python3 scripts/apply_mappings.py --year 2023
+  python3 scripts/render_profiles.py --profile mem --year 2024 --type Hospital
+  python3 scripts/build_dashboard_index.py --profile=trace
+
+Modes (output under out/perf/<script>/, where <script> is the script's stem):
+- cpu: cProfile; profile.pstats, profile.collapsed (folded stacks derived from
+  the caller graph, for flamegraph.pl or speedscope) and a top-30 summary.txt.
+- mem: tracemalloc with 25-frame tracebacks; summary.txt with current/peak
+  size and the top allocation sites by line and by traceback, plus
+  snapshot.tracemalloc for later comparison.
+- trace: per-call latency of the functions wrapped with @traced or timed with
+  trace_span (build_payload, validate_payload, render, normalize_payload, the
+  index builder's per-facility loop); trace.json and summary.txt with count,
+  total, p50/p90/p99/max and a log2 histogram in microseconds per name.
+
+The --profile flag is removed from sys.argv when this module is imported, before
+the script parses its own arguments, so scripts that read sys.argv directly
+also accept it. Only the main process is profiled; work done in
+ProcessPoolExecutor workers shows up as time waiting on the pool.
+Without a mode, @traced returns the function unchanged and trace_span returns
+a no-op, so the hooks cost nothing.
+
+Usage:
+  python3 scripts/profiling.py out/perf/apply_mappings/profile.pstats   # print the top functions
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from json_io import write_json, write_text
+
+ROOT = Path(__file__).resolve().parent.parent
+PERF = ROOT / 'out' / 'perf'
+MODES = ('cpu', 'mem', 'trace')
+
+
+def _take_flag(argv: List[str]) -> Optional[str]:
+    mode = None
+    for i, a in enumerate(list(argv)):
+        if a == '--profile' and i + 1 < len(argv):
+            mode = argv[i + 1]
+            del argv[i:i + 2]
+            break
+        if a.startswith('--profile='):
+            mode = a.split('=', 1)[1]
+            del argv[i]
+            break
+    return mode
+
+
+MODE = (_take_flag(sys.argv) or os.environ.get('HFSRB_PROFILE') or '').strip().lower() or None
+if MODE and MODE not in MODES:
+    # Every script imports this module, so a bad value must not stop the pipeline
+    sys.stderr.write(f"[profile] {Path(sys.argv[0]).name or 'python'}: unknown profile mode {MODE!r} "
+                     f"(expected one of {', '.join(MODES)}); profiling disabled\n")
+    MODE = None
+
+_samples: Dict[str, List[float]] = defaultdict(list)
+
+
+# --- trace mode hooks ---
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Decorator recording the wall time of every call under name (trace mode only)."""
+    def wrap(fn: Callable) -> Callable:
+        if MODE != 'trace':
+            return fn
+        bucket = _samples[name]
+
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                bucket.append(time.perf_counter() - t0)
+        inner.__name__ = getattr(fn, '__name__', name)
+        inner.__doc__ = fn.__doc__
+        inner.__wrapped__ = fn  # type: ignore[attr-defined]
+        return inner
+    return wrap
+
+
+class _Span:
+    def __init__(self, name: str) -> None:
+        self.bucket = _samples[name]
+        self.t0: Optional[float] = None
+
+    def start(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def stop(self) -> None:
+        if self.t0 is not None:
+            self.bucket.append(time.perf_counter() - self.t0)
+            self.t0 = None
+
+
+class _NoSpan:
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def trace_span(name: str):
+    """Timer for a loop body: call .start() at the top and .stop() at the end of each iteration.
+
+    Iterations that `continue` before stop() are not recorded.
+    """
+    return _Span(name) if MODE == 'trace' else _NO_SPAN
+
+
+# --- reports ---
+
+def _pct(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))]
+
+
+def trace_report() -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name, vals in sorted(_samples.items()):
+        if not vals:
+            continue
+        s = sorted(vals)
+        hist: Dict[str, int] = defaultdict(int)
+        for v in s:
+            us = max(1, int(v * 1e6))
+            hist[f"<{2 ** (us.bit_length())}us"] += 1
+        out[name] = {
+            'count': len(s), 'total_s': round(sum(s), 6),
+            'p50_ms': round(_pct(s, 50) * 1e3, 4), 'p90_ms': round(_pct(s, 90) * 1e3, 4),
+            'p99_ms': round(_pct(s, 99) * 1e3, 4), 'max_ms': round(s[-1] * 1e3, 4),
+            'histogram_us': dict(hist),
+        }
+    return out
+
+
+def collapsed_stacks(stats: Any, max_depth: int = 64, min_frac: float = 0.0005) -> List[str]:
+    """Folded 'a;b;c <microseconds>' lines from a pstats caller graph.
+
+    cProfile keeps only caller->callee edges, so deeper frames are apportioned
+    by each edge's share of the callee's cumulative time.
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers{caller: (cc, nc, tt, ct)})
+    children: Dict[tuple, List[Tuple[tuple, float, float]]] = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children[caller].append((func, edge[2], edge[3]))
+    total = sum(v[2] for v in raw.values()) or 1.0
+
+    def label(f: tuple) -> str:
+        file, line, fn = f
+        return f"{fn} ({Path(file).name}:{line})" if line else fn
+
+    lines: Dict[str, float] = defaultdict(float)
+
+    def walk(func: tuple, path: List[str], seen: set, scale: float) -> None:
+        cc, nc, tt, ct, _ = raw[func]
+        stack = path + [label(func).replace(';', ',')]
+        lines[';'.join(stack)] += tt * scale
+        if len(stack) >= max_depth:
+            return
+        for child, _, edge_ct in children.get(func, ()):
+            if child in seen or child not in raw:
+                continue
+            child_ct = raw[child][3] or 1e-12
+            share = scale * edge_ct / child_ct
+            if edge_ct * scale < min_frac * total:
+                continue
+            walk(child, stack, seen | {child}, share)
+
+    roots = [f for f, v in raw.items() if not v[4]]
+    for r in roots:
+        walk(r, [], {r}, 1.0)
+    return [f"{k} {int(v * 1e6)}" for k, v in sorted(lines.items()) if int(v * 1e6) > 0]
+
+
+def _write_cpu(prof: Any, outdir: Path) -> None:
+    import io
+    import pstats
+    path = outdir / 'profile.pstats'
+    prof.dump_stats(str(path))
+    stats = pstats.Stats(str(path))
+    write_text(outdir / 'profile.collapsed', '\n'.join(collapsed_stacks(stats)) + '\n')
+    buf = io.StringIO()
+    pstats.Stats(str(path), stream=buf).sort_stats('cumulative').print_stats(30)
+    write_text(outdir / 'summary.txt', buf.getvalue())
+
+
+def _write_mem(outdir: Path) -> None:
+    import tracemalloc
+    snap = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    snap.dump(str(outdir / 'snapshot.tracemalloc'))
+    lines = [f"current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB", '', 'Top 30 allocation sites by line:']
+    lines += [str(s) for s in snap.statistics('lineno')[:30]]
+    lines += ['', 'Top 10 by traceback:']
+    for s in snap.statistics('traceback')[:10]:
+        lines.append(f"{s.size / 1e3:.1f} KB in {s.count} blocks")
+        lines += [f"    {ln}" for ln in s.traceback.format()[-8:]]
+    write_text(outdir / 'summary.txt', '\n'.join(lines) + '\n')
+
+
+def _write_trace(outdir: Path) -> None:
+    report = trace_report()
+    write_json(outdir / 'trace.json', report, ensure_ascii=True)
+    rows = [f"{'name':<20}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for name, r in report.items():
+        rows.append(f"{name:<20}{r['count']:>8}{r['total_s']:>10.3f}{r['p50_ms']:>10.3f}{r['p90_ms']:>10.3f}"
+                    f"{r['p99_ms']:>10.3f}{r['max_ms']:>10.3f}")
+    if not report:
+        rows.append('(no traced calls in this script)')
+    write_text(outdir / 'summary.txt', '\n'.join(rows) + '\n')
+
+
+def run_main(main: Callable[[], Any], stage: Optional[str] = None) -> Any:
+    """Run a script's main() under the profiler selected by --profile / HFSRB_PROFILE."""
+    if MODE is None:
+        return main()
+    stage = stage or Path(sys.argv[0]).stem or 'script'
+    outdir = PERF / stage
+    outdir.mkdir(parents=True, exist_ok=True)
+    prof = None
+    if MODE == 'cpu':
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    elif MODE == 'mem':
+        import tracemalloc
+        tracemalloc.start(25)
+    t0 = time.perf_counter()
+    try:
+        return main()
+    finally:
+        elapsed = time.perf_counter() - t0
+        if prof is not None:
+            prof.disable()
+            _write_cpu(prof, outdir)
+        elif MODE == 'mem':
+            _write_mem(outdir)
+        else:
+            _write_trace(outdir)
+        sys.stderr.write(f"[profile {MODE}] {stage}: {elapsed:.2f}s; wrote {outdir}\n")
+
+
+if __name__ == '__main__':
+    import pstats
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    pstats.Stats(sys.argv[1]).sort_stats('cumulative').print_stats(int(sys.argv[2]) if len(sys.argv) > 2 else 30)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Stage the static site under out/site with only the files it references.
+
+The site reads web/ (pages, scripts, dashboard data and view packs), one
+schema_payload.json per index row (never the raw data.json dumps), the JSON
+schemas those payloads name, and the rendered profile HTML/PDF per row. The
+file list is derived from web/data/index.json, so nothing else under data/ or
+out/profiles is published.
+
+Files are hardlinked from their source by default. Where a hardlink is not
+possible (another filesystem, no permission) the file is reflinked
+(copy-on-write clone, Linux FICLONE) if the filesystem supports it, and copied
+otherwise. Files already staged from the same inode, or with the same size
+and mtime, are left alone. Anything under the target that is no longer
+referenced is removed, except tiles/ (written there by build_tiles.py),
+CNAME/.nojekyll and the .gz/.br siblings of staged files.
+
+Prints a per-group report of files, staged bytes and how each file was placed.
+
+Usage:
+  python3 scripts/publish_site.py
+  python3 scripts/publish_site.py --mode copy --outdir /tmp/site --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from json_io import read_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+WEB = ROOT / 'web'
+INDEX = WEB / 'data' / 'index.json'
+PROFILES = ROOT / 'out' / 'profiles'
+OUTDIR = ROOT / 'out' / 'site'
+# Written into the site by other steps; never pruned
+KEEP = ('tiles', 'CNAME', '.nojekyll')
+FICLONE = 0x40049409
+
+
+def referenced_files(index_path: Path = INDEX) -> Iterator[Tuple[str, Path, str]]:
+    """(group, source, site-relative path) for everything the site can fetch."""
+    for src in sorted(WEB.rglob('*')):
+        if src.is_file():
+            yield 'web', src, src.relative_to(WEB).as_posix()
+    rows = read_json(index_path)
+    schemas = set()
+    for r in rows:
+        sp = ROOT / r['data_path']
+        if sp.exists():
+            yield 'payloads', sp, r['data_path']
+            spec = read_json(sp).get('schema') or ''
+            if spec:
+                schemas.add(spec.split('/')[-1])
+        for ext in ('html', 'pdf'):
+            prof = PROFILES / str(r['year']) / r['type'] / f"{r['slug']}.{ext}"
+            if prof.exists():
+                yield 'profiles', prof, prof.relative_to(ROOT).as_posix()
+    for name in sorted(schemas):
+        src = ROOT / 'schemas' / 'json' / name
+        if src.exists():
+            yield 'schemas', src, f'schemas/json/{name}'
+    if (ROOT / 'CNAME').exists():
+        yield 'web', ROOT / 'CNAME', 'CNAME'
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with src.open('rb') as fi, dst.open('wb') as fo:
+        try:
+            fcntl.ioctl(fo.fileno(), FICLONE, fi.fileno())
+        except OSError:
+            ok = False
+        else:
+            ok = True
+    if not ok:
+        dst.unlink()
+    return ok
+
+
+def place(src: Path, dst: Path, mode: str) -> str:
+    """Stage src at dst; returns 'unchanged', 'hardlink', 'reflink' or 'copy'."""
+    st = src.stat()
+    try:
+        dt = dst.stat()
+    except FileNotFoundError:
+        dt = None
+    if dt is not None:
+        if (dt.st_dev, dt.st_ino) == (st.st_dev, st.st_ino):
+            return 'unchanged'
+        if dt.st_size == st.st_size and dt.st_mtime_ns == st.st_mtime_ns:
+            return 'unchanged'
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f'.{dst.name}.tmp')
+    if tmp.exists():
+        tmp.unlink()
+    how = None
+    if mode == 'hardlink':
+        try:
+            os.link(src, tmp)
+            how = 'hardlink'
+        except OSError:
+            pass
+    if how is None and mode != 'copy' and _reflink(src, tmp):
+        shutil.copystat(src, tmp)
+        how = 'reflink'
+    if how is None:
+        shutil.copy2(src, tmp)
+        how = 'copy'
+    os.replace(tmp, dst)
+    return how
+
+
+def prune(outdir: Path, staged: set, dry_run: bool) -> Tuple[int, int]:
+    """Remove unreferenced files (and then empty directories) under outdir."""
+    removed = freed = 0
+    for path in sorted(outdir.rglob('*'), reverse=True):
+        rel = path.relative_to(outdir)
+        if rel.parts[0] in KEEP:
+            continue
+        if path.is_file() or path.is_symlink():
+            key = rel.as_posix()
+            if path.suffix in ('.gz', '.br') and key[:-3] in staged:
+                continue  # precompressed sibling (fingerprint_site.py) of a staged file
+            if key not in staged:
+                removed += 1
+                freed += path.lstat().st_size
+                if not dry_run:
+                    path.unlink()
+        elif path.is_dir() and not dry_run and not any(path.iterdir()):
+            path.rmdir()
+    return removed, freed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Stage only referenced site files under out/site using hardlinks')
+    ap.add_argument('--outdir', default=str(OUTDIR))
+    ap.add_argument('--index', default=str(INDEX))
+    ap.add_argument('--mode', choices=['hardlink', 'reflink', 'copy'], default='hardlink',
+                    help='How to place changed files (hardlink falls back to reflink, then copy)')
+    ap.add_argument('--no-prune', action='store_true', help='Keep files under the target that are no longer referenced')
+    ap.add_argument('--dry-run', action='store_true', help='Only report what would be staged and removed')
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    outdir = Path(args.outdir)
+    files: Dict[str, Tuple[str, Path]] = {}
+    for group, src, rel in referenced_files(Path(args.index)):
+        files.setdefault(rel, (group, src))
+
+    stats: Dict[str, Counter] = defaultdict(Counter)
+    for rel, (group, src) in files.items():
+        how = 'planned' if args.dry_run else place(src, outdir / rel, args.mode)
+        s = stats[group]
+        s['files'] += 1
+        s['bytes'] += src.stat().st_size
+        s[how] += 1
+    removed, freed = (0, 0) if args.no_prune or not outdir.exists() else prune(outdir, set(files), args.dry_run)
+    elapsed = time.perf_counter() - t0
+
+    kinds = ['unchanged', 'hardlink', 'reflink', 'copy'] if not args.dry_run else ['planned']
+    total: Counter = Counter()
+    print(f"{'group':<10}{'files':>7}{'MB':>9}  " + ' '.join(f'{k:>9}' for k in kinds))
+    for group in ('web', 'payloads', 'schemas', 'profiles'):
+        s = stats.get(group, Counter())
+        total.update(s)
+        print(f"{group:<10}{s['files']:>7}{s['bytes'] / 1e6:>9.1f}  " + ' '.join(f'{s[k]:>9}' for k in kinds))
+    print(f"{'total':<10}{total['files']:>7}{total['bytes'] / 1e6:>9.1f}  " + ' '.join(f'{total[k]:>9}' for k in kinds))
+    verb = 'Would stage' if args.dry_run else 'Staged'
+    copied = total['copy'] + total['reflink']
+    print(f"{verb} {total['files']} files ({total['bytes'] / 1e6:.1f} MB, {copied} written, "
+          f"{total['hardlink']} linked) under {outdir} in {elapsed:.2f}s; removed {removed} unreferenced files ({freed / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    run_main(main)
@@ -8,6 +8,10 @@ Outputs:
   out/profiles/<year>/<type>/<slug>.html
   out/profiles/<year>/<type>/<slug>.pdf  (if WeasyPrint is installed)
 
+Demographics/payer doughnuts are drawn as inline SVG at render time, so the
+WeasyPrint path produces complete PDFs without a headless browser. Pass
+--no-chartjs to also drop the Chart.js CDN script from the HTML.
+
 Design goals:
   - Accurate: reflect dictionary labels/structure, not ad-hoc summaries.
   - Complete: include every non-empty payload field.
@@ -18,16 +22,20 @@ from __future__ import annotations
 
 import argparse
 import html
-import json
 from pathlib import Path
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List
+
+import data_dictionary
+from facility_metrics import MetricDefs, MetricsCache, fingerprint, to_num
+from json_io import loads, read_json, write_text
+from profiling import run_main, traced
 
 BASE_DATA = Path('data')
 OUT = Path('out/profiles')
 
 
 def load_json(path: Path) -> dict:
-    return json.loads(path.read_text(encoding='utf-8'))
+    return read_json(path)
 
 
 def _num_like(s: str) -> bool:
@@ -69,61 +77,239 @@ def inline_css() -> str:
     return f"<style>\n{css}\n</style>"
 
 
-def head_html(title: str) -> str:
+def head_html(title: str, chartjs: bool = True) -> str:
     return (
         "<head>"
         "<meta charset=\"utf-8\">"
         f"<title>{html.escape(title)}</title>"
         f"{inline_css()}"
-        "<style>body{font-family:Aptos,system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif} a{color:#28658D} h3{color:#28658D}</style>"
-        # Chart.js for interactive pies in HTML (Puppeteer injects its own copy for PDFs)
-        "<script src=\"https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js\"></script>"
-        "<link rel=\"stylesheet\" href=\"../../../../web/brand.css\">"
+        "<style>body{font-family:Aptos,system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif} a{color:#28658D} h3{color:#28658D} #all-sections:not(.show-all) .pf-empty{display:none}</style>"
+        # Chart.js upgrades the inline SVG doughnuts to interactive charts in HTML (optional)
+        + ("<script src=\"https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js\"></script>" if chartjs else "")
+        + "<link rel=\"stylesheet\" href=\"../../../../web/brand.css\">"
         "<link rel=\"icon\" type=\"image/png\" href=\"../../../../web/assets/hfsrb-logo.png\">"
         "<meta property=\"og:title\" content=\"Profile\">"
         "<meta property=\"og:image\" content=\"../../../../web/assets/hfsrb-logo.png\">"
         "</head>"
     )
 
-def _charts_block(ftype: str, payload: Dict[str, Any]) -> str:
-    """Inline demographics charts + tables to mirror dashboard popup.
-    Draws Payer Mix, Patients by Race, Patients by Ethnicity as doughnut charts,
-    and a combined demographics table with patient/day shares (days only for Hospital).
+
+# Bump when render() output changes for the same payload; part of the page cache key in serve_profiles.py
+RENDER_VERSION = 2
+
+# Chart.js default palette so the static SVGs match the interactive charts
+CHART_COLORS = ['#36a2eb', '#ff6384', '#4bc0c0', '#ff9f40', '#9966ff', '#ffcd56', '#c9cbcf']
+PAYER_ORDER = ['Medicare', 'Medicaid', 'Private Insurance', 'Other Public', 'Private Pay', 'Charity Care']
+RACE_ORDER = ['White', 'Black/African American', 'Black', 'Asian', 'AI/AN', 'American Indian', 'NH/PI', 'Unknown']
+
+
+def _fmt_currency(v: Any) -> str:
+    x = to_num(v)
+    if x is None:
+        # Unparseable but non-empty figures are shown as entered
+        return str(v) if any(ch.isdigit() for ch in str(v)) else ''
+    return f"${x:,.0f}"
+
+
+def _fmt_count(x: float) -> str:
+    return f"{int(x):,}" if float(x).is_integer() else f"{x:,.2f}"
+
+
+def _present(v: Any) -> bool:
+    return str(v if v is not None else '').strip() != ''
+
+
+def _first(*vals: Any) -> Any:
+    # Mirrors JS `a || b`: first truthy value, else the last one
+    for v in vals:
+        if v:
+            return v
+    return vals[-1] if vals else None
+
+
+def _sorted_by(labels: List[str], order: List[str]) -> List[str]:
+    return sorted(labels, key=lambda k: order.index(k) if k in order else -1)
+
+
+def _demographic_series(ftype: str, p: Dict[str, Any]) -> Dict[str, Tuple[List[str], Dict[str, Any], Dict[str, Any]]]:
+    """Return {'payer'|'race'|'eth': (labels, patient_map, days_map)} using the dashboard's key mapping."""
+    hosp = ftype == 'Hospital'
+    if hosp:
+        payer_map = {
+            'Inpatient Medicare': p.get('pay_inp_medicare'),
+            'Inpatient Medicaid': p.get('pay_inp_medicaid'),
+            'Inpatient Private Insurance': p.get('pay_inp_private_ins'),
+            'Inpatient Other Public': p.get('pay_inp_other_public'),
+            'Inpatient Private Pay': p.get('pay_inp_private_pay'),
+        }
+        race_map = {
+            'White': p.get('race_inp_white'),
+            'Black/African American': p.get('race_inp_black'),
+            'Asian': p.get('race_inp_asian'),
+            'AI/AN': p.get('race_inp_ai_an'),
+            'NH/PI': p.get('race_inp_nh_pi'),
+            'Unknown': p.get('race_inp_unknown'),
+        }
+        eth_map = {
+            'Not Hispanic/Latino': p.get('eth_inp_not_hispanic'),
+            'Hispanic/Latino': p.get('eth_inp_hispanic'),
+            'Unknown': p.get('eth_inp_unknown'),
+        }
+        race_days = {
+            'White': p.get('days_by_race_white'),
+            'Black/African American': p.get('days_by_race_black'),
+            'Asian': p.get('days_by_race_asian'),
+            'AI/AN': p.get('days_by_race_ai_an'),
+            'NH/PI': p.get('days_by_race_nh_pi'),
+            'Unknown': p.get('days_by_race_unknown'),
+        }
+        eth_days = {
+            'Not Hispanic/Latino': p.get('days_by_eth_not_hispanic'),
+            'Hispanic/Latino': p.get('days_by_eth_hispanic'),
+            'Unknown': p.get('days_by_eth_unknown'),
+        }
+    else:
+        payer_map = {
+            'Medicare': p.get('pat_medicare'),
+            'Medicaid': p.get('pat_medicaid'),
+            'Private Insurance': p.get('pat_private_insurance'),
+            'Other Public': p.get('pat_other_public'),
+            'Private Pay': p.get('pat_private_payment'),
+            'Charity Care': p.get('pat_charity'),
+        }
+        race_map = {
+            'White': p.get('race_white'),
+            'Black/African American': _first(p.get('race_black'), p.get('race_black_african_american')),
+            'Asian': p.get('race_asian'),
+            'AI/AN': _first(p.get('race_american_indian'), p.get('race_ai_an')),
+            'NH/PI': _first(p.get('race_native_hawaiian_pacific_islander'), p.get('race_nh_pi')),
+            'Unknown': p.get('race_unknown'),
+        }
+        eth_map = {
+            'Non-Hispanic': _first(p.get('ethnicity_non_hispanic'), p.get('eth_not_hispanic')),
+            'Hispanic/Latino': _first(p.get('ethnicity_hispanic_latino'), p.get('eth_hispanic')),
+            'Unknown': _first(p.get('ethnicity_unknown'), p.get('eth_unknown')),
+        }
+        race_days, eth_days = {}, {}
+    payer_labels = list(payer_map) if hosp else _sorted_by(list(payer_map), PAYER_ORDER)
+    return {
+        'payer': ([k for k in payer_labels if _present(payer_map[k])], payer_map, {}),
+        'race': ([k for k in _sorted_by(list(race_map), RACE_ORDER) if _present(race_map[k])], race_map, race_days),
+        'eth': ([k for k in eth_map if _present(eth_map[k])], eth_map, eth_days),
+    }
+
+
+def _svg_doughnut(title: str, labels: List[str], values: List[float]) -> str:
+    """Static doughnut chart with legend, drawn as inline SVG (no JavaScript needed)."""
+    import math
+    size, r_out, r_in = 160.0, 70.0, 35.0
+    cx = cy = size / 2
+    legend_h = 16 * len(labels)
+    width, height = 240, 24 + size + 8 + legend_h
+    total = sum(v for v in values if v > 0)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height:.0f}" width="100%" role="img" aria-label="{html.escape(title)}">',
+        f'<text x="{width / 2:.0f}" y="16" text-anchor="middle" font-size="12" font-weight="600" fill="#666">{html.escape(title)}</text>',
+        f'<g transform="translate({(width - size) / 2:.0f},24)">',
+    ]
+
+    def pt(r: float, a: float) -> str:
+        return f"{cx + r * math.sin(a):.2f},{cy - r * math.cos(a):.2f}"
+
+    if total <= 0:
+        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{(r_out + r_in) / 2}" fill="none" stroke="#eee" stroke-width="{r_out - r_in}"/>')
+    else:
+        angle = 0.0
+        for i, (lab, v) in enumerate(zip(labels, values)):
+            if v <= 0:
+                continue
+            color = CHART_COLORS[i % len(CHART_COLORS)]
+            pct = v / total * 100
+            tip = f'<title>{html.escape(lab)}: {_fmt_count(v)} ({pct:.1f}%)</title>'
+            if v >= total:
+                # Full ring: two half arcs (a single 360° arc is degenerate)
+                d = (f"M{pt(r_out, 0)} A{r_out},{r_out} 0 1 1 {pt(r_out, math.pi)} A{r_out},{r_out} 0 1 1 {pt(r_out, 0)} "
+                     f"M{pt(r_in, 0)} A{r_in},{r_in} 0 1 0 {pt(r_in, math.pi)} A{r_in},{r_in} 0 1 0 {pt(r_in, 0)} Z")
+                parts.append(f'<path d="{d}" fill="{color}" fill-rule="evenodd" stroke="#fff" stroke-width="1">{tip}</path>')
+                break
+            sweep = v / total * 2 * math.pi
+            a0, a1 = angle, angle + sweep
+            large = 1 if sweep > math.pi else 0
+            d = (f"M{pt(r_out, a0)} A{r_out},{r_out} 0 {large} 1 {pt(r_out, a1)} "
+                 f"L{pt(r_in, a1)} A{r_in},{r_in} 0 {large} 0 {pt(r_in, a0)} Z")
+            parts.append(f'<path d="{d}" fill="{color}" stroke="#fff" stroke-width="1">{tip}</path>')
+            angle = a1
+    parts.append('</g>')
+    y = 24 + size + 8
+    for i, (lab, v) in enumerate(zip(labels, values)):
+        color = CHART_COLORS[i % len(CHART_COLORS)]
+        pct = f" ({v / total * 100:.1f}%)" if total else ''
+        parts.append(f'<rect x="8" y="{y + 2:.0f}" width="10" height="10" fill="{color}"/>'
+                     f'<text x="24" y="{y + 11:.0f}" font-size="11" fill="#333">{html.escape(lab)}: {_fmt_count(v)}{pct}</text>')
+        y += 16
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def _share_table(labels: List[str], pat_map: Dict[str, Any], days_map: Dict[str, Any]) -> str:
+    pat_vals = [to_num(pat_map.get(k)) or 0 for k in labels]
+    day_vals = [to_num(days_map.get(k)) or 0 for k in labels]
+    pat_total, day_total = sum(pat_vals), sum(day_vals)
+    rows = []
+    for k, pv, dv in zip(labels, pat_vals, day_vals):
+        p_share = f"{pv / pat_total * 100:.1f}%" if pat_total else ''
+        d_share = f"{dv / day_total * 100:.1f}%" if day_total else ''
+        rows.append(f'<tr><td>{html.escape(k)}</td><td class="right">{_fmt_count(pv)}</td><td class="right">{p_share}</td>'
+                    f'<td class="right">{_fmt_count(dv)}</td><td class="right">{d_share}</td></tr>')
+    total_row = f'<tr><th>Total</th><th class="right">{_fmt_count(pat_total)}</th><th></th><th class="right">{_fmt_count(day_total)}</th><th></th></tr>'
+    return ('<table><thead><tr><th>Category</th><th class="right">Patients</th><th class="right">Patients Share</th>'
+            '<th class="right">Inpatient Days</th><th class="right">Days Share</th></tr></thead>'
+            f'<tbody>{"".join(rows)}{total_row}</tbody></table>')
+
+
+def _charts_block(ftype: str, payload: Dict[str, Any], chartjs: bool = True) -> str:
+    """Demographics charts + tables mirroring the dashboard popup, rendered server-side.
+    Payer Mix, Patients by Race and Patients by Ethnicity are drawn as inline SVG doughnuts
+    and the race/ethnicity share tables are plain HTML, so PDFs and offline views need no JS.
+    With chartjs=True a small script swaps each SVG for an interactive Chart.js canvas when
+    Chart.js is available (CDN in HTML, or injected by render_profiles_puppeteer.js).
     """
     import json as _json
-    data_json = _json.dumps({'type': ftype, 'payload': payload}, ensure_ascii=False)
+    series = _demographic_series(ftype, payload)
+    titles = {'payer': 'Payer Mix', 'race': 'Patients by Race', 'eth': 'Patients by Ethnicity'}
+    cells = []
+    chart_data = {}
+    for key in ('payer', 'race', 'eth'):
+        labels, pat_map, _ = series[key]
+        vals = [to_num(pat_map.get(k)) or 0 for k in labels]
+        svg = _svg_doughnut(titles[key], labels, vals) if labels else ''
+        canvas = f'<canvas id="chart-{key}" height="140" style="display:none"></canvas>' if chartjs else ''
+        cells.append(f'<div class="chart-cell" id="chart-{key}-cell">{svg}{canvas}</div>')
+        chart_data[key] = {'title': titles[key], 'labels': labels, 'data': vals}
+    race_labels, race_map, race_days = series['race']
+    eth_labels, eth_map, eth_days = series['eth']
+    tables = (
+        f'<div class="card col-12"><h3>Race Breakdown</h3>{_share_table(race_labels, race_map, race_days)}</div>'
+        f'<div class="card col-12"><h3>Ethnicity Breakdown</h3>{_share_table(eth_labels, eth_map, eth_days)}</div>'
+    )
+    script = ''
+    if chartjs:
+        script = (
+            '<script>(function(){\n'
+            '    const C = ' + _json.dumps(chart_data, ensure_ascii=False) + ';\n'
+            "    function draw(key){const d=C[key];const cv=document.getElementById('chart-'+key);if(!cv||!d.labels.length) return;const cell=document.getElementById('chart-'+key+'-cell');const svg=cell&&cell.querySelector('svg');new Chart(cv.getContext('2d'),{type:'doughnut',data:{labels:d.labels,datasets:[{data:d.data}]},options:{plugins:{title:{display:true,text:d.title},legend:{display:true},tooltip:{callbacks:{label:(ctx)=>{const ds=ctx.dataset;const total=(ds&&ds.data||[]).reduce((a,b)=>a+(Number(b)||0),0)||0;const val=Number(ctx.raw)||0;const pct=total?((val/total)*100).toFixed(1)+'%':'';return (ctx.label||'')+': '+val.toLocaleString('en-US')+' '+(pct?('('+pct+')'):'');}}}}}});cv.style.display='';if(svg) svg.style.display='none';}\n"
+            "    function renderCharts(){ if (typeof Chart==='undefined') return; ['payer','race','eth'].forEach(draw); }\n"
+            "    if (typeof Chart!=='undefined') { renderCharts(); } else { window.__renderProfileCharts = renderCharts; }\n"
+            '  })();</script>'
+        )
     return (
         '<div class="card col-12" id="demographics">'
         '  <h3>Demographics & Payer Mix</h3>'
         '  <div class="charts" style="display:grid;grid-template-columns:repeat(3, minmax(220px,1fr));gap:12px">'
-        '    <canvas id="chart-payer" height="140"></canvas>'
-        '    <canvas id="chart-race" height="140"></canvas>'
-        '    <canvas id="chart-eth" height="140"></canvas>'
+        + ''.join(cells) +
         '  </div>'
-        '  <div id="demo-tables"></div>'
-        '  <script>(function(){\n'
-        '    const C = ' + data_json + ';\n'
-        "    function toNum(n){const x=Number(String(n??'').replace(/[^0-9.-]/g,''));return Number.isFinite(x)?x:0;}\n"
-        "    function fmt(n){const x=Number(String(n??'').replace(/[^0-9.-]/g,''));return Number.isFinite(x)?x.toLocaleString('en-US'):String(n??'');}\n"
-        "    function payerOrder(a){const order=['Medicare','Medicaid','Private Insurance','Other Public','Private Pay','Charity Care'];return a.slice().sort((x,y)=>order.indexOf(x)-order.indexOf(y));}\n"
-        "    function raceOrder(a){const order=['White','Black/African American','Black','Asian','AI/AN','American Indian','NH/PI','Unknown'];return a.slice().sort((x,y)=>order.indexOf(x)-order.indexOf(y));}\n"
-        "    function drawDoughnut(sel,title,labels,data){var cv=document.querySelector(sel);if(!cv||!labels.length){return;}var ctx=cv.getContext('2d');new Chart(ctx,{type:'doughnut',data:{labels:labels,datasets:[{data:data}]},options:{plugins:{title:{display:true,text:title},legend:{display:true},tooltip:{callbacks:{label:(ctx)=>{const ds=ctx.dataset;const total=(ds&&ds.data||[]).reduce((a,b)=>a+(Number(b)||0),0)||0;const val=Number(ctx.raw)||0;const pct=total?((val/total)*100).toFixed(1)+'%':'';const lbl=ctx.label||'';return lbl+': '+val.toLocaleString('en-US')+' '+(pct?('('+pct+')'):'');}}}}});}\n"
-        "    function buildTables(type,p){const host=document.getElementById('demo-tables');if(!host) return;const parts=[];function makeRows(labels,patMap,daysMap){const patVals=labels.map(k=>toNum(patMap[k]));const patTotal=patVals.reduce((a,b)=>a+b,0);const daysVals=labels.map(k=>toNum(daysMap&&daysMap[k]));const daysTotal=daysVals.reduce((a,b)=>a+b,0);const rows=labels.map((k,i)=>{const pv=patVals[i];const dv=daysVals[i]||0;const pShare=patTotal?((pv/patTotal)*100).toFixed(1)+'%':'';const dShare=daysTotal?((dv/daysTotal)*100).toFixed(1)+'%':'';return '<tr><td>'+k+'</td><td class=\"right\">'+fmt(pv)+'</td><td class=\"right\">'+pShare+'</td><td class=\"right\">'+fmt(dv)+'</td><td class=\"right\">'+dShare+'</td></tr>';}).join('');const totalRow='<tr><th>Total</th><th class=\"right\">'+fmt(patTotal)+'</th><th></th><th class=\"right\">'+fmt(daysTotal)+'</th><th></th></tr>';return '<table><thead><tr><th>Category</th><th class=\"right\">Patients</th><th class=\"right\">Patients Share</th><th class=\"right\">Inpatient Days</th><th class=\"right\">Days Share</th></tr></thead><tbody>'+rows+totalRow+'</tbody></table>';}\n"
-        "      const t=C.type;const p=C.payload||{};\n"
-        "      const payerMap=(t==='Hospital')?{'Inpatient Medicare':p.pay_inp_medicare,'Inpatient Medicaid':p.pay_inp_medicaid,'Inpatient Private Insurance':p.pay_inp_private_ins,'Inpatient Other Public':p.pay_inp_other_public,'Inpatient Private Pay':p.pay_inp_private_pay}:{'Medicare':p.pat_medicare,'Medicaid':p.pat_medicaid,'Private Insurance':p.pat_private_insurance,'Other Public':p.pat_other_public,'Private Pay':p.pat_private_payment,'Charity Care':p.pat_charity};\n"
-        "      const payerLabels=(t==='Hospital'?Object.keys(payerMap):payerOrder(Object.keys(payerMap))).filter(k=>String(payerMap[k]??'').trim()!=='');\n"
-        "      const payerVals=payerLabels.map(k=>toNum(payerMap[k]));\n"
-        "      const raceMap=(t==='Hospital')?{'White':p.race_inp_white,'Black/African American':p.race_inp_black,'Asian':p.race_inp_asian,'AI/AN':p.race_inp_ai_an,'NH/PI':p.race_inp_nh_pi,'Unknown':p.race_inp_unknown}:{'White':p.race_white,'Black/African American':p.race_black||p.race_black_african_american,'Asian':p.race_asian,'AI/AN':p.race_american_indian,'NH/PI':p.race_native_hawaiian_pacific_islander||p.race_nh_pi,'Unknown':p.race_unknown};\n"
-        "      const raceLabels=raceOrder(Object.keys(raceMap)).filter(k=>String(raceMap[k]??'').trim()!=='');\n"
-        "      const raceVals=raceLabels.map(k=>toNum(raceMap[k]));\n"
-        "      const ethMap=(t==='Hospital')?{'Not Hispanic/Latino':p.eth_inp_not_hispanic,'Hispanic/Latino':p.eth_inp_hispanic,'Unknown':p.eth_inp_unknown}:{'Non-Hispanic':p.ethnicity_non_hispanic||p.eth_not_hispanic,'Hispanic/Latino':p.ethnicity_hispanic_latino||p.eth_hispanic,'Unknown':p.ethnicity_unknown||p.eth_unknown};\n"
-        "      const ethLabels=Object.keys(ethMap).filter(k=>String(ethMap[k]??'').trim()!=='');\n"
-        "      const ethVals=ethLabels.map(k=>toNum(ethMap[k]));\n"
-        "      function renderCharts(){ if (typeof Chart==='undefined') return; if(payerLabels.length) drawDoughnut('#chart-payer','Payer Mix',payerLabels,payerVals); if(raceLabels.length) drawDoughnut('#chart-race','Patients by Race',raceLabels,raceVals); if(ethLabels.length) drawDoughnut('#chart-eth','Patients by Ethnicity',ethLabels,ethVals); const raceDays=(t==='Hospital')?{'White':p.days_by_race_white,'Black/African American':p.days_by_race_black,'Asian':p.days_by_race_asian,'AI/AN':p.days_by_race_ai_an,'NH/PI':p.days_by_race_nh_pi,'Unknown':p.days_by_race_unknown}:{}; const ethDays=(t==='Hospital')?{'Not Hispanic/Latino':p.days_by_eth_not_hispanic,'Hispanic/Latino':p.days_by_eth_hispanic,'Unknown':p.days_by_eth_unknown}:{}; const tables=[]; tables.push('<div class=\"card col-12\"><h3>Race Breakdown</h3>'+makeRows(raceLabels,raceMap,raceDays)+'</div>'); tables.push('<div class=\"card col-12\"><h3>Ethnicity Breakdown</h3>'+makeRows(ethLabels,ethMap,ethDays)+'</div>'); document.getElementById('demo-tables').innerHTML=tables.join(''); }\n"
-        "      function makeRows(labels,patMap,daysMap){return makeRowsImpl(labels,patMap,daysMap);}\n"
-        "      function makeRowsImpl(labels,patMap,daysMap){const patVals=labels.map(k=>toNum(patMap[k]));const patTotal=patVals.reduce((a,b)=>a+b,0);const daysVals=labels.map(k=>toNum(daysMap&&daysMap[k]));const daysTotal=daysVals.reduce((a,b)=>a+b,0);const rows=labels.map((k,i)=>{const pv=patVals[i];const dv=daysVals[i]||0;const pShare=patTotal?((pv/patTotal)*100).toFixed(1)+'%':'';const dShare=daysTotal?((dv/daysTotal)*100).toFixed(1)+'%':'';return '<tr><td>'+k+'</td><td class=\"right\">'+fmt(pv)+'</td><td class=\"right\">'+pShare+'</td><td class=\"right\">'+fmt(dv)+'</td><td class=\"right\">'+dShare+'</td></tr>';}).join('');const totalRow='<tr><th>Total</th><th class=\"right\">'+fmt(patTotal)+'</th><th></th><th class=\"right\">'+fmt(daysTotal)+'</th><th></th></tr>';return '<table><thead><tr><th>Category</th><th class=\"right\">Patients</th><th class=\"right\">Patients Share</th><th class=\"right\">Inpatient Days</th><th class=\"right\">Days Share</th></tr></thead><tbody>'+rows+totalRow+'</tbody></table>';}\n"
-        "      if (typeof Chart!=='undefined') { renderCharts(); } else { window.__renderProfileCharts = renderCharts; }\n"
-        '  })();</script>'
+        f'  <div id="demo-tables">{tables}</div>'
+        + script +
         '</div>'
     )
 
@@ -161,71 +347,15 @@ def table_matrix(headers: List[str], rows: List[List[Any]]) -> str:
 
 def parse_dictionary(schema_path: Path) -> Dict[str, Dict[str, Any]]:
     """Return a map of field_name -> metadata from the Markdown dictionary corresponding to schema_path.
-    Metadata includes: field_id, label, section_key, section_label, order_index, page, notes.
+    Metadata includes: field_id, label, section_key, section_label, order, page, notes, required.
+    Served from the compiled dictionary artifact (scripts/data_dictionary.py), not re-parsed per facility.
     """
     # schemas/json/ahq-short.schema.json -> schemas/ahq-short/README.md
     try:
-        folder = schema_path.parent.parent / schema_path.stem.replace('.schema', '')
-        md = folder / 'README.md'
+        compiled = data_dictionary.for_schema(schema_path)
     except Exception:
         return {}
-    if not md.exists():
-        return {}
-    lines = md.read_text(encoding='utf-8').splitlines()
-    # Find Fields table header
-    start = None
-    for i, line in enumerate(lines):
-        if line.strip().lower().startswith('## fields'):
-            j = i+1
-            while j < len(lines) and not lines[j].strip():
-                j += 1
-            start = j
-            break
-    if start is None:
-        return {}
-    header = [h.strip().lower() for h in lines[start].strip().strip('|').split('|')]
-    idx = start + 2  # skip separator
-    out: Dict[str, Dict[str, Any]] = {}
-    order = 0
-    while idx < len(lines):
-        line = lines[idx].rstrip('\n')
-        if not line.strip() or line.startswith('## '):
-            break
-        if '|' not in line:
-            break
-        cols = [c.strip() for c in line.strip().strip('|').split('|')]
-        while len(cols) < len(header):
-            cols.append('')
-        row = {header[j]: cols[j] for j in range(len(header))}
-        fname = row.get('field_name', '').strip()
-        fid = row.get('field_id', '').strip()
-        label = row.get('field_label', '').strip() or fname
-        page = row.get('section/page', '').strip()
-        notes = row.get('notes', '').strip()
-        req = (row.get('required', '') or '').strip().lower() == 'yes'
-        segs = fid.split('.') if fid else []
-        if len(segs) >= 2:
-            section_key = '.'.join(segs[:2])
-        elif segs:
-            section_key = segs[0]
-        else:
-            section_key = 'Other'
-        # Derive a readable section label from field_id without forcing Title Case
-        section_label = section_key.replace('_', ' ').replace('.', ' — ').strip()
-        if fname:
-            out[fname] = {
-                'field_id': fid,
-                'label': label,
-                'section_key': section_key,
-                'section_label': section_label,
-                'page': page,
-                'notes': notes,
-                'required': req,
-                'order': order,
-            }
-            order += 1
-        idx += 1
-    return out
+    return compiled['profile'] if compiled and compiled['has_fields'] else {}
 
 
 def _schema_name_from_path(schema_path: str | None) -> str:
@@ -286,48 +416,50 @@ def _hospital_group_for(fid: str, fname: str) -> Tuple[str, int]:
     return ('Other', 999)
 
 
-def _render_hospital_matrices(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
+_METRIC_DEFS: Optional[MetricDefs] = None
+
+
+def metric_defs(reload: bool = False) -> MetricDefs:
+    """Definitions from mappings/metrics.json, loaded once (reload=True re-reads the file)."""
+    global _METRIC_DEFS
+    if _METRIC_DEFS is None or reload:
+        _METRIC_DEFS = MetricDefs()
+    return _METRIC_DEFS
+
+
+def _render_hospital_matrices(payload: Dict[str, Any], metrics: Optional[Dict[str, Any]] = None) -> Tuple[str, set[str]]:
     used: set[str] = set()
     parts: List[str] = []
+    defs = metric_defs()
+    if metrics is None:
+        metrics = defs.evaluate('Hospital', [payload])[0]
 
-    # Utilization matrix (Admissions / Days / Beds (Oct 1))
+    # Utilization matrix (Admissions / Days / Beds (Oct 1) / Occupancy); fallback keys per
+    # unit come from mappings/metrics.json (<unit>_admissions, _days, _beds, _occupancy)
     units = [
-        ('Medical-Surgical',
-         ('ms_total_admissions', 'med_surg_admissions'),
-         ('ms_total_pd', 'med_surg_days_total'),
-         ('ms_beds_10_1_23', 'med_surg_beds_oct1')),
-        ('ICU',
-         ('total_icu_admissions', 'icu_total'),
-         ('total_icu_patient_days', 'icu_days'),
-         ('total_icu_beds_10_1_23', 'icu_beds_oct1')),
-        ('OB/GYN',
-         ('total_ob_gyn_admissions', 'obgyn_admissions_total'),
-         ('total_ob_gyn_patient_days', 'obgyn_days_total'),
-         ('ob_gyn_beds_10_1_23', 'obgyn_beds_oct1')),
-        ('Pediatrics',
-         ('peds_admissions', 'pediatric_admissions', 'pedadm'),
-         ('peds_days', 'pediatric_patient_days', 'pedipd'),
-         ('peds_beds_oct1', 'pediatric_beds_set_up_10_1_23', 'ped_oct1')),
-        ('NICU',
-         ('nicu_admissions', 'nn_icu_admissions', 'ntliiiadm'),
-         ('nicu_days', 'nn_icu_patient_days', 'ntliiiipd'),
-         ('nn_icu_beds_on_10_1_23', 'nicu_beds_oct1')),
-        ('LTC', ('ltc_admissions',), ('ltc_days',), tuple()),
-        ('Swing', ('swing_admissions',), ('swing_days',), tuple()),
+        ('Medical-Surgical', 'ms'),
+        ('ICU', 'icu'),
+        ('OB/GYN', 'obgyn'),
+        ('Pediatrics', 'peds'),
+        ('NICU', 'nicu'),
+        ('LTC', 'ltc'),
+        ('Swing', 'swing'),
     ]
 
     util_rows: List[List[Any]] = []
-    for label, adm_keys, day_keys, bed_keys in units:
+    for label, unit in units:
+        adm_keys, day_keys, bed_keys = (defs.keys('Hospital', f'{unit}_{m}') for m in ('admissions', 'days', 'beds'))
         adm = next((payload.get(k) for k in adm_keys if k in payload and str(payload.get(k) or '').strip() != ''), '')
         day = next((payload.get(k) for k in day_keys if k in payload and str(payload.get(k) or '').strip() != ''), '')
         bed = next((payload.get(k) for k in bed_keys if k in payload and str(payload.get(k) or '').strip() != ''), '')
+        occ = metrics.get(f'{unit}_occupancy')
         if str(adm).strip() != '' or str(day).strip() != '' or str(bed).strip() != '':
-            util_rows.append([label, adm, day, bed])
+            util_rows.append([label, adm, day, bed, f"{occ * 100:.1f}%" if occ is not None else ''])
             for k in list(adm_keys) + list(day_keys) + list(bed_keys):
                 if k:
                     used.add(k)
     if util_rows:
-        parts.append(section_card('Inpatient Utilization by Unit', table_matrix(['Unit', 'Admissions', 'Inpatient Days', 'Beds (Oct 1)'], util_rows), 'col-12'))
+        parts.append(section_card('Inpatient Utilization by Unit', table_matrix(['Unit', 'Admissions', 'Inpatient Days', 'Beds (Oct 1)', 'Occupancy'], util_rows), 'col-12'))
 
     # Surgery matrices (OR Class C and Class B)
     def surgery_matrix(prefix: str, title: str) -> None:
@@ -379,16 +511,6 @@ def _render_hospital_matrices(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
     surgery_matrix('procB_', 'Surgical Services — Class B')
 
     # Finance — Net Revenue by Source (Inpatient / Outpatient)
-    def _fmt_currency(v: Any) -> str:
-        try:
-            import re
-            s = re.sub(r'[^0-9\-\.]', '', str(v))
-            if s in ('', '.', '-'):
-                return ''
-            x = float(s)
-            return f"${x:,.0f}"
-        except Exception:
-            return str(v)
     def finance_rows(prefix: str) -> Tuple[str, List[List[Any]], bool]:
         mapping = [
             ('Medicare', f'{prefix}_medicare_revenue'),
@@ -460,16 +582,6 @@ def _render_esrd_matrices(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
         ('Private Payment', 'net_revenue_private_pay'),
     ]
     fin_rows: List[List[Any]] = []
-    def _fmt_currency(v: Any) -> str:
-        try:
-            import re
-            s = re.sub(r'[^0-9\-\.]', '', str(v))
-            if s in ('', '.', '-'):
-                return ''
-            x = float(s)
-            return f"${x:,.0f}"
-        except Exception:
-            return str(v)
     any_fin = False
     for lab, key in fin_map:
         val = payload.get(key, '')
@@ -730,16 +842,6 @@ def _render_ltc_matrices(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
         ('Private Payment', 'net_revenue_private_payment'),
     ]
     ltc_rows: List[List[Any]] = []
-    def _fmt_currency(v: Any) -> str:
-        try:
-            import re
-            s = re.sub(r'[^0-9\-\.]', '', str(v))
-            if s in ('', '.', '-'):
-                return ''
-            x = float(s)
-            return f"${x:,.0f}"
-        except Exception:
-            return str(v)
     any_ltc_fin = False
     for lab, key in ltc_fin_map:
         val = payload.get(key, '')
@@ -778,7 +880,7 @@ def _render_hospital_curated(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
     try:
         tpl_path = Path('templates/profile_hospital_2022.json')
         if tpl_path.exists():
-            spec = json.loads(tpl_path.read_text(encoding='utf-8'))
+            spec = read_json(tpl_path)
             for sec in spec.get('sections', []):
                 st = sec.get('type')
                 title = sec.get('title', '')
@@ -843,14 +945,11 @@ def _render_hospital_curated(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
                     order = 0
                     for sp, kv in sorted(spec_map.items()):
                         try:
-                            import re
                             def sum_keys(substr: str) -> int:
                                 total = 0
                                 for kk, vv in kv.items():
                                     if substr in kk:
-                                        s = re.sub(r'[^0-9\-\.]', '', str(vv))
-                                        if s not in ('', '.', '-'):
-                                            total += int(float(s))
+                                        total += int(to_num(vv) or 0)
                                 return total
                             rooms = sum_keys('rooms_')
                             cases = sum_keys('cases_')
@@ -896,14 +995,6 @@ def _render_hospital_curated(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
         parts.append(_card('Management Contracts', mgmt_rows))
 
     # Utilization matrix (Admissions, Days, Beds)
-    def to_num(x: Any) -> int:
-        try:
-            import re
-            s = re.sub(r'[^0-9\-\.]', '', str(x))
-            return int(float(s)) if s not in ('', '.', '-') else 0
-        except Exception:
-            return 0
-
     units = [
         ('Medical-Surgical',
          ('ms_total_admissions', 'med_surg_admissions'),
@@ -1075,14 +1166,11 @@ def _render_hospital_curated(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
         for spec, kv in sorted(spec_map.items()):
             # Show raw totals for spec; keep simple: sum hours/cases if multiple fields
             try:
-                import re
                 def sum_keys(substr: str) -> int:
                     total = 0
                     for kk, vv in kv.items():
                         if substr in kk:
-                            s = re.sub(r'[^0-9\-\.]', '', str(vv))
-                            if s not in ('', '.', '-'):
-                                total += int(float(s))
+                            total += int(to_num(vv) or 0)
                     return total
                 rooms = sum_keys('rooms_')
                 cases = sum_keys('cases_')
@@ -1105,7 +1193,68 @@ def _render_hospital_curated(payload: Dict[str, Any]) -> Tuple[str, set[str]]:
     return ''.join(parts), used
 
 
-def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, Dict[str, Any]], schema_name: str) -> str:
+def _all_fields_cards(payload: Dict[str, Any], dict_meta: Dict[str, Dict[str, Any]], section_label: Any) -> Tuple[List[str], set[str]]:
+    """Render the "All Fields" cards grouped by dictionary section (Field / Value / Description).
+
+    Every dictionary field and every payload key is emitted once. Rows that are empty and not
+    required get class "pf-empty" (as do cards containing only such rows); they stay hidden
+    until #all-sections has class "show-all". Returns (cards, keys shown by default).
+    """
+    keys = list(payload.keys()) + [k for k in dict_meta.keys() if k not in payload]
+    items = []
+    for k in keys:
+        info = dict_meta.get(k) or {}
+        val = payload.get(k)
+        sval = str(val).strip() if val is not None else ''
+        desc = (info.get('notes') or '') + (f" (Section/Page: {info.get('page')})" if info.get('page') else '')
+        items.append({
+            'key': k,
+            'label': info.get('label') or k,
+            'section': section_label(info.get('section_label') or 'Other') or 'Other',
+            'order': info.get('order', 9999) if info else 9999,
+            'required': bool(info.get('required')),
+            'desc': desc,
+            'val': val,
+            'present': sval != '',
+        })
+    # Sections ordered by first appearance, then rows by dictionary order and label
+    sec_order: Dict[str, int] = {}
+    for it in items:
+        sec_order.setdefault(it['section'], len(sec_order) + 1)
+    items.sort(key=lambda it: (sec_order[it['section']], it['order'], str(it['label']).lower()))
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for it in items:
+        groups.setdefault(it['section'], []).append(it)
+
+    cards: List[str] = []
+    shown: set[str] = set()
+    for sec, arr in groups.items():
+        rows = []
+        any_shown = False
+        for it in arr:
+            visible = it['present'] or it['required']
+            if visible:
+                shown.add(it['key'])
+                any_shown = True
+            label = html.escape(str(it['label'])) + (' *' if it['required'] else '')
+            if it['present']:
+                val = fmt_value(it['val'], it['key'])
+            else:
+                val = '—' if it['required'] else ''
+            klass = '' if visible else ' class="pf-empty"'
+            rows.append(f'<tr{klass}><td>{label}</td><td class="right">{val}</td><td>{html.escape(it["desc"])}</td></tr>')
+        card_class = 'card col-12' + ('' if any_shown else ' pf-empty')
+        cards.append(
+            f'<div class="{card_class}"><h3>{html.escape(sec)}</h3>'
+            '<table><thead><tr><th>Field</th><th class="right">Value</th><th>Description</th></tr></thead>'
+            f'<tbody>{"".join(rows)}</tbody></table></div>'
+        )
+    return cards, shown
+
+
+@traced('render')
+def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, Dict[str, Any]], schema_name: str, chartjs: bool = True,
+           metrics: Optional[Dict[str, Any]] = None) -> str:
     name = meta.get('facility_name') or payload.get('facility_name') or 'Facility'
     year = meta.get('year') or ''
     ftype = meta.get('facility_type') or ''
@@ -1126,7 +1275,7 @@ def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, D
     injected_html = ''
     used_keys: set[str] = set()
     if schema_name.startswith('ahq-'):
-        injected_html, used_keys = _render_hospital_matrices(payload)
+        injected_html, used_keys = _render_hospital_matrices(payload, metrics)
     elif schema_name == 'esrd':
         injected_html, used_keys = _render_esrd_matrices(payload)
     elif schema_name == 'astc':
@@ -1139,68 +1288,7 @@ def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, D
     typemap = {'esrd': 'ESRD', 'astc': 'ASTC'}
     disp_type = ftype or typemap.get(schema_name, 'Hospital' if schema_name.startswith('ahq-') else '')
     if disp_type:
-        injected_html = _charts_block(disp_type, payload) + injected_html
-
-    # Build items grouped strictly by data dictionary field_id hierarchy
-    # Section = first segment of field_id
-    sections: Dict[str, Dict[str, Any]] = {}
-    rendered_keys: set[str] = set(used_keys)
-    # Iterate fields in dictionary order to ensure required fields are always shown
-    dict_items_sorted = sorted(dict_meta.items(), key=lambda kv: kv[1].get('order', 0)) if dict_meta else []
-    for key, info in dict_items_sorted:
-        val = payload.get(key)
-        sval = str(val).strip() if val is not None else ''
-        # Skip keys already shown in matrices
-        if key in used_keys:
-            continue
-        # Include this row if value present OR it is required by dictionary
-        include = (sval != '') or bool(info.get('required'))
-        if not include:
-            continue
-        fid = info.get('field_id', '') or ''
-        segs = [s for s in fid.split('.') if s] if fid else []
-        # Section key defaults to the first segment, with overrides for combined groups
-        sec_key = (segs[0] if segs else info.get('section_key', 'Other')) or 'Other'
-        # Normalize Outpatient Activity section naming
-        if fid.startswith('op_') or key.startswith('op_visits') or key.startswith('obs_unit_'):
-            sec_key = 'outpatient_activity'
-        if fid.startswith('finance.net_revenues'):
-            sec_key = 'finance.net_revenues'
-        if fid.startswith('patients_by_payment'):
-            sec_key = 'patients_by_payment'
-        # Labels: prettify known acronyms, with specific title overrides
-        def prettify(name: str) -> str:
-            parts = name.replace('_', ' ').replace('.', ' — ').strip().split(' ')
-            acros = {'icu':'ICU','nicu':'NICU','ltc':'LTC','cms':'CMS','idph':'IDPH','or':'OR','nh':'NH','pi':'PI','ob':'OB','gyn':'GYN','esrd':'ESRD','astc':'ASTC'}
-            pp = [acros.get(p.lower(), p.title()) for p in parts]
-            label = ' '.join(pp)
-            label = label.replace('Ob Gyn', 'OB/GYN')
-            return label
-        if sec_key == 'patients_by_payment' or fid.startswith('patients.primary_payment') or fid.startswith('patients.payment'):
-            sec_label = 'Patients by Primary Source of Payment'
-        elif sec_key == 'finance.net_revenues':
-            sec_label = 'Net Revenue by Primary Source of Payment'
-        elif sec_key == 'outpatient_activity':
-            sec_label = 'Outpatient Activity'
-        else:
-            sec_label = prettify(sec_key)
-        sec_bucket = sections.setdefault(sec_key, {
-            'label': sec_label,
-            'order': info.get('order', 0),
-            'rows': []
-        })
-        label = info.get('label') or key
-        if not label or label == key:
-            label = key.replace('_', ' ').replace('-', ' ').strip().title()
-        display_val = sval if sval != '' else '—'
-        row_order = info.get('order', 0)
-        sec_bucket['rows'].append((row_order, label, display_val))
-        rendered_keys.add(key)
-
-    # Ensure address basics appear in Facility if available
-    if any([address, city, state, zipc]):
-        sec_bucket = sections.setdefault('facility', {'label': 'Facility', 'order': -1, 'rows': []})
-        sec_bucket['rows'] = [(-100, 'Street', address), (-99, 'City/State/ZIP', f'{city}, {state} {zipc}')] + sec_bucket['rows']
+        injected_html = _charts_block(disp_type, payload, chartjs=chartjs) + injected_html
 
     def normalize_section_label(ftype: str, label: str) -> str:
         s = (label or '').strip()
@@ -1217,13 +1305,10 @@ def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, D
                 return 'Outpatient Activity'
         return s
 
-    # Sort sections and subsections; rows by order then label
-    ordered_sections = sorted(sections.items(), key=lambda kv: (kv[1]['order'], kv[1]['label']))
-    cards_html = []
-    for _, sec in ordered_sections:
-        rows_sorted = sorted(sec['rows'], key=lambda r: (r[0], str(r[1]).lower()))
-        pretty = normalize_section_label(disp_type, sec['label'])
-        cards_html.append(section_card(pretty, table(rows_sorted, ('Field', 'Value')), 'col-12'))
+    # All Fields: a single server-rendered copy. Empty optional rows (and cards made only of
+    # them) carry .pf-empty and are revealed by the "Show all fields" toggle via CSS.
+    cards_html, shown_keys = _all_fields_cards(payload, dict_meta, lambda lab: normalize_section_label(disp_type, lab))
+    rendered_keys: set[str] = set(used_keys) | shown_keys
 
     # Coverage verifier: compute missing dictionary keys not rendered; expose via ?debug=coverage
     import json as _json
@@ -1239,25 +1324,7 @@ def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, D
         '<script>(function(){ try { const data = ' + cov_blob + '; const u=new URL(window.location.href); if(u.searchParams.get("debug")===' + "'coverage'" + '){ const el=document.getElementById("coverage-json"); if(el){ el.textContent=JSON.stringify(data,null,2); document.getElementById("coverage-card").style.display="block"; } } } catch(e){} })();</script>'
     )
 
-    # Build props map from dictionary metadata for client-side re-rendering
-    import json as _json
-    props = {}
-    for k, info in dict_meta.items():
-        sec_label = info.get('section_label') or 'Other'
-        # Normalize to preferred phrasing in client-side view
-        sec_label = normalize_section_label(disp_type, sec_label)
-        # Coarse section order derived from the first time we see a section
-        props[k] = {
-            'x_label': info.get('label') or k,
-            'x_section': sec_label,
-            'x_section_order': 9999,  # will be normalized in JS
-            'x_order': info.get('order', 0),
-            'x_required': bool(info.get('required')),
-            'description': (info.get('notes') or '') + (f" (Section/Page: {info.get('page')})" if info.get('page') else ''),
-        }
-    data_blob = _json.dumps({'payload': payload, 'props': props}, ensure_ascii=False)
-
-    # Controls and container to allow client-side toggle of all fields
+    # Controls for the show-all toggle and CSV exports
     controls = (
         '<div class="card col-12" id="pf-controls">'
         '  <div style="display:flex;gap:10px;align-items:center;flex-wrap:wrap">'
@@ -1269,26 +1336,25 @@ def render(meta: Dict[str, Any], payload: Dict[str, Any], dict_meta: Dict[str, D
         '</div>'
     )
 
+    # Client script only attaches behavior (toggle + exports); it never re-renders markup
     client_js = (
         '<script>(function(){\n'
         '  try {\n'
-        '    const DATA = ' + data_blob + ';\n'
-        "    function fmt(n){const x=Number(String(n??'').replace(/[^0-9.-]/g,''));return Number.isFinite(x)?x.toLocaleString('en-US'):String(n??'');}\n"
         "    function csvEscape(v){const s=String(v==null?'':v);return /[\",\n]/.test(s)?'\"'+s.replace(/\"/g,'\"\"')+'\"':s;}\n"
-        "    function tableToCSV(table,title){const rows=[]; if(title) rows.push([title]); const ths=table.querySelectorAll('thead th'); if(ths.length){rows.push(Array.from(ths).map(th=>th.textContent.trim()));} table.querySelectorAll('tbody tr').forEach(tr=>{rows.push(Array.from(tr.children).map(td=>td.textContent.trim()));}); return rows.map(r=>r.map(csvEscape).join(',')).join('\\n');}\n"
+        "    function visible(node){return !!(node && node.getClientRects().length);}\n"
+        "    function tableToCSV(table,title){const rows=[]; if(title) rows.push([title]); const ths=table.querySelectorAll('thead th'); if(ths.length){rows.push(Array.from(ths).map(th=>th.textContent.trim()));} table.querySelectorAll('tbody tr').forEach(tr=>{ if(!visible(tr)) return; rows.push(Array.from(tr.children).map(td=>td.textContent.trim()));}); return rows.map(r=>r.map(csvEscape).join(',')).join('\\n');}\n"
         "    function addPerCardExports(containerSel){const cont=(typeof containerSel==='string')?document.querySelector(containerSel):containerSel; if(!cont) return; cont.querySelectorAll('.card').forEach(card=>{const h3=card.querySelector('h3'); const table=card.querySelector('table'); if(!h3||!table) return; if(h3.querySelector('button[data-export]')) return; const btn=document.createElement('button'); btn.className='tiny'; btn.setAttribute('data-export',''); btn.textContent='Export CSV'; btn.addEventListener('click',()=>{const title=h3.childNodes[0]?h3.childNodes[0].textContent.trim():'table'; const csv=tableToCSV(table,title); const blob=new Blob([csv],{type:'text/csv'}); const a=document.createElement('a'); a.href=URL.createObjectURL(blob); const safe=title.toLowerCase().replace(/[^a-z0-9]+/g,'-').replace(/^-|-$|--+/g,'-'); a.download=(safe||'table')+'.csv'; document.body.appendChild(a); a.click(); a.remove();}); h3.appendChild(btn);});}\n"
-        "    function renderAll(payload, props, showAll){const keys=new Set([...Object.keys(payload||{}), ...Object.keys(props||{})]); const items=[...keys].map(k=>{const p=props[k]||{};return {key:k,label:p.x_label||k,section:p.x_section||'Other',sectionOrder:Number(p.x_section_order||9999),order:Number(p.x_order||9999),desc:p.description||'',required:!!p.x_required,val:(payload||{})[k]};}).filter(it=> showAll || String(it.val??'').trim()!=='' || it.required); const secOrder={}; let idx=0; items.forEach(it=>{ if(!(it.section in secOrder)) secOrder[it.section]=++idx; if(!it.sectionOrder||it.sectionOrder===9999) it.sectionOrder=secOrder[it.section];}); items.sort((a,b)=> (a.sectionOrder-b.sectionOrder) || (a.order-b.order) || String(a.label).localeCompare(String(b.label))); const groups={}; items.forEach(it=>{(groups[it.section]=groups[it.section]||[]).push(it);}); const container=document.getElementById('all-sections'); if(!container) return; container.innerHTML=''; Object.keys(groups).forEach(sec=>{ const arr=groups[sec]; const rows=arr.map(it=>{ const label=it.required? (it.label+' *') : it.label; const val=String(it.val??'').trim().length? fmt(it.val) : (showAll? '' : '—'); return '<tr><td>'+label+'</td><td class=\"right\">'+val+'</td><td>'+(it.desc||'')+'</td></tr>'; }).join(''); const card=['<div class=\"card col-12\">','<h3>'+sec+'</h3>','<table><thead><tr><th>Field</th><th class=\"right\">Value</th><th>Description</th></tr></thead><tbody>'+rows+'</tbody></table>','</div>'].join(''); container.insertAdjacentHTML('beforeend', card); }); }\n"
-        "    function exportAll(containerSel){ const cont=(typeof containerSel==='string')?document.querySelector(containerSel):containerSel; if(!cont) return ''; const parts=[]; cont.querySelectorAll('.card').forEach(card=>{ const h3=card.querySelector('h3'); const title=h3? (h3.childNodes[0]?.textContent?.trim()||'') : ''; const table=card.querySelector('table'); if(!table) return; parts.push(tableToCSV(table, title)); parts.push(''); }); return parts.join('\\n'); }\n"
-        "    function applyFromURL(){ const u=new URL(window.location.href); const show=(u.searchParams.get('show')==='all'); const box=document.getElementById('pfShowAll'); if(box){ box.checked=show; } renderAll(DATA.payload, DATA.props, show); addPerCardExports('#all-sections'); addPerCardExports('#demo-tables'); const ex=document.getElementById('pfExportAll'); if(ex){ ex.addEventListener('click', ()=>{ const csv = [ exportAll('#demographics'), exportAll('#demo-tables'), exportAll('#all-sections') ].join('\n'); const blob=new Blob([csv],{type:'text/csv'}); const a=document.createElement('a'); a.href=URL.createObjectURL(blob); a.download='profile-all-tables.csv'; document.body.appendChild(a); a.click(); a.remove(); }); } }\n"
-        "    document.addEventListener('DOMContentLoaded', function(){ applyFromURL(); const box=document.getElementById('pfShowAll'); if(box){ box.addEventListener('change', ()=>{ const show=!!box.checked; const u=new URL(window.location.href); if(show) u.searchParams.set('show','all'); else u.searchParams.delete('show'); history.replaceState({},'',u.toString()); renderAll(DATA.payload, DATA.props, show); addPerCardExports('#all-sections'); }); } addPerCardExports('#demo-tables'); });\n"
-        "    window.__renderAllFields = function(){ renderAll(DATA.payload, DATA.props, true); };\n"
+        "    function exportAll(containerSel){ const cont=(typeof containerSel==='string')?document.querySelector(containerSel):containerSel; if(!cont) return ''; const parts=[]; cont.querySelectorAll('.card').forEach(card=>{ if(!visible(card)) return; const h3=card.querySelector('h3'); const title=h3? (h3.childNodes[0]?.textContent?.trim()||'') : ''; const table=card.querySelector('table'); if(!table) return; parts.push(tableToCSV(table, title)); parts.push(''); }); return parts.join('\\n'); }\n"
+        "    function setShowAll(show){ const c=document.getElementById('all-sections'); if(c) c.classList.toggle('show-all', !!show); const box=document.getElementById('pfShowAll'); if(box) box.checked=!!show; }\n"
+        "    document.addEventListener('DOMContentLoaded', function(){ const u=new URL(window.location.href); setShowAll(u.searchParams.get('show')==='all'); const box=document.getElementById('pfShowAll'); if(box){ box.addEventListener('change', ()=>{ const show=!!box.checked; const u2=new URL(window.location.href); if(show) u2.searchParams.set('show','all'); else u2.searchParams.delete('show'); history.replaceState({},'',u2.toString()); setShowAll(show); }); } addPerCardExports('#all-sections'); addPerCardExports('#demo-tables'); const ex=document.getElementById('pfExportAll'); if(ex){ ex.addEventListener('click', ()=>{ const csv = [ exportAll('#demographics'), exportAll('#demo-tables'), exportAll('#all-sections') ].join('\\n'); const blob=new Blob([csv],{type:'text/csv'}); const a=document.createElement('a'); a.href=URL.createObjectURL(blob); a.download='profile-all-tables.csv'; document.body.appendChild(a); a.click(); a.remove(); }); } });\n"
+        "    window.__renderAllFields = function(){ setShowAll(true); };\n"
         '  } catch(e) { /* noop */ }\n'
         '})();</script>'
     )
 
     return (
         '<!doctype html><html lang="en">'
-        + head_html(f"{name} — Profile")
+        + head_html(f"{name} — Profile", chartjs=chartjs)
         + '<body>'
         + header
         + f'<main class="grid">' + injected_html + controls + '<div id="all-sections">' + ''.join(cards_html) + '</div>' + coverage_card + client_js + '</main>'
@@ -1308,10 +1374,12 @@ def main() -> None:
     ap.add_argument('--type', choices=['Hospital', 'ESRD', 'ASTC', 'LTC'])
     ap.add_argument('--slug')
     ap.add_argument('--no-pdf', action='store_true', help='Only render HTML')
+    ap.add_argument('--no-chartjs', action='store_true', help='Drop the Chart.js CDN script; charts stay as inline SVG (offline/PDF friendly)')
     args = ap.parse_args()
 
     years = [args.year] if args.year else [int(p.name) for p in BASE_DATA.iterdir() if p.is_dir() and p.name.isdigit()]
     types = [args.type] if args.type else ['Hospital', 'ESRD', 'ASTC', 'LTC']
+    metrics_cache = MetricsCache(metric_defs())
 
     for y in sorted(years):
         for t in types:
@@ -1319,6 +1387,7 @@ def main() -> None:
             if not base.exists():
                 continue
             out_dir = ensure_out(y, t)
+            facilities = []  # (fac_dir, doc, fingerprint)
             for fac_dir in sorted(base.iterdir()):
                 if not fac_dir.is_dir():
                     continue
@@ -1327,16 +1396,21 @@ def main() -> None:
                 sp = fac_dir / 'schema_payload.json'
                 if not sp.exists():
                     continue
-                doc = load_json(sp)
+                raw = sp.read_bytes()
+                facilities.append((fac_dir, loads(raw), fingerprint(raw)))
+            # Metrics for the whole (year, type) in one column-wise pass
+            all_metrics = metrics_cache.compute(t, [(fp, doc.get('payload', {})) for _, doc, fp in facilities])
+            for (fac_dir, doc, _), metrics in zip(facilities, all_metrics):
                 meta = doc.get('meta', {})
                 payload = doc.get('payload', {})
                 schema_spec = doc.get('schema')
                 dict_meta: Dict[str, Dict[str, Any]] = {}
                 if schema_spec:
                     dict_meta = parse_dictionary(Path(schema_spec)) or {}
-                html_text = render(meta, payload, dict_meta, _schema_name_from_path(schema_spec))
+                html_text = render(meta, payload, dict_meta, _schema_name_from_path(schema_spec),
+                                   chartjs=not args.no_chartjs, metrics=metrics)
                 out_html = out_dir / f"{fac_dir.name}.html"
-                out_html.write_text(html_text, encoding='utf-8')
+                write_text(out_html, html_text)
                 # Optional PDF via WeasyPrint if installed
                 if not args.no_pdf:
                     try:
@@ -1344,7 +1418,8 @@ def main() -> None:
                         HTML(string=html_text).write_pdf(str(out_html).replace('.html', '.pdf'))
                     except Exception:
                         pass
+    metrics_cache.save()
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-import json
 from pathlib import Path
 
+from json_io import read_json
+from profiling import run_main
+
 CHECKS = {
     'Hospital': ['license_idph', 'facility_name', 'address_line1', 'address_city', 'address_zip', 'fein'],
     'ASTC': ['astc_license', 'facility_name', 'address_line1', 'address_city', 'address_zip', 'fein', 'address_state'],
@@ -27,11 +29,11 @@ def main():
                 p = fac_dir / 'schema_payload.json'
                 if not p.exists():
                     continue
-                doc = json.loads(p.read_text(encoding='utf-8'))
+                doc = read_json(p)
                 payload = doc.get('payload', {})
                 missing = [k for k in want if k not in payload or str(payload.get(k, '')).strip() == '']
                 if missing:
                     print(f"{year_dir.name}/{ftype}/{fac_dir.name}: missing {', '.join(missing)}")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Read-only JSON API mirroring the hfsrb-ui routes, without Next.js or Postgres.
+
+Everything is loaded into memory at start-up from the built data:
+- facility and hospital profile rows from the schema payloads, mapped exactly
+  like the COPY export (export_copy.build_rows)
+- county/HSA/HPA from web/data/index.json (falling back to the county maps)
+- HSA/HPA summaries from web/data/rollups/<year>-<type>.json
+
+and indexed by id, type, HSA, HPA and county, plus a 0.25° grid over facility
+coordinates for distance filters.
+
+Routes (same query parameters as the Next.js handlers):
+  /api/health
+  /api/facilities?hsa=&hpa=&hospital_type=&q=&year=&type=
+  /api/facilities/<id>?year=
+  /api/facilities/<id>/profile?year=     HTML profile (render_profiles); PDF needs the Next app
+  /api/hsa/<hsa>?year=  /api/hpa/<hpa>?year=
+  /api/map_data?hsa=&hpa=&origin_lat=&origin_lng=&max_distance_km=&type=
+
+Responses are memoized in an LRU keyed by path and sorted query string, carry
+an ETag (sha1 of the body, with a -gz suffix on the gzip body; If-None-Match
+answers 304) and are gzip-compressed when the client accepts it. scripts/loadtest_profiles.py --api drives a mixed
+load against these routes. --check starts the server on a free port, requests
+every route once and verifies status codes, ETags and gzip.
+
+Usage:
+  python3 scripts/serve_api.py --port 8010
+  python3 scripts/serve_api.py --check
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, defaultdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from build_dashboard_index import _norm_county, load_county_map
+from build_proximity import haversine_km
+from export_copy import build_rows
+from serve_profiles import ProfileCache, render_page
+from tag_facility_geography import COORDS_CSV, load_coords
+from json_io import read_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+INDEX = ROOT / 'web' / 'data' / 'index.json'
+ROLLUPS = ROOT / 'web' / 'data' / 'rollups'
+REFS = ROOT / 'references'
+GRID = 0.25
+DEFAULT_YEAR = 2024
+
+ROUTE_RE = re.compile(r'^/api/(?:(health)|(facilities)(?:/([^/]+)(/profile)?)?|(hsa|hpa)/([^/]+)|(map_data))/?$')
+
+
+def camel(name: str) -> str:
+    head, *rest = name.split('_')
+    return head + ''.join(w.title() for w in rest)
+
+
+class ApiData:
+    """In-memory tables and indexes built once at start-up."""
+
+    def __init__(self, coords_csv: Path = COORDS_CSV) -> None:
+        t0 = time.perf_counter()
+        tables = build_rows(load_coords(coords_csv))
+        self.facilities: Dict[str, dict] = {r['id']: dict(r) for r in tables['facility']}
+        self.profiles = {(r['facility_id'], r['year']): r for r in tables['hospital_profile_by_year']}
+        self.profiles_2024 = {r['facility_id']: r for r in tables['hospital_profile_2024']}
+        # data/<year>/<type>/<slug> per facility and year, for the HTML profile route
+        self.slugs: Dict[str, Dict[int, Tuple[str, str]]] = defaultdict(dict)
+        self._enrich()
+        self.by_type: Dict[str, List[str]] = defaultdict(list)
+        self.by_hsa: Dict[str, List[str]] = defaultdict(list)
+        self.by_hpa: Dict[str, List[str]] = defaultdict(list)
+        self.by_county: Dict[str, List[str]] = defaultdict(list)
+        self.grid: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for fid, f in sorted(self.facilities.items(), key=lambda kv: (kv[1]['name'].lower(), kv[0])):
+            self.by_type[f['type']].append(fid)
+            for idx, key in ((self.by_hsa, f['hsa']), (self.by_hpa, f['hpa']), (self.by_county, _norm_county(f['county'] or ''))):
+                if key:
+                    idx[str(key)].append(fid)
+            if f['lat'] is not None and f['lng'] is not None:
+                self.grid[(math.floor(f['lat'] / GRID), math.floor(f['lng'] / GRID))].append(fid)
+        self._rollups: Dict[Tuple[int, str], Optional[dict]] = {}
+        self.load_seconds = time.perf_counter() - t0
+
+    def _enrich(self) -> None:
+        """County/HSA/HPA as the dashboard resolved them (latest year wins)."""
+        hsa_map = load_county_map(REFS / 'hsa_county_map.csv', 'hsa')
+        hpa_map = load_county_map(REFS / 'hpa_county_map.csv', 'hpa')
+        rows = read_json(INDEX) if INDEX.exists() else []
+        for r in sorted(rows, key=lambda r: r['year']):
+            f = self.facilities.get(r.get('fid'))
+            if f is None:
+                continue
+            self.slugs[f['id']][r['year']] = (r['type'], r['slug'])
+            ckey = _norm_county(r.get('county'))
+            f['county'] = f['county'] or r.get('county') or None
+            f['hsa'] = f['hsa'] or r.get('region') or hsa_map.get(ckey) or None
+            f['hpa'] = f['hpa'] or hpa_map.get(ckey) or None
+            f['city'], f['zip'] = r.get('city'), r.get('zip')
+
+    def rollup(self, year: int, ftype: str) -> Optional[dict]:
+        key = (year, ftype)
+        if key not in self._rollups:
+            path = ROLLUPS / f'{year}-{ftype}.json'
+            self._rollups[key] = read_json(path) if path.exists() else None
+        return self._rollups[key]
+
+    def near(self, lat: float, lng: float, km: float) -> List[Tuple[float, str]]:
+        """Facilities within km of a point: grid cells covering the radius, then exact haversine."""
+        dlat = km / 111.0
+        dlng = km / max(1e-6, 111.0 * math.cos(math.radians(lat)))
+        out = []
+        for gy in range(math.floor((lat - dlat) / GRID), math.floor((lat + dlat) / GRID) + 1):
+            for gx in range(math.floor((lng - dlng) / GRID), math.floor((lng + dlng) / GRID) + 1):
+                for fid in self.grid.get((gy, gx), ()):
+                    f = self.facilities[fid]
+                    d = haversine_km(lat, lng, f['lat'], f['lng'])
+                    if d <= km:
+                        out.append((d, fid))
+        return sorted(out)
+
+
+# --- Route handlers: (status, payload) ---
+
+def _q(query: Dict[str, List[str]], name: str) -> Optional[str]:
+    v = query.get(name)
+    return v[0] if v and v[0] != '' else None
+
+
+def _year(query) -> int:
+    try:
+        return int(_q(query, 'year') or DEFAULT_YEAR)
+    except ValueError:
+        return DEFAULT_YEAR
+
+
+def facilities_list(data: ApiData, query) -> Tuple[int, Any]:
+    year = _year(query)
+    ids = data.by_type.get(_q(query, 'type') or 'Hospital', [])
+    for name, idx in (('hsa', data.by_hsa), ('hpa', data.by_hpa)):
+        v = _q(query, name)
+        if v:
+            allowed = set(idx.get(v, ()))
+            ids = [i for i in ids if i in allowed]
+    q = (_q(query, 'q') or '').lower()
+    htype = _q(query, 'hospital_type')
+    out = []
+    for fid in ids:
+        f = data.facilities[fid]
+        if q and q not in f['name'].lower():
+            continue
+        prof = data.profiles.get((fid, year)) or {}
+        if htype and prof.get('hospital_type') != htype:
+            continue
+        out.append({'id': fid, 'name': f['name'], 'hsa': f['hsa'], 'hpa': f['hpa'], 'hospitalType': prof.get('hospital_type')})
+    return 200, out
+
+
+PROFILE_FIELDS = [
+    'hospital_type', 'ms_con', 'icu_con', 'ped_con', 'obgyn_con', 'ltc_con', 'ms_admissions', 'ms_patient_days',
+    'ms_observation_days', 'race_white', 'race_black', 'race_native_american', 'race_asian', 'race_pacific_islander',
+    'race_unknown', 'ethnicity_hispanic', 'ethnicity_non_hispanic', 'ethnicity_unknown',
+]
+
+
+def facility_detail(data: ApiData, fid: str, query) -> Tuple[int, Any]:
+    f = data.facilities.get(fid)
+    if f is None:
+        return 404, {'error': 'Not found'}
+    prof = data.profiles.get((fid, _year(query)))
+    # Same fallback as the Next route: the 2024 table when the by-year row is missing
+    if not prof or (not prof.get('hospital_type') and prof.get('ms_con') is None):
+        prof = data.profiles_2024.get(fid) or prof or {}
+    row = {k: f[k] for k in ('id', 'name', 'county', 'hsa', 'hpa', 'address')}
+    row.update({camel(k): prof.get(k) for k in PROFILE_FIELDS})
+    return 200, row
+
+
+def area_summary(data: ApiData, kind: str, code: str, query) -> Tuple[int, Any]:
+    """hsa_summary_by_year / hpa_summary_by_year shaped rows from the dashboard rollups."""
+    year = _year(query)
+    roll = data.rollup(year, _q(query, 'type') or 'Hospital')
+    area = (roll or {}).get(kind, {}).get(code)
+    if not area:
+        return 404, {'error': 'Not found'}
+    tot = area.get('totals', {})
+    shares = area.get('shares', {})
+    race = (shares.get('race') or {}).get('share', {})
+    eth = (shares.get('eth') or {}).get('share', {})
+    pay = (shares.get('payer') or {}).get('share', {})
+    ids = getattr(data, f'by_{kind}').get(code, [])
+    types = [(data.profiles.get((i, year)) or {}).get('hospital_type') or '' for i in ids]
+
+    def count(label: str) -> Optional[int]:
+        # Payloads without a hospital_type leave the breakdown unknown rather than zero
+        return sum(1 for t in types if label in t.lower()) if any(types) else None
+
+    return 200, {
+        kind: code, 'year': year,
+        'totalHospitals': area.get('facilities'),
+        'criticalAccess': count('critical access'), 'acuteLtc': count('acute ltc'),
+        'general': count('general'), 'psychiatric': count('psychiatric'),
+        'rehabilitation': count('rehabilitation'), 'childrens': count('children'),
+        'msCon': tot.get('ms_beds'), 'icuCon': tot.get('icu_beds'), 'pedCon': tot.get('peds_beds'),
+        'obgynCon': tot.get('obgyn_beds'), 'ltcCon': None,
+        'msAdmissions': tot.get('ms_admissions'), 'msPatientDays': tot.get('ms_days'),
+        'msObservationDays': tot.get('ms_observation_days'),
+        'raceWhite': race.get('white'), 'raceBlack': race.get('black'), 'raceNativeAmerican': race.get('ai_an'),
+        'raceAsian': race.get('asian'), 'racePacificIslander': race.get('nh_pi'), 'raceUnknown': race.get('unknown'),
+        'ethnicityHispanic': eth.get('hispanic'), 'ethnicityNonHispanic': eth.get('non_hispanic'), 'ethnicityUnknown': eth.get('unknown'),
+        'payerMedicare': pay.get('medicare'), 'payerMedicaid': pay.get('medicaid'), 'payerPrivate': pay.get('private_ins'),
+        'payerOtherPublic': pay.get('other_public'), 'payerPrivatePay': pay.get('private_pay'), 'payerCharity': pay.get('charity'),
+    }
+
+
+def map_data(data: ApiData, query) -> Tuple[int, Any]:
+    ftype = _q(query, 'type') or 'Hospital'
+    ids = [i for i in data.by_type.get(ftype, []) if data.facilities[i]['lat'] is not None]
+    try:
+        lat, lng, km = (float(_q(query, k)) for k in ('origin_lat', 'origin_lng', 'max_distance_km'))
+    except (TypeError, ValueError):
+        lat = lng = km = None
+    if km is not None:
+        allowed = {fid for _, fid in data.near(lat, lng, km)}
+        ids = [i for i in ids if i in allowed]
+    for name in ('hsa', 'hpa'):
+        v = _q(query, name)
+        if v:
+            ids = [i for i in ids if data.facilities[i][name] == v]
+    feats = []
+    for fid in ids:
+        f = data.facilities[fid]
+        prof = data.profiles_2024.get(fid) or {}
+        feats.append({'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [f['lng'], f['lat']]},
+                      'properties': {'id': fid, 'name': f['name'], 'hsa': f['hsa'], 'hpa': f['hpa'],
+                                     'msCon': prof.get('ms_con'), 'icuCon': prof.get('icu_con')}})
+    return 200, {'type': 'FeatureCollection', 'features': feats}
+
+
+class ResponseCache:
+    """LRU of encoded responses: key -> (etag, body, gzip body)."""
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        self.max_entries = max_entries
+        self._items: 'OrderedDict[str, Tuple[int, str, bytes, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, status: int, payload: Any):
+        body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        entry = (status, hashlib.sha1(body).hexdigest(), body, gzip.compress(body, compresslevel=6))
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return entry
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    data: ApiData
+    cache: ResponseCache
+    profiles: ProfileCache
+    quiet = False
+
+    def send_body(self, status: int, etag: str, body: bytes, gz: bytes, ctype: str) -> None:
+        use_gzip = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        # The two encodings are different representations, so they get different strong tags
+        tag = f'"{etag}-gz"' if use_gzip else f'"{etag}"'
+        inm = self.headers.get('If-None-Match', '')
+        if status == 200 and (tag in [t.strip() for t in inm.split(',')] or inm.strip() == '*'):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', tag)
+            self.end_headers()
+            return
+        out = gz if use_gzip else body
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(out)))
+        self.send_header('ETag', tag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(out)
+
+    def route(self, path: str, query) -> Tuple[int, Any]:
+        m = ROUTE_RE.match(path)
+        if not m:
+            return 404, {'error': 'Unknown route'}
+        health, facilities, fid, profile, area, code, mapd = m.groups()
+        if health:
+            return 200, {'ok': True, 'facilities': len(self.data.facilities), 'source': 'serve_api.py'}
+        if facilities:
+            return facility_detail(self.data, unquote(fid), query) if fid else facilities_list(self.data, query)
+        if area:
+            return area_summary(self.data, area, unquote(code), query)
+        return map_data(self.data, query)
+
+    def send_profile(self, fid: str, query) -> None:
+        years = self.data.slugs.get(fid) or {}
+        year = _year(query) if _q(query, 'year') else max(years, default=0)
+        if (_q(query, 'format') or 'html').lower() != 'html' or year not in years:
+            status, payload = (400, {'error': 'Only format=html is supported offline'}) if year in years else (404, {'error': 'Not found'})
+            entry = self.cache.put(f'!{fid}?{year}', status, payload)
+            return self.send_body(entry[0], entry[1], entry[2], entry[3], 'application/json')
+        ftype, slug = years[year]
+        sp = ROOT / 'data' / str(year) / ftype / slug / 'schema_payload.json'
+        key, body, gz = render_page(self.profiles, sp)
+        self.send_body(200, key, body, gz, 'text/html; charset=utf-8')
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip('/') or '/'
+        query = parse_qs(parts.query)
+        m = ROUTE_RE.match(path)
+        try:
+            if m and m.group(4):
+                return self.send_profile(unquote(m.group(3)), query)
+            key = path + '?' + '&'.join(f'{k}={v[0]}' for k, v in sorted(query.items()))
+            entry = self.cache.get(key) or self.cache.put(key, *self.route(path, query))
+        except Exception as e:
+            entry = self.cache.put('!error', 500, {'error': str(e)})
+        self.send_body(entry[0], entry[1], entry[2], entry[3], 'application/json')
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def sample_paths(data: ApiData) -> List[str]:
+    """A representative request mix (also used by loadtest_profiles.py --api)."""
+    paths = ['/api/health', '/api/facilities', '/api/facilities?hsa=6', '/api/facilities?q=memorial',
+             '/api/facilities?type=ESRD&year=2023', '/api/map_data', '/api/map_data?hsa=6']
+    paths += [f'/api/hsa/{h}' for h in sorted(data.by_hsa, key=lambda s: (len(s), s))]
+    paths += [f'/api/hpa/{h}' for h in sorted(data.by_hpa)[:20]]
+    for fid in data.by_type.get('Hospital', [])[:50]:
+        paths += [f'/api/facilities/{fid}', f'/api/facilities/{fid}?year=2023']
+    with_coords = [f for f in data.facilities.values() if f['lat'] is not None][:10]
+    paths += [f"/api/map_data?origin_lat={f['lat']}&origin_lng={f['lng']}&max_distance_km=25" for f in with_coords]
+    return paths
+
+
+def self_check(data: ApiData) -> int:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    bad = 0
+    fid = next(iter(data.by_type.get('Hospital', [])), '')
+    checks = sample_paths(data)[:12] + [f'/api/facilities/{fid}/profile', '/api/facilities/nope', '/api/nope']
+    for path in checks:
+        want = 404 if path.endswith('nope') else 200
+        try:
+            req = urllib.request.Request(base + path, headers={'Accept-Encoding': 'gzip'})
+            with urllib.request.urlopen(req) as r:
+                status, etag, enc, raw = r.status, r.headers.get('ETag'), r.headers.get('Content-Encoding'), r.read()
+        except urllib.error.HTTPError as e:
+            status, etag, enc, raw = e.code, e.headers.get('ETag'), e.headers.get('Content-Encoding'), e.read()
+        ok = status == want and etag and enc == 'gzip' and gzip.decompress(raw)
+        if ok and status == 200:
+            try:
+                urllib.request.urlopen(urllib.request.Request(base + path, headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'}))
+                ok = False  # expected 304
+            except urllib.error.HTTPError as e:
+                ok = e.code == 304
+        bad += not ok
+        print(f"  {'ok ' if ok else 'BAD'} {status} {len(raw):7d} B  {path}")
+    server.shutdown()
+    c = ApiHandler.cache
+    print(f"{len(checks)} routes checked, {bad} failed; cache {c.hits} hits / {c.misses} misses")
+    return bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Serve the hfsrb-ui API routes from in-memory data (no database)')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8010)
+    ap.add_argument('--coords', default=str(COORDS_CSV), help='CSV with facility_id,lat,lng')
+    ap.add_argument('--cache-size', type=int, default=2048, help='Maximum number of memoized responses')
+    ap.add_argument('--quiet', action='store_true', help='Suppress per-request logging')
+    ap.add_argument('--check', action='store_true', help='Request every route once on a free port and verify the responses')
+    args = ap.parse_args()
+
+    data = ApiData(Path(args.coords))
+    ApiHandler.data = data
+    ApiHandler.cache = ResponseCache(args.cache_size)
+    ApiHandler.profiles = ProfileCache()
+    ApiHandler.quiet = args.quiet or args.check
+    print(f"Loaded {len(data.facilities)} facilities, {len(data.profiles)} hospital profiles in {data.load_seconds:.2f}s")
+    if args.check:
+        raise SystemExit(1 if self_check(data) else 0)
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"Serving API on http://{args.host}:{args.port}/api/ (try /api/health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        c = ApiHandler.cache
+        print(f"Cache: {c.hits} hits, {c.misses} misses")
+        server.server_close()
+
+
+if __name__ == '__main__':
+    run_main(main)
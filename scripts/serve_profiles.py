@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Serve facility profiles on demand instead of pre-rendering out/profiles.
+
+Requests for /out/profiles/<year>/<type>/<slug>.html are rendered from
+data/<year>/<type>/<slug>/schema_payload.json via render_profiles.render.
+Everything else is served as static files from the repo root, so the
+dashboard (web/dashboard.html) and profile assets (web/brand.css, logos)
+resolve exactly as they do on the published site.
+
+Caching:
+  - Data dictionaries come from data_dictionary's compiled cache, which
+    re-reads a README when its mtime/size changes and recompiles it when
+    its sha1 changes. Metric definitions are reloaded when
+    mappings/metrics.json changes.
+  - Rendered pages live in a bounded LRU keyed by the payload sha1, the
+    dictionary sha1, the metric definitions sha1 and
+    render_profiles.RENDER_VERSION, so edits to any of them are picked up on
+    the next request without restarting.
+  - Responses carry an ETag derived from that key (with a -gz suffix for the
+    gzip body) and honor If-None-Match.
+  - Bodies are gzip-compressed when the client sends Accept-Encoding: gzip.
+
+Detail view packs (web/data/views/*.pack, see build_dashboard_index.py) are
+memory-mapped and answer single-range Range requests with 206, which the
+stock static handler does not support.
+
+Usage:
+  python3 scripts/serve_profiles.py --port 8000 --cache-size 512
+  open http://localhost:8000/web/dashboard.html
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import data_dictionary
+import render_profiles
+from facility_metrics import DEFS_PATH, MetricsCache, fingerprint
+from json_io import loads
+from profiling import run_main
+
+PROFILE_RE = re.compile(r'^/out/profiles/(\d{4})/(Hospital|ESRD|ASTC|LTC)/([A-Za-z0-9._-]+)\.html$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ProfileCache:
+    """Thread-safe LRU of rendered pages plus the metric results they need."""
+
+    def __init__(self, max_pages: int = 512) -> None:
+        self.max_pages = max_pages
+        self._pages: 'OrderedDict[str, Tuple[bytes, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._defs_stamp = _stamp(DEFS_PATH)
+        self.metrics = MetricsCache(render_profiles.metric_defs())
+        self.hits = 0
+        self.misses = 0
+
+    def dictionary(self, schema_spec: Optional[str]) -> Tuple[Dict[str, Dict[str, Any]], str]:
+        """(field metadata, README sha1) for a schema path; ({}, '') when there is no dictionary."""
+        if not schema_spec:
+            return {}, ''
+        compiled = data_dictionary.cache().load(data_dictionary.readme_for_schema(schema_spec))
+        if not compiled:
+            return {}, ''
+        return (compiled['profile'] if compiled['has_fields'] else {}), compiled['sha1']
+
+    def metric_defs_sha(self) -> str:
+        """sha1 of the metric definitions, reloading them first if mappings/metrics.json changed."""
+        with self._lock:
+            stamp = _stamp(DEFS_PATH)
+            if stamp != self._defs_stamp:
+                self.metrics.save()
+                self.metrics = MetricsCache(render_profiles.metric_defs(reload=True))
+                self._defs_stamp = stamp
+            return self.metrics.defs.sha
+
+    def facility_metrics(self, ftype: str, fp: str, payload: Dict[str, Any], type_dir: Path) -> Dict[str, Any]:
+        """Metrics for one payload; a miss evaluates every facility in its (year, type) directory at once."""
+        with self._lock:
+            if f'{ftype}:{fp}' in self.metrics.entries:
+                return self.metrics.compute(ftype, [(fp, payload)])[0]
+        batch = [(fp, payload)]
+        for sp in sorted(type_dir.glob('*/schema_payload.json')):
+            try:
+                raw = sp.read_bytes()
+                batch.append((fingerprint(raw), loads(raw).get('payload', {})))
+            except (OSError, ValueError):
+                continue
+        with self._lock:
+            return self.metrics.compute(ftype, batch)[0]
+
+    def get(self, key: str) -> Optional[Tuple[bytes, bytes]]:
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, body: bytes) -> Tuple[bytes, bytes]:
+        entry = (body, gzip.compress(body, compresslevel=6))
+        with self._lock:
+            self._pages[key] = entry
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return entry
+
+
+class PackMaps:
+    """Read-only mmaps of view packs, reopened when the file changes on disk."""
+
+    def __init__(self) -> None:
+        self._maps: Dict[str, Tuple[Tuple[int, int], mmap.mmap]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> mmap.mmap:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = (stamp, mm)
+            return mm
+
+
+def render_page(cache: ProfileCache, sp: Path) -> Tuple[str, bytes, bytes]:
+    """Return (etag, html_bytes, gzip_bytes) for a schema_payload.json path."""
+    raw = sp.read_bytes()
+    fp = fingerprint(raw)
+    doc = loads(raw)
+    schema_spec = doc.get('schema')
+    dict_meta, dict_sha = cache.dictionary(schema_spec)
+    defs_sha = cache.metric_defs_sha()
+    key = hashlib.sha1(f'{render_profiles.RENDER_VERSION}:{fp}:{dict_sha}:{defs_sha}'.encode()).hexdigest()
+    entry = cache.get(key)
+    if entry is None:
+        meta, payload = doc.get('meta', {}), doc.get('payload', {})
+        metrics = cache.facility_metrics(meta.get('facility_type') or '', fp, payload, sp.parent.parent)
+        html_text = render_profiles.render(
+            meta,
+            payload,
+            dict_meta,
+            render_profiles._schema_name_from_path(schema_spec),
+            metrics=metrics,
+        )
+        entry = cache.put(key, html_text.encode('utf-8'))
+    return key, entry[0], entry[1]
+
+
+class ProfileHandler(SimpleHTTPRequestHandler):
+    cache: ProfileCache
+    packs = PackMaps()
+    quiet = False
+
+    def send_pack_range(self, path: str) -> bool:
+        """Serve a byte range of a .pack file from its mmap; False to fall back to a full GET."""
+        m = RANGE_RE.match((self.headers.get('Range') or '').strip())
+        fs_path = self.translate_path(path)
+        if not m or not os.path.isfile(fs_path):
+            return False
+        mm = self.packs.get(fs_path)
+        size = len(mm)
+        start_s, end_s = m.groups()
+        if start_s:
+            start, end = int(start_s), min(int(end_s) if end_s else size - 1, size - 1)
+        elif end_s:
+            start, end = max(0, size - int(end_s)), size - 1
+        else:
+            return False
+        if start > end or start >= size:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.end_headers()
+            return True
+        body = mm[start:end + 1]
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+        path = self.path.split('?', 1)[0].split('#', 1)[0]
+        if path.endswith('.pack') and self.headers.get('Range') and self.send_pack_range(path):
+            return
+        m = PROFILE_RE.match(path)
+        if not m:
+            return super().do_GET()
+        year, ftype, slug = m.groups()
+        sp = render_profiles.BASE_DATA / year / ftype / slug / 'schema_payload.json'
+        if not sp.exists():
+            self.send_error(HTTPStatus.NOT_FOUND, f'No payload for {year}/{ftype}/{slug}')
+            return
+        try:
+            key, body, gz = render_page(self.cache, sp)
+        except Exception as e:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f'Render failed: {e}')
+            return
+        use_gzip = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        # The two encodings are different representations, so they get different strong tags
+        etag = f'"{key}-gz"' if use_gzip else f'"{key}"'
+        inm = self.headers.get('If-None-Match', '')
+        if etag in [t.strip() for t in inm.split(',')] or inm.strip() == '*':
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        out = gz if use_gzip else body
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(out)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Render facility profiles on request with an in-memory LRU cache')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8000)
+    ap.add_argument('--cache-size', type=int, default=512, help='Maximum number of rendered pages kept in memory')
+    ap.add_argument('--quiet', action='store_true', help='Suppress per-request logging')
+    args = ap.parse_args()
+
+    ProfileHandler.cache = ProfileCache(max_pages=args.cache_size)
+    ProfileHandler.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), ProfileHandler)
+    print(f"Serving profiles on http://{args.host}:{args.port}/ (dashboard: /web/dashboard.html)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        c = ProfileHandler.cache
+        print(f"Cache: {len(c._pages)} pages, {c.hits} hits, {c.misses} misses")
+        c.metrics.save()
+        data_dictionary.cache().save()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    run_main(main)
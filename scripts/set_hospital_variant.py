@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
 import re
 from pathlib import Path
 from typing import Optional
 
+from json_io import read_json, write_json
+from profiling import run_main
+
 
 def parse_int(val: str) -> Optional[int]:
     if val is None:
@@ -43,14 +45,14 @@ def process_year(path: Path) -> int:
         f = d / 'data.json'
         if not f.exists():
             continue
-        data = json.loads(f.read_text(encoding='utf-8'))
+        data = read_json(f)
         fields = data.get('fields', {})
         beds = beds_from_fields(fields)
         variant = 'ahq-long' if (beds is not None and beds >= 100) else 'ahq-short'
         data.setdefault('meta', {})['ahq_variant'] = variant
         if beds is not None:
             data['meta']['beds_10_1_23'] = beds
-        f.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding='utf-8')
+        write_json(f, data)
         count += 1
     return count
 
@@ -67,5 +69,5 @@ def main() -> None:
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
-import json
 import re
 from pathlib import Path
 
+from json_io import read_json, write_json
+from profiling import run_main
+
 BASE = Path('data/2023/LTC')
 
 
@@ -47,18 +49,18 @@ def main():
         f = d / 'data.json'
         if not f.exists():
             continue
-        doc = json.loads(f.read_text(encoding='utf-8'))
+        doc = read_json(f)
         fields = doc.get('fields', {})
         meta = doc.get('meta', {})
         variant = detect_variant(fields)
         if meta.get('ltc_variant') != variant:
             meta['ltc_variant'] = variant
             doc['meta'] = meta
-            f.write_text(json.dumps(doc, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+            write_json(f, doc)
             tagged += 1
     print(f"Tagged {tagged} LTC facilities with ltc_variant")
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
@@ -21,6 +21,8 @@ import re
 from pathlib import Path
 from typing import Dict, Iterable, Optional, Tuple
 
+from profiling import run_main
+
 BASE = Path('data')
 YEARS = list(range(2008, 2025))
 FACILITY_TYPES = ['ASTC', 'ESRD', 'LTC', 'Hospital']
@@ -135,5 +137,5 @@ def main() -> None:
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
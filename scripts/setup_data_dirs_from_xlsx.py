@@ -23,6 +23,8 @@ from typing import Dict, Iterable, List, Optional, Tuple
 from zipfile import ZipFile
 import xml.etree.ElementTree as ET
 
+from profiling import run_main
+
 BASE = Path('data')
 
 
@@ -189,5 +191,5 @@ def main() -> None:
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
 
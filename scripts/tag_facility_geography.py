@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tag facilities with county, HSA, HPA and Chicago community area from their
+coordinates, using the boundary polygons rather than free-text fields.
+
+Inputs:
+- Coordinates: meta.lat/meta.lng when present, otherwise
+  references/facility_coordinates.csv (facility_id,lat,lng — e.g. exported from
+  the hfsrb-ui facility table after scripts/geocode_facilities.ts)
+- hfsrb-ui/public/geo/{counties.il,hsa,hpa,chicago_community_areas}.geojson
+
+A uniform grid over each layer maps cells to the polygons whose bounding box
+overlaps them, so a point is only tested (even-odd ray casting, holes included)
+against those candidates. All facilities are located in one batch per layer,
+grouped by grid cell. When polygons overlap, the smallest one wins, so a
+community-area HPA inside Chicago takes precedence over Cook County's.
+
+Writes meta.geo = {lat, lng, county, hsa, hpa, community_area} into each
+facility's data.json and schema_payload.json. Every key is always present; a
+tag is null when the point is outside every polygon of its layer or when the
+layer file is missing (the run prints "Skipping <tag>" for those).
+
+Usage:
+  python3 scripts/tag_facility_geography.py                 # tag all years/types
+  python3 scripts/tag_facility_geography.py --year 2024 --type Hospital
+  python3 scripts/tag_facility_geography.py --check         # self-test the index on county interior points
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_geo_levels import GEO, geometry_polygons, load_geojson
+from json_io import read_json, write_json
+from profiling import run_main
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / 'data'
+COORDS_CSV = ROOT / 'references' / 'facility_coordinates.csv'
+
+# tag -> (layer file, property holding the value)
+LAYERS = {
+    'county': ('counties.il.geojson', 'name'),
+    'hsa': ('hsa.geojson', 'HSA'),
+    'hpa': ('hpa.geojson', 'HPA'),
+    'community_area': ('chicago_community_areas.geojson', 'community'),
+}
+
+Point = Tuple[float, float]
+
+
+def _ring_area(r: List[Point]) -> float:
+    return abs(sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(r, r[1:]))) / 2.0
+
+
+def _in_rings(pt: Point, rings: List[List[Point]]) -> bool:
+    """Even-odd rule over all rings of a polygon, so holes are excluded."""
+    x, y = pt
+    inside = False
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+class GridIndex:
+    """Bounding-box grid over polygons: cell -> ids of polygons whose bbox overlaps it."""
+
+    def __init__(self, polygons: List[List[List[Point]]], values: List[str], cell: float = 0.1) -> None:
+        self.cell = cell
+        self.polys = polygons
+        self.values = values
+        self.bboxes = []
+        self.areas = []
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, rings in enumerate(polygons):
+            xs = [p[0] for p in rings[0]]
+            ys = [p[1] for p in rings[0]]
+            bb = (min(xs), min(ys), max(xs), max(ys))
+            self.bboxes.append(bb)
+            self.areas.append(_ring_area(rings[0]) - sum(_ring_area(h) for h in rings[1:]))
+            for gx in range(int(bb[0] // cell), int(bb[2] // cell) + 1):
+                for gy in range(int(bb[1] // cell), int(bb[3] // cell) + 1):
+                    self.grid[(gx, gy)].append(i)
+
+    @classmethod
+    def from_geojson(cls, doc: dict, prop: str, cell: float = 0.1) -> 'GridIndex':
+        polys, values = [], []
+        for f in doc.get('features', []):
+            props = f.get('properties') or {}
+            val = props.get(prop)
+            if val is None:
+                # Community-area files name the property differently across exports
+                val = next((v for k, v in props.items() if 'name' in k.lower() or k.lower() == 'community'), None)
+            for rings in geometry_polygons(f.get('geometry')):
+                polys.append(rings)
+                values.append(str(val) if val is not None else '')
+        return cls(polys, values, cell)
+
+    def locate_many(self, points: List[Point]) -> List[Optional[str]]:
+        """Value of the smallest polygon containing each point (None outside every polygon)."""
+        by_cell: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, (x, y) in enumerate(points):
+            by_cell[(int(x // self.cell), int(y // self.cell))].append(i)
+        out: List[Optional[str]] = [None] * len(points)
+        self.tests = 0
+        for cell, idxs in by_cell.items():
+            cands = self.grid.get(cell, ())
+            for i in idxs:
+                x, y = points[i]
+                best = None
+                for c in cands:
+                    bb = self.bboxes[c]
+                    if not (bb[0] <= x <= bb[2] and bb[1] <= y <= bb[3]):
+                        continue
+                    self.tests += 1
+                    if _in_rings((x, y), self.polys[c]) and (best is None or self.areas[c] < self.areas[best]):
+                        best = c
+                out[i] = self.values[best] if best is not None else None
+        return out
+
+
+def load_indexes(geo_dir: Path) -> Dict[str, GridIndex]:
+    indexes = {}
+    for tag, (fname, prop) in LAYERS.items():
+        doc = load_geojson(geo_dir / fname)
+        if doc is None:
+            print(f"Skipping {tag}: {geo_dir / fname} missing or not GeoJSON")
+            continue
+        indexes[tag] = GridIndex.from_geojson(doc, prop)
+    return indexes
+
+
+def _num(v) -> Optional[float]:
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    return x if x == x else None
+
+
+def load_coords(path: Path) -> Dict[str, Point]:
+    """facility_id (normalized) -> (lng, lat)."""
+    out: Dict[str, Point] = {}
+    if not path.exists():
+        return out
+    with path.open('r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            fid = (row.get('facility_id') or row.get('id') or '').strip()
+            lat, lng = _num(row.get('lat')), _num(row.get('lng') or row.get('lon'))
+            if fid and lat is not None and lng is not None:
+                out[fid] = (lng, lat)
+    return out
+
+
+def facility_location(meta: dict, coords: Dict[str, Point]) -> Optional[Point]:
+    """(lng, lat) from meta.lat/meta.lng, the coordinates CSV, or a previous meta.geo tag."""
+    lat, lng = _num(meta.get('lat')), _num(meta.get('lng'))
+    if lat is not None and lng is not None:
+        return (lng, lat)
+    pt = coords.get(str(meta.get('facility_id_normalized') or ''))
+    if pt is not None:
+        return pt
+    geo = meta.get('geo') or {}
+    lat, lng = _num(geo.get('lat')), _num(geo.get('lng'))
+    return (lng, lat) if lat is not None and lng is not None else None
+
+
+def interior_point(rings: List[List[Point]]) -> Point:
+    """A point strictly inside a polygon: middle of the widest span on the horizontal line through its bbox centre."""
+    ys = [p[1] for p in rings[0]]
+    y = (min(ys) + max(ys)) / 2.0 + 1e-9
+    xs = sorted(x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+                for ring in rings for (x1, y1), (x2, y2) in zip(ring, ring[1:]) if (y1 > y) != (y2 > y))
+    spans = [(xs[i + 1] - xs[i], (xs[i] + xs[i + 1]) / 2.0) for i in range(0, len(xs) - 1, 2)]
+    return (max(spans)[1], y)
+
+
+def self_check(indexes: Dict[str, GridIndex]) -> int:
+    idx = indexes.get('county')
+    if idx is None:
+        raise SystemExit('No county layer to check against')
+    pts = [interior_point(rings) for rings in idx.polys]
+    t0 = time.perf_counter()
+    got = idx.locate_many(pts)
+    dt = time.perf_counter() - t0
+    bad = sum(1 for g, want in zip(got, idx.values) if g != want)
+    brute = len(pts) * len(idx.polys)
+    print(f"County index: {len(idx.polys)} polygons, {len(idx.grid)} grid cells; {len(pts)} interior points "
+          f"located in {dt * 1000:.1f} ms with {idx.tests} polygon tests (brute force: {brute}); {bad} wrong")
+    # The same points must land in the HSA/HPA each county is mapped to
+    for tag in ('hsa', 'hpa'):
+        path = ROOT / 'references' / f'{tag}_county_map.csv'
+        if tag not in indexes or not path.exists():
+            continue
+        with path.open('r', encoding='utf-8') as f:
+            want = {(r.get('county') or '').strip().lower(): (r.get(tag) or '').strip() for r in csv.DictReader(f)}
+        codes = indexes[tag].locate_many(pts)
+        pairs = [(code, want[name.lower()]) for name, code in zip(idx.values, codes) if want.get(name.lower())]
+        wrong = sum(1 for a, b in pairs if a != b)
+        print(f"{tag.upper()} index: {len(pairs)} mapped counties, {wrong} disagree with {path.name}")
+        bad += wrong
+    return bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='Assign county/HSA/HPA/community area to facilities by point-in-polygon')
+    ap.add_argument('--year', type=int)
+    ap.add_argument('--type', choices=['Hospital', 'ASTC', 'ESRD', 'LTC'])
+    ap.add_argument('--coords', default=str(COORDS_CSV), help='CSV with facility_id,lat,lng')
+    ap.add_argument('--geo-dir', default=str(GEO))
+    ap.add_argument('--check', action='store_true', help='Locate an interior point of every county and verify the result')
+    args = ap.parse_args()
+
+    indexes = load_indexes(Path(args.geo_dir))
+    if args.check:
+        raise SystemExit(1 if self_check(indexes) else 0)
+
+    coords = load_coords(Path(args.coords))
+    targets = []  # (facility dir, (lng, lat))
+    missing = 0
+    for year_dir in sorted(p for p in DATA.iterdir() if p.is_dir() and p.name.isdigit()):
+        if args.year and year_dir.name != str(args.year):
+            continue
+        for type_dir in sorted(p for p in year_dir.iterdir() if p.is_dir()):
+            if args.type and type_dir.name != args.type:
+                continue
+            for fac_dir in sorted(p for p in type_dir.iterdir() if p.is_dir()):
+                dp = fac_dir / 'data.json'
+                if not dp.exists():
+                    continue
+                meta = read_json(dp).get('meta', {})
+                pt = facility_location(meta, coords)
+                if pt is None:
+                    missing += 1
+                    continue
+                targets.append((fac_dir, pt))
+
+    points = [pt for _, pt in targets]
+    tags = {tag: idx.locate_many(points) for tag, idx in indexes.items()}
+    written = 0
+    for i, (fac_dir, (lng, lat)) in enumerate(targets):
+        geo = {'lat': lat, 'lng': lng, **{tag: tags[tag][i] if tag in tags else None for tag in LAYERS}}
+        for name in ('data.json', 'schema_payload.json'):
+            path = fac_dir / name
+            if not path.exists():
+                continue
+            doc = read_json(path)
+            if doc.get('meta', {}).get('geo') == geo:
+                continue
+            doc.setdefault('meta', {})['geo'] = geo
+            write_json(path, doc)
+            written += 1
+    located = {tag: sum(1 for v in vals if v) for tag, vals in tags.items()}
+    print(f"Tagged {len(targets)} facilities with coordinates ({missing} without): "
+          + ', '.join(f"{tag} {n}" for tag, n in located.items()) + f"; {written} files updated")
+
+
+if __name__ == '__main__':
+    run_main(main)
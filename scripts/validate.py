@@ -1,7 +1,31 @@
 #!/usr/bin/env python3
+"""
+Validate JSON data against the generated schemas.
+
+Single file:
+  python3 scripts/validate.py astc samples/astc.json
+
+Batch mode over whole trees (every */schema_payload.json below each path):
+  python3 scripts/validate.py --tree data/2023/ESRD
+  python3 scripts/validate.py --tree data --strict --max-errors 0
+
+Batch mode resolves each payload's schema from its "schema" field (--strict
+swaps schemas/json_ingestion for schemas/json), builds one validator per
+schema in each worker process, and collects every error with iter_errors
+rather than stopping at the first. Reports aggregated by schema, field and
+error kind go to out/validation/report.json and report.csv. The exit status
+is 1 when the error count exceeds --max-errors (default 0), so it can gate a build.
+"""
 import argparse
-import json
+import csv
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from json_io import read_json, write_json
+from profiling import run_main
 
 try:
     import jsonschema
@@ -10,26 +34,154 @@ except Exception as e:
     raise
 
 SCHEMAS_JSON_DIR = Path('schemas/json')
+REPORT_DIR = Path('out/validation')
+MAX_EXAMPLES = 3
 
 def load_schema(name: str):
     path = SCHEMAS_JSON_DIR / f"{name}.schema.json"
     if not path.exists():
         raise SystemExit(f"Schema not found: {path}")
-    return json.loads(path.read_text(encoding='utf-8'))
+    return read_json(path)
+
+# --- Batch mode ---
+
+_validators: Dict[str, Any] = {}
+
+def _validator(schema_path: str):
+    """One compiled validator per schema and worker process."""
+    v = _validators.get(schema_path)
+    if v is None:
+        schema = read_json(Path(schema_path))
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        v = _validators[schema_path] = cls(schema)
+    return v
+
+def _field(err) -> str:
+    if err.absolute_path:
+        return str(err.absolute_path[0])
+    if err.validator == 'required':
+        # "'fein' is a required property"
+        return err.message.split("'")[1] if err.message.count("'") >= 2 else ''
+    return ''
+
+def check_file(task: Tuple[str, bool]) -> Dict[str, Any]:
+    path, strict = task
+    try:
+        doc = read_json(Path(path))
+    except Exception as e:
+        return {'file': path, 'schema': '', 'errors': [{'field': '', 'kind': 'unreadable', 'message': str(e)}]}
+    schema_path = str(doc.get('schema') or '')
+    if strict:
+        schema_path = schema_path.replace('schemas/json_ingestion/', 'schemas/json/')
+    if not schema_path or not Path(schema_path).exists():
+        return {'file': path, 'schema': schema_path, 'errors': [{'field': '', 'kind': 'schema_missing', 'message': f'schema not found: {schema_path!r}'}]}
+    errors = []
+    for err in _validator(schema_path).iter_errors(doc.get('payload', {})):
+        errors.append({
+            'field': _field(err),
+            'kind': str(err.validator),
+            'path': '/'.join(str(p) for p in err.absolute_path),
+            'message': err.message[:300],
+        })
+    return {'file': path, 'schema': schema_path, 'errors': errors}
+
+def collect(trees: List[str]) -> List[str]:
+    files: List[str] = []
+    for t in trees:
+        p = Path(t)
+        if p.is_file():
+            files.append(str(p))
+        else:
+            files.extend(str(x) for x in sorted(p.rglob('schema_payload.json')))
+    return files
+
+def aggregate(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    groups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    per_schema = defaultdict(Counter)
+    invalid = 0
+    for r in results:
+        if r['errors']:
+            invalid += 1
+        per_schema[r['schema']]['files'] += 1
+        per_schema[r['schema']]['invalid'] += bool(r['errors'])
+        seen = set()
+        for e in r['errors']:
+            key = (r['schema'], e['field'], e['kind'])
+            g = groups.setdefault(key, {'schema': key[0], 'field': key[1], 'kind': key[2], 'errors': 0, 'files': 0, 'examples': []})
+            g['errors'] += 1
+            per_schema[r['schema']]['errors'] += 1
+            if key not in seen:
+                seen.add(key)
+                g['files'] += 1
+                if len(g['examples']) < MAX_EXAMPLES:
+                    g['examples'].append({'file': r['file'], 'message': e['message']})
+    by_field = sorted(groups.values(), key=lambda g: (-g['errors'], g['schema'], g['field'], g['kind']))
+    return {
+        'files': len(results),
+        'invalid': invalid,
+        'errors': sum(g['errors'] for g in by_field),
+        'by_schema': {k: dict(v) for k, v in sorted(per_schema.items())},
+        'by_kind': dict(Counter(e['kind'] for r in results for e in r['errors']).most_common()),
+        'by_field': by_field,
+        'invalid_files': {r['file']: r['errors'] for r in results if r['errors']},
+    }
+
+def write_reports(report: Dict[str, Any], out_dir: Path) -> Tuple[Path, Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jpath = out_dir / 'report.json'
+    write_json(jpath, report)
+    cpath = out_dir / 'report.csv'
+    with cpath.open('w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['schema', 'field', 'kind', 'errors', 'files', 'example_file', 'example_message'])
+        for g in report['by_field']:
+            ex = g['examples'][0] if g['examples'] else {'file': '', 'message': ''}
+            w.writerow([g['schema'], g['field'], g['kind'], g['errors'], g['files'], ex['file'], ex['message']])
+    return jpath, cpath
+
+def run_batch(args) -> int:
+    files = collect(args.tree)
+    if not files:
+        raise SystemExit(f"No schema_payload.json files under {', '.join(args.tree)}")
+    tasks = [(f, args.strict) for f in files]
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(check_file, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        results = [check_file(t) for t in tasks]
+    report = aggregate(results)
+    jpath, cpath = write_reports(report, Path(args.report_dir))
+    print(f"Validated {report['files']} payloads: {report['invalid']} invalid, {report['errors']} errors "
+          f"({len(report['by_field'])} field/kind groups)")
+    for g in report['by_field'][:10]:
+        print(f"  {g['errors']:6d}  {Path(g['schema']).name}  {g['field'] or '-'}  {g['kind']}  ({g['files']} files)")
+    print(f"Reports: {jpath}, {cpath}")
+    return 1 if report['errors'] > args.max_errors else 0
 
 def main():
     ap = argparse.ArgumentParser(description='Validate JSON data against a generated schema')
-    ap.add_argument('schema', help='Schema name (folder name under schemas/, e.g., astc, esrd, ahq-short, ltc2, ltc-1)')
-    ap.add_argument('data', help='Path to JSON data file to validate')
+    ap.add_argument('schema', nargs='?', help='Schema name (folder name under schemas/, e.g., astc, esrd, ahq-short, ltc2, ltc-1)')
+    ap.add_argument('data', nargs='?', help='Path to JSON data file to validate')
+    ap.add_argument('--tree', action='append', help='Batch mode: validate every schema_payload.json under this path (repeatable)')
+    ap.add_argument('--strict', action='store_true', help='Batch mode: use schemas/json instead of the recorded ingestion schema')
+    ap.add_argument('--workers', type=int, default=0, help='Batch mode: worker processes (default: CPU count)')
+    ap.add_argument('--report-dir', default=str(REPORT_DIR), help='Batch mode: where report.json/report.csv go')
+    ap.add_argument('--max-errors', type=int, default=0, help='Batch mode: exit 1 when more errors than this are found')
     args = ap.parse_args()
 
+    if args.tree:
+        raise SystemExit(run_batch(args))
+    if not args.schema or not args.data:
+        ap.error('schema and data are required unless --tree is given')
+
     schema = load_schema(args.schema)
     data_path = Path(args.data)
-    data = json.loads(data_path.read_text(encoding='utf-8'))
+    data = read_json(data_path)
 
     jsonschema.validate(instance=data, schema=schema)
     print(f"Valid: {data_path} against {args.schema}")
 
 if __name__ == '__main__':
-    main()
-
+    run_main(main)
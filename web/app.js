@@ -35,10 +35,14 @@ function setParams(params) {
 const IS_WEB_SUBDIR = window.location.pathname.includes('/web/');
 
 async function loadIndex() {
-  // Load index
-  const res = await fetch('data/index.json?v=2');
-  state.all = await res.json();
-  try { const u = new URL(window.location.href); if (u.searchParams.get('debug')==='events') console.log('[DBG] Index loaded', state.all.length); } catch {}
+  // Load the shard manifest; rows are fetched per (year, type) in applyFilters.
+  // Fall back to the monolithic index.json when shards were not built.
+  state.manifest = (typeof IndexShards !== 'undefined') ? await IndexShards.loadManifest('data/') : null;
+  if (!state.manifest) {
+    const res = await fetch('data/index.json');
+    state.all = await res.json();
+  }
+  try { const u = new URL(window.location.href); if (u.searchParams.get('debug')==='events') console.log('[DBG] Index loaded', state.manifest ? (state.manifest.shards.length + ' shards') : state.all.length); } catch {}
   // Set version/build info, prefer build.json if present
   try {
     const vEl = document.getElementById('appVersion');
@@ -46,7 +50,7 @@ async function loadIndex() {
     if (vEl) vEl.textContent = APP_VERSION;
     if (bEl) bEl.textContent = 'Build ' + APP_VERSION;
     try {
-      const br = await fetch('build.json?_=' + Date.now());
+      const br = await fetch('build.json', { cache: 'no-cache' });
       if (br.ok) {
         const info = await br.json();
         const tag = (info.version || APP_VERSION);
@@ -82,16 +86,17 @@ async function loadIndex() {
   } catch {}
 
   // Year options
-  const years = [...new Set(state.all.map(r => r.year))].sort((a, b) => b - a);
+  const years = state.manifest ? state.manifest.years.slice() : [...new Set(state.all.map(r => r.year))].sort((a, b) => b - a);
   const ysel = el('#year');
   ysel.innerHTML = ['<option value="">All Years</option>']
     .concat(years.map(y => `<option>${y}</option>`))
     .join('');
 
   // County and Region (HSA) options
-  const counties = [...new Set(state.all.map(r => r.county).filter(Boolean))]
+  const facets = state.manifest ? state.manifest.facets : null;
+  const counties = (facets ? facets.county.slice() : [...new Set(state.all.map(r => r.county).filter(Boolean))])
     .sort((a, b) => a.localeCompare(b));
-  const regions = [...new Set(state.all.map(r => String(r.region || '')).filter(Boolean))]
+  const regions = (facets ? facets.region.slice() : [...new Set(state.all.map(r => String(r.region || '')).filter(Boolean))])
     .sort((a, b) => a.localeCompare(b));
   el('#county').innerHTML = ['<option value="">All Counties</option>']
     .concat(counties.map(c => `<option>${c}</option>`))
@@ -118,7 +123,7 @@ async function loadIndex() {
     dbgToggle.checked = (u0.searchParams.get('debug') === 'events');
   }
 
-  applyFilters();
+  await applyFilters();
 
   const p2 = getParams();
   if (p2.slug && p2.year && p2.type) {
@@ -126,7 +131,7 @@ async function loadIndex() {
   }
 }
 
-function applyFilters() {
+async function applyFilters() {
 const year = el('#year').value;
 const type = el('#type').value;
 const county = el('#county').value;
@@ -134,6 +139,17 @@ const region = el('#region').value;
 const q = el('#q').value.trim().toLowerCase();
 try { const u = new URL(window.location.href); if (u.searchParams.get('debug')==='events') console.log('[DBG] applyFilters start', {year,type,county,region,q}); } catch {}
 
+// Fetch only the shards the year/type filters need; ignore results superseded by a newer call.
+// Free text goes through the prebuilt search index when the manifest has one.
+let hits = null;
+if (state.manifest) {
+  const seq = state.filterSeq = (state.filterSeq || 0) + 1;
+  const loaded = await IndexShards.load(state.manifest, { year, type }, 'data/');
+  if (q && state.manifest.search) hits = new Set(await IndexShards.search(state.manifest, { year, type }, q, 'data/'));
+  if (seq !== state.filterSeq) return;
+  state.all = loaded;
+}
+
 let rows = state.all.slice();
 if (year) rows = rows.filter(r => String(r.year) ===
 String(year));
@@ -142,7 +158,8 @@ if (county) rows = rows.filter(r => (r.county || '')
 === county);
 if (region) rows = rows.filter(r => String(r.region ||
 '') === String(region));
-if (q) rows = rows.filter(r => (r.name
+if (q && hits) rows = rows.filter(r => hits.has(r));
+else if (q) rows = rows.filter(r => (r.name
 + ' ' + (r.city || '') + ' ' + (r.zip ||
 '')).toLowerCase().includes(q));
 
@@ -181,16 +198,21 @@ const rec = state.filtered.find(r => r.year == data.year
 && r.type == data.type && r.slug == data.slug);
 if (!rec) return;
 
+// Prefer the packed view (one Range read + cached per-schema display metadata)
+let doc = null;
+let schemaProps = {};
+if (state.manifest && state.manifest.views) {
+  try { doc = await IndexShards.view(state.manifest, rec, 'data/'); } catch { doc = null; }
+  if (doc) schemaProps = doc.props || {};
+}
+if (!doc) {
 const res = await fetch(IS_WEB_SUBDIR ? ('../' + rec.data_path) : rec.data_path);
-const doc = await res.json();
-const meta = doc.meta || {};
-const p = doc.payload || {};
+doc = await res.json();
 const schemaSpec = doc.schema || ''; // e.g., "schemas/json/ahq-short.schema.json"
 // Prefer filename so we can fetch from /schemas/json/
   const schemaFile = schemaSpec.split('/').pop();
 
 // Preload schema properties for CSV/export and field rendering
-let schemaProps = {};
 try {
   if (schemaFile) {
     const schemaURL = `${IS_WEB_SUBDIR ? '../' : ''}schemas/json/${schemaFile}`;
@@ -201,6 +223,9 @@ try {
     }
   }
 } catch {}
+}
+const meta = doc.meta || {};
+const p = doc.payload || {};
 
 const d = el('#detail'); d.hidden = false;
 
@@ -311,8 +336,8 @@ function renderFullscreenBar(ctx) {
   // Inline Year/Type filters (mirror left controls)
   const curYearVal = (el('#year') && el('#year').value) || '';
   const curTypeVal = (el('#type') && el('#type').value) || '';
-  const years = [...new Set((state.all || []).map(r => r.year))].filter(Boolean).sort((a,b)=>b-a);
-  const types = [...new Set((state.all || []).map(r => r.type))].filter(Boolean).sort();
+  const years = state.manifest ? state.manifest.years.slice() : [...new Set((state.all || []).map(r => r.year))].filter(Boolean).sort((a,b)=>b-a);
+  const types = state.manifest ? state.manifest.types.slice() : [...new Set((state.all || []).map(r => r.type))].filter(Boolean).sort();
   const yOpts = [`<option value="">All Years</option>`].concat(years.map(y => `<option ${String(curYearVal)===String(y)?'selected':''}>${y}</option>`)).join('');
   const tOpts = [`<option value="">All Types</option>`].concat(types.map(t => `<option ${String(curTypeVal)===String(t)?'selected':''}>${t}</option>`)).join('');
   html.push(`<label style="font-size:12px">Year <select id="fs-year">${yOpts}</select></label>`);
@@ -362,15 +387,15 @@ function renderFullscreenBar(ctx) {
   const next = el('#fs-next'); if (next) next.addEventListener('click', () => { const i = (pick?parseInt(pick.value,10):idx) + 1; if (i<(state.filtered||[]).length) openAt(i); });
 
   // Inline filter handlers
-  const fy = el('#fs-year'); if (fy) fy.addEventListener('change', () => {
+  const fy = el('#fs-year'); if (fy) fy.addEventListener('change', async () => {
     const main = el('#year'); if (main) main.value = fy.value;
-    applyFilters();
+    await applyFilters();
     const curIdx = (state.filtered || []).findIndex(r => String(r.slug)===String(slug) && String(r.type)===String(type) && String(r.year)===String(year));
     if (curIdx === -1) openAt(0); else renderFullscreenBar({ ...ctx, year: fy.value });
   });
-  const ft = el('#fs-type'); if (ft) ft.addEventListener('change', () => {
+  const ft = el('#fs-type'); if (ft) ft.addEventListener('change', async () => {
     const main = el('#type'); if (main) main.value = ft.value;
-    applyFilters();
+    await applyFilters();
     const curIdx = (state.filtered || []).findIndex(r => String(r.slug)===String(slug) && String(r.type)===String(type) && String(r.year)===String(year));
     if (curIdx === -1) openAt(0); else renderFullscreenBar({ ...ctx, type: ft.value });
   });
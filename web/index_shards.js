@@ -0,0 +1,192 @@
+// Sharded columnar facility index (built by scripts/build_dashboard_index.py).
+// Loads data/index/manifest.json, then only the (year, type) shards a filter needs,
+// decoding each shard back into the row objects the dashboard already uses.
+// search() answers free-text queries from the per-year trigram index by
+// intersecting sorted posting lists instead of scanning every row.
+const IndexShards = (() => {
+  const cache = new Map();
+
+  async function loadManifest(base = 'data/') {
+    try {
+      const res = await fetch(base + 'index/manifest.json', { cache: 'no-cache' });
+      if (!res.ok) return null;
+      const m = await res.json();
+      return (m && Array.isArray(m.shards)) ? m : null;
+    } catch { return null; }
+  }
+
+  function decode(doc) {
+    const n = doc.n || 0;
+    const cols = doc.cols || {};
+    const dict = doc.dict || {};
+    const metrics = doc.metrics || {};
+    const mnames = Object.keys(metrics);
+    const rows = new Array(n);
+    for (let i = 0; i < n; i++) {
+      const r = { year: doc.year, type: doc.type };
+      for (const f in cols) {
+        const v = cols[f][i];
+        r[f] = dict[f] ? dict[f][v] : v;
+      }
+      r.data_path = (doc.base || '') + r.slug + '/schema_payload.json';
+      const m = {};
+      for (const k of mnames) { const v = metrics[k][i]; if (v !== null && v !== undefined) m[k] = v; }
+      r.metrics = m;
+      rows[i] = r;
+    }
+    return rows;
+  }
+
+  function select(manifest, filters = {}) {
+    const y = filters.year ? String(filters.year) : '';
+    const t = filters.type || '';
+    return manifest.shards.filter(s => (!y || String(s.year) === y) && (!t || s.type === t));
+  }
+
+  async function loadShard(shard, base = 'data/') {
+    const key = shard.path + '#' + shard.sha256;
+    if (!cache.has(key)) {
+      // The content hash doubles as a cache buster for the immutable shard file
+      const url = base + shard.path + '?h=' + String(shard.sha256 || '').slice(0, 12);
+      cache.set(key, fetch(url).then(r => r.json()).then(decode).catch(e => { cache.delete(key); throw e; }));
+    }
+    return cache.get(key);
+  }
+
+  // Rows for every shard matching { year, type }; empty filters load everything.
+  async function load(manifest, filters = {}, base = 'data/') {
+    const parts = await Promise.all(select(manifest, filters).map(s => loadShard(s, base)));
+    return [].concat(...parts);
+  }
+
+  // --- Search: trigram/prefix postings per year (same tokenizer as build_dashboard_index.py) ---
+  const SEARCH_FIELDS = ['name', 'city', 'county', 'zip', 'fid'];
+
+  function tokens(text) {
+    return String(text || '').toLowerCase().replace(/[^a-z0-9]+/g, ' ').split(' ').filter(Boolean);
+  }
+
+  // Short tokens match as prefixes, longer ones as substrings (all of their trigrams)
+  function queryKeys(tok) {
+    if (tok.length < 3) return ['^' + tok];
+    const out = [];
+    for (let i = 0; i + 3 <= tok.length; i++) out.push(tok.slice(i, i + 3));
+    return out;
+  }
+
+  function tokenMatches(row, tok) {
+    for (const f of SEARCH_FIELDS) {
+      for (const t of tokens(row[f])) {
+        if (tok.length < 3 ? t.startsWith(tok) : t.includes(tok)) return true;
+      }
+    }
+    return false;
+  }
+
+  // Immutable JSON file keyed by its manifest hash, fetched once
+  function loadJSON(path, sha, base, map = x => x) {
+    const key = path + '#' + sha;
+    if (!cache.has(key)) {
+      const url = base + path + '?h=' + String(sha || '').slice(0, 12);
+      cache.set(key, fetch(url).then(r => { if (!r.ok) throw new Error(url + ': ' + r.status); return r.json(); })
+        .then(map).catch(e => { cache.delete(key); throw e; }));
+    }
+    return cache.get(key);
+  }
+
+  function loadSearchShard(entry, base) {
+    return loadJSON(entry.path, entry.sha256, base, doc => ({ doc, lists: new Map() }));
+  }
+
+  // Delta-encoded postings -> sorted Int32Array, decoded once per key
+  function postings(idx, key) {
+    let list = idx.lists.get(key);
+    if (!list) {
+      const deltas = idx.doc.grams[key] || [];
+      list = new Int32Array(deltas.length);
+      let acc = 0;
+      for (let i = 0; i < deltas.length; i++) { acc += deltas[i]; list[i] = acc; }
+      idx.lists.set(key, list);
+    }
+    return list;
+  }
+
+  function intersect(a, b) {
+    const out = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+      if (a[i] === b[j]) { out.push(a[i]); i++; j++; }
+      else if (a[i] < b[j]) i++;
+      else j++;
+    }
+    return out;
+  }
+
+  // Rows matching every query token, restricted to { year, type }; same row objects as load()
+  async function search(manifest, filters = {}, q = '', base = 'data/') {
+    const toks = [...new Set(tokens(q))];
+    if (!toks.length) return load(manifest, filters, base);
+    const y = filters.year ? String(filters.year) : '';
+    const entries = (manifest.search || []).filter(s => !y || String(s.year) === y);
+    const out = [];
+    for (const entry of entries) {
+      const idx = await loadSearchShard(entry, base);
+      const keys = [...new Set(toks.flatMap(queryKeys))];
+      const lists = keys.map(k => postings(idx, k)).sort((a, b) => a.length - b.length);
+      let hits = Array.from(lists[0] || []);
+      for (let i = 1; i < lists.length && hits.length; i++) hits = intersect(hits, lists[i]);
+      if (!hits.length) continue;
+      for (const t of idx.doc.types) {
+        if (filters.type && t.type !== filters.type) continue;
+        const inRange = hits.filter(d => d >= t.offset && d < t.offset + t.count);
+        if (!inRange.length) continue;
+        const shard = manifest.shards.find(s => String(s.year) === String(entry.year) && s.type === t.type);
+        if (!shard) continue;
+        const rows = await loadShard(shard, base);
+        for (const d of inRange) {
+          const r = rows[d - t.offset];
+          // Trigram hits can span tokens; confirm each query token against the row itself
+          if (r && toks.every(tok => tokenMatches(r, tok))) out.push(r);
+        }
+      }
+    }
+    return out;
+  }
+
+  // --- Detail views: one Range read from the (year, type) pack, display metadata once per schema ---
+  const packs = new Map();
+
+  async function viewBytes(url, off, len) {
+    if (packs.has(url)) return (await packs.get(url)).subarray(off, off + len);
+    const res = await fetch(url, { headers: { Range: `bytes=${off}-${off + len - 1}` } });
+    if (!res.ok) throw new Error(url + ': ' + res.status);
+    const buf = new Uint8Array(await res.arrayBuffer());
+    if (res.status === 206) return buf;
+    // Server ignored Range and sent the whole pack; keep it for the next facility
+    packs.set(url, Promise.resolve(buf));
+    return buf.subarray(off, off + len);
+  }
+
+  function display(manifest, name, base = 'data/') {
+    const d = ((manifest.views || {}).display || {})[name];
+    return d ? loadJSON(d.path, d.sha256, base) : Promise.resolve({});
+  }
+
+  // { meta, payload, display, props } for one facility, or null when it is not packed
+  async function view(manifest, rec, base = 'data/') {
+    const entry = ((manifest.views || {}).packs || [])
+      .find(p => String(p.year) === String(rec.year) && p.type === rec.type);
+    if (!entry) return null;
+    const idx = await loadJSON(entry.index, entry.sha256, base);
+    const loc = idx.entries[rec.slug];
+    if (!loc) return null;
+    const url = base + idx.pack + '?h=' + String(idx.sha256 || '').slice(0, 12);
+    const bytes = await viewBytes(url, loc[0], loc[1]);
+    const doc = JSON.parse(new TextDecoder().decode(bytes));
+    doc.props = await display(manifest, doc.display, base);
+    return doc;
+  }
+
+  return { loadManifest, decode, select, load, search, tokens, view, display };
+})();
+try { window.IndexShards = IndexShards; } catch {}
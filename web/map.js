@@ -0,0 +1,101 @@
+// Static map: fetches only the tiles in view from tiles/{z}/{x}/{y}.json (scripts/build_tiles.py).
+// Zooms above the pyramid's maxzoom reuse its deepest tiles.
+const M = {
+  manifest: null,
+  cache: new Map(),
+  loaded: new Set(),
+  zoom: -1,
+  layers: {},
+};
+
+const STYLE = {
+  county: { color: '#9ca3af', weight: 0.7 },
+  hsa: { color: '#1f2937', weight: 1.2 },
+  hpa: { color: '#059669', weight: 1 },
+  community_area: { color: '#7c3aed', weight: 0.7 },
+};
+
+function el(sel) { return document.querySelector(sel); }
+function esc(s) { return String(s ?? '').replace(/[&<>"]/g, c => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' }[c])); }
+
+function lonToX(lon, n) { return Math.floor((lon + 180) / 360 * n); }
+function latToY(lat, n) {
+  const s = Math.sin(Math.max(-85.0511, Math.min(85.0511, lat)) * Math.PI / 180);
+  return Math.floor((0.5 - Math.log((1 + s) / (1 - s)) / (4 * Math.PI)) * n);
+}
+
+function fetchTile(z, x, y) {
+  const key = `${z}/${x}/${y}`;
+  if (!M.cache.has(key)) {
+    const url = 'tiles/' + M.manifest.tiles.replace('{z}', z).replace('{x}', x).replace('{y}', y);
+    // Empty tiles are not written; a 404 means nothing to draw
+    M.cache.set(key, fetch(url).then(r => (r.ok ? r.json() : null)).catch(() => null));
+  }
+  return M.cache.get(key);
+}
+
+function popup(p) {
+  const href = `out/profiles/${p.year}/${p.type}/${p.slug}.html`;
+  const where = [p.county && `${esc(p.county)} County`, p.hsa && `HSA ${esc(p.hsa)}`, p.hpa && `HPA ${esc(p.hpa)}`].filter(Boolean).join(' · ');
+  return `<strong>${esc(p.name)}</strong><br>${esc(p.type)} · ${esc((p.years || [p.year]).join(', '))}<br>${where}<br><a href="${href}" target="_blank">Open Profile</a>`;
+}
+
+function countFacilities() {
+  el('#count').textContent = `${M.layers.facility.getLayers().length} facilities in loaded tiles`;
+}
+
+async function update(map) {
+  const m = M.manifest;
+  const z = Math.max(m.minzoom, Math.min(m.maxzoom, Math.round(map.getZoom())));
+  if (z !== M.zoom) {
+    M.zoom = z;
+    M.loaded = new Set();
+    Object.values(M.layers).forEach(l => l.clearLayers());
+  }
+  const n = 2 ** z;
+  const b = map.getBounds();
+  const [w, s, e, nb] = m.bounds;
+  const x0 = lonToX(Math.max(b.getWest(), w), n), x1 = lonToX(Math.min(b.getEast(), e), n);
+  const y0 = latToY(Math.min(b.getNorth(), nb), n), y1 = latToY(Math.max(b.getSouth(), s), n);
+  const pending = [];
+  for (let x = x0; x <= x1; x++) {
+    for (let y = y0; y <= y1; y++) {
+      const key = `${z}/${x}/${y}`;
+      if (M.loaded.has(key)) continue;
+      M.loaded.add(key);
+      pending.push(fetchTile(z, x, y).then(fc => {
+        if (!fc || z !== M.zoom) return;
+        for (const f of fc.features) M.layers[f.properties.layer]?.addData(f);
+      }));
+    }
+  }
+  await Promise.all(pending);
+  countFacilities();
+}
+
+async function load() {
+  const res = await fetch('tiles/tiles.json');
+  if (!res.ok) { el('#count').textContent = 'No tiles found (run make tiles).'; return; }
+  M.manifest = await res.json();
+  const [w, s, e, n] = M.manifest.bounds;
+  const map = L.map('map').fitBounds([[s, w], [n, e]]);
+  L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', { maxZoom: 18, attribution: '&copy; OpenStreetMap contributors' }).addTo(map);
+  const overlays = {};
+  for (const name of M.manifest.layers) {
+    if (name === 'facility') continue;
+    M.layers[name] = L.geoJSON(undefined, { style: STYLE[name] || { weight: 1 } });
+    overlays[name.replace('_', ' ').toUpperCase()] = M.layers[name];
+    if (name !== 'community_area') M.layers[name].addTo(map);
+  }
+  M.layers.facility = L.geoJSON(undefined, {
+    filter: f => !el('#type').value || f.properties.type === el('#type').value,
+    pointToLayer: (f, latlng) => L.circleMarker(latlng, { radius: 5, weight: 1, color: '#28658D', fillOpacity: 0.7 }),
+    onEachFeature: (f, layer) => layer.bindPopup(popup(f.properties)),
+  }).addTo(map);
+  L.control.layers(undefined, { ...overlays, Facilities: M.layers.facility }).addTo(map);
+  el('#type').addEventListener('change', () => { M.zoom = -1; update(map); });
+  map.on('moveend', () => update(map));
+  update(map);
+}
+
+load();
@@ -11,7 +11,7 @@ function fmt(n) {
 }
 
 async function load() {
-  const res = await fetch('data/summary.json?v=2');
+  const res = await fetch('data/summary.json');
   S.data = await res.json();
   const years = Object.keys(S.data).sort((a, b) => b - a);
   el('#year').innerHTML = years.map(y => `<option>${y}</option>`).join('');